@@ -1,7 +1,7 @@
 import logging
 import os
 from typing import Annotated, Any, Optional, List, Callable, Literal, Dict, Union
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import tempfile
 from enum import Enum
 import re
@@ -20,6 +20,8 @@ from slicer import vtkMRMLScalarVolumeNode
 import DICOMSegmentationPlugin
 
 import hashlib
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 
 #
@@ -176,6 +178,11 @@ class MHubRunnerWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         self.logic = None
         self._parameterNode = None
         self._parameterNodeGuiTag = None
+        self._outputSource: Optional['RowsPageSource'] = None
+        self._outputTables: List['RowsPageSource'] = []
+        self._outputPage = 0
+        self._outputPageSize = 500
+        self._run: Optional['RunContext'] = None                # run started from this widget (until it stops)
 
     def setup(self) -> None:
         """
@@ -197,6 +204,9 @@ class MHubRunnerWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         # Create logic class. Logic implements all computations that should be possible to run
         # in batch mode, without a graphical user interface.
         self.logic = MHubRunnerLogic()
+        
+        # bounded, throttled log output
+        self.logView = LogView(self.ui.txtLogs, self.ui.lblLogsOverflow)
 
         # Connections
 
@@ -221,9 +231,24 @@ class MHubRunnerWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         # output section
         self.ui.pthRunsDirectory.currentPath = "/tmp/mhub_slicer_extension/runs"
         self.ui.lstOutputFiles.connect('itemSelectionChanged()', self.onOutputFileSelect)
-        self.ui.cmdRefreshOutputFiles.connect('clicked(bool)', self.updateOutputRunDirectories)
+        self.ui.cmdRefreshOutputFiles.connect('clicked(bool)', lambda: self.updateOutputRunDirectories())
+        self.ui.cmdRetentionApply.connect('clicked(bool)', self.onApplyRunRetention)
+        self.ui.cmdExportTrace.connect('clicked(bool)', self.onExportTrace)
+        self.ui.spnReserveCpus.connect('valueChanged(int)', self.onResourceReserveChanged)
+        self.ui.spnReserveMemory.connect('valueChanged(double)', self.onResourceReserveChanged)
+        self.onResourceReserveChanged()
+        self.ui.chkSpeculative.connect('toggled(bool)', self.onSpeculativeChanged)
         self.ui.cmbSelectRunOutput.connect('currentIndexChanged(int)', self.prepareOutput)
+        self.ui.cmdOutputPrevPage.connect('clicked(bool)', lambda: self.renderOutputPage(self._outputPage - 1))
+        self.ui.cmdOutputNextPage.connect('clicked(bool)', lambda: self.renderOutputPage(self._outputPage + 1))
+        self.ui.cmbOutputTable.connect('currentIndexChanged(int)', self.onOutputTableSelect)
+        self.ui.cmbOutputTable.visible = False
+        self.ui.txtOutputFilter.connect('textChanged(QString)', self.onOutputFilter)
+        self.ui.cmbOutputFilterColumn.connect('currentIndexChanged(int)', self.onOutputFilter)
+        self.ui.cmbOutputColumns.connect('checkedIndexesChanged()', lambda: self.renderOutputPage(0))
+        self.ui.pthRunsDirectory.connect('currentPathChanged(QString)', self.onRunsDirectoryChanged)
         self.updateOutputRunDirectories()
+        self.recoverRuns()
                 
         # search box "searchModel" and model list "lstModelList"
         self.ui.searchModel.textChanged.connect(self.onSearchModel)
@@ -232,8 +257,15 @@ class MHubRunnerWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         self.onSearchModel("")
                 
         # Dropdowns
-        self.ui.backendSelector.addItems(["docker", "udocker"])
+        self.ui.backendSelector.addItems(["docker", "udocker", "ssh"])
         self.ui.backendSelector.connect('currentIndexChanged(int)', self.onBackendSelect)
+        
+        # ssh hosts
+        self.ui.cmbSshHost.addItems(self.logic.getAvailableSshHosts())
+        self.ui.cmbSshHost.connect('activated(int)', self.onSshHostSelect)
+
+        # segmentation output formats
+        self.ui.cmbOutputFormat.addItems([f.label for f in OutputFormat])
 
         # executable paths
         self.ui.pthDockerExecutable.currentPath = self.logic.getDockerExecutable()
@@ -261,10 +293,7 @@ class MHubRunnerWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         # for model in models:
         #     self.ui.modelSelector.addItem(model)
 
-        # load gpus
-        self.updateHostGpuList()
-            
-        # load backends
+        # load backends (and gpus of the selected backend)
         self.onBackendSelect(0)
 
         # Make sure parameter node is initialized (needed for module reload)
@@ -451,9 +480,9 @@ class MHubRunnerWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
 
     def _checkCanApply(self, caller=None, event=None) -> None:
         
-        # check if model is already running
+        # check if model is already running (or preparing, or waiting for resources)
         tasks = ProgressObserver.getTasksWhere(operation="run")
-        if len(tasks) > 0:
+        if self._run is not None or len(tasks) > 0 or ResourceManager.getQueued():
             self.ui.cancelButton.enabled = True
             return
         self.ui.cancelButton.enabled = False
@@ -487,6 +516,24 @@ class MHubRunnerWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
                 self.ui.applyButton.text = "N/A"
         
 
+    def onResourceReserveChanged(self, *args) -> None:
+        
+        # share of the machine that model runs must leave to slicer
+        ResourceManager.reserve_cpus = self.ui.spnReserveCpus.value
+        ResourceManager.reserve_memory_mb = int(self.ui.spnReserveMemory.value * 1024)
+        
+        # show what is left for inference
+        budget = ResourceManager.getBudget()
+        self.ui.lblResourceBudget.text = f"Inference budget: {budget.cpus:g} CPUs, " + (f"{budget.memory_mb / 1024:.1f} GB" if budget.memory_mb else "memory unknown")
+    
+    def onSpeculativeChanged(self, enabled: bool) -> None:
+        assert self.logic is not None
+        
+        # pull and stage on model selection, stop what was started ahead when disabled
+        self.logic.speculative = enabled
+        if not enabled:
+            self.logic.cancelPrefetch()
+    
     def onKillObservedProcessesButton(self) -> None:
         """
         Run processing when user clicks "Kill Observed Processes" button.
@@ -515,7 +562,11 @@ class MHubRunnerWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
     def updateHostGpuList(self) -> None:
         assert self.logic is not None
         
-        gpus = self.logic.getGPUInformation()
+        # gpus of the remote host for the ssh backend, local gpus otherwise
+        host = self.logic.getSshHost() if self.ui.backendSelector.currentText == "ssh" else None
+        
+        self.ui.lstHostGpu.clear()
+        gpus = self.logic.getGPUInformation(host)
         for gpu in gpus:
             self.ui.lstHostGpu.addItem(gpu)
         self.ui.chkGpuEnabled.checked = len(gpus) > 0
@@ -745,11 +796,35 @@ class MHubRunnerWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         # debug
         print("Model selected: ", row, col, model_name)
         
+        # pull the image and stage the input ahead of apply
+        if model is not None:
+            assert self.logic is not None
+            try:
+                self.logic.prefetchRun(self.ui.inputSelector.currentNode(), model, self.ui.backendSelector.currentText)
+            except Exception as e:
+                print(f"Failed to prepare {model_name} ahead: {e}")
+        
         # update apply button
         self._checkCanApply()
 
     def onBackendSelect(self, index: int) -> None:
+        
+        # the ssh host selection is only relevant for the ssh backend
+        is_ssh = self.ui.backendSelector.currentText == "ssh"
+        self.ui.cmbSshHost.enabled = is_ssh
+        if is_ssh:
+            self.onSshHostSelect()
+        else:
+            self.onBackendUpdate()
+            self.updateHostGpuList()
+        
+    def onSshHostSelect(self, index: Optional[int] = None) -> None:
+        assert self.logic is not None
+        
+        # set host and refresh backend information for the new host
+        self.logic.setSshHost(self.ui.cmbSshHost.currentText.strip())
         self.onBackendUpdate()
+        self.updateHostGpuList()
         
     def onBackendUpdate(self) -> None:
         assert self.logic is not None
@@ -768,7 +843,7 @@ class MHubRunnerWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
             self.ui.lblBackendVersion.setText(bi.version)
             
         # enable / disable gpus seclection based on backend
-        self.ui.lstHostGpu.enabled = backend == "docker"
+        self.ui.lstHostGpu.enabled = backend in ["docker", "ssh"]
             
         # update install backend button and images list
         self.updateInstallUDockerBackendButtonState()
@@ -927,26 +1002,21 @@ class MHubRunnerWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
             
     #     self.initiateHostTest()
     
-    def updateOutputRunDirectories(self, open_latest: bool = False) -> None:
+    def updateOutputRunDirectories(self, open_latest: bool = False, reconcile: bool = True) -> None:
+        assert self.logic is not None
         
-        # read output files from temp directory
-        runs_dir = self.ui.pthRunsDirectory.currentPath
-        os.makedirs(runs_dir, exist_ok=True)
+        # run index of the runs directory
+        history = self.logic.getRunHistory(self.ui.pthRunsDirectory.currentPath)
+        
+        # pick up runs added (or removed) from outside
+        if reconcile:
+            history.reconcile()
         
         # capture selected run
         selected_run = self.ui.cmbSelectRunOutput.currentText
         
-        # get run directories, ordered by creation date
-        run_dirs = []
-        for d in os.scandir(runs_dir):
-            if not d.is_dir() or d.name.startswith("."):
-                continue
-            run_dirs.append(d)
-        run_dirs.sort(key=lambda d: d.stat().st_ctime, reverse=True)
-        run_dirs = [str(d.name) for d in run_dirs]
-            
-        # run_dirs = [str(d.name) for d in os.scandir(runs_dir) if d.is_dir() and not d.name.startswith(".")]
-        print("run_dirs: ", run_dirs)
+        # get runs, latest first
+        run_dirs = [record.run_id for record in history.list()]
         
         # clear run list
         self.ui.cmbSelectRunOutput.clear()
@@ -961,21 +1031,103 @@ class MHubRunnerWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         
         # open latest run directory
         if open_latest and run_dirs:
-            self.ui.cmbSelectRunOutput.setCurrentText(run_dirs[-1])
+            self.ui.cmbSelectRunOutput.setCurrentText(run_dirs[0])
+    
+    def onRunsDirectoryChanged(self, path: str) -> None:
+        if not os.path.isdir(path):
+            return
+        self.updateOutputRunDirectories()
+        self.recoverRuns()
+    
+    def recoverRuns(self) -> None:
+        """
+        Reattach to runs of the runs directory that were queued or running when Slicer was closed.
+        """
+        assert self.logic is not None
+        
+        # refresh the run list whenever a recovered run finishes
+        def on_stop(record: 'RunRecord'):
+            print(f"Recovered run {record.run_id} {record.status} with return code {record.returncode}")
+            self.updateOutputRunDirectories(reconcile=False)
+        
+        try:
+            recovered = self.logic.recoverRuns(self.ui.pthRunsDirectory.currentPath, onStop=on_stop)
+        except Exception as e:
+            print(f"Failed to recover runs: {e}")
+            return
+        
+        if recovered:
+            slicer.util.showStatusMessage(f"Recovering {len(recovered)} run(s) of a previous session", 5000)
+    
+    def getRetentionPolicy(self) -> 'RetentionPolicy':
+        return RetentionPolicy(
+            max_age_days=self.ui.spnRetentionDays.value,
+            max_count=self.ui.spnRetentionRuns.value,
+            max_total_mb=self.ui.spnRetentionSize.value * 1000
+        )
+    
+    def onApplyRunRetention(self) -> None:
+        self.applyRunRetention(confirm=True)
+    
+    def applyRunRetention(self, confirm: bool) -> None:
+        assert self.logic is not None
+        runs_dir = self.ui.pthRunsDirectory.currentPath
+        policy = self.getRetentionPolicy()
+        
+        # what would be compacted (archived) and purged (deleted)
+        actions = self.logic.planRunRetention(runs_dir, policy)
+        if not actions:
+            return
+        compacted = [record.run_id for record, action in actions if action == "compact"]
+        purged = [record.run_id for record, action in actions if action == "purge"]
+        details = "\n".join(f"{action} {record.run_id}" for record, action in actions)
+        
+        # a cleanup started from the button is confirmed first
+        if confirm and not slicer.util.confirmOkCancelDisplay(
+            f"Archive {len(compacted)} and delete {len(purged)} run(s) in {runs_dir}?", 
+            windowTitle="Clean up runs", detailedText=details):
+            return
+        
+        # refresh the run list once the cleanup is done
+        def on_stop(returncode: int, stdout: str, *args):
+            print(f"Run retention finished (return code {returncode}):\n{stdout}")
+            self.logView.append(f"Run retention archived {len(compacted)} and deleted {len(purged)} run(s):\n{stdout}")
+            self.updateOutputRunDirectories(reconcile=False)
+        
+        self.logic.applyRunRetention(runs_dir, policy, onStop=on_stop, actions=actions)
+    
+    def onExportTrace(self) -> None:
+        assert self.logic is not None
+        
+        # get selected run
+        selected_run = self.ui.cmbSelectRunOutput.currentText
+        if not selected_run:
+            return
+        
+        # ask for the target file
+        file = qt.QFileDialog.getSaveFileName(None, "Export Trace", f"{selected_run}.trace.json", "Chrome Trace (*.json)")
+        if not file:
+            return
+        
+        # export
+        run_dir = os.path.join(self.ui.pthRunsDirectory.currentPath, selected_run)
+        if not self.logic.exportRunTrace(run_dir, file):
+            slicer.util.warningDisplay(f"No trace recorded for run {selected_run}.")
     
     def prepareOutput(self) -> None:
         assert self.logic is not None
         
-        # read output files from temp directory
+        # run index of the runs directory
         runs_dir = self.ui.pthRunsDirectory.currentPath
-        os.makedirs(runs_dir, exist_ok=True)
+        history = self.logic.getRunHistory(runs_dir)
         
-        # get selected run directory
+        # get selected run
         selected_run = self.ui.cmbSelectRunOutput.currentText
+        record = history.get(selected_run) if selected_run else None
         output_dir = os.path.join(runs_dir, selected_run)
         
-        # get output files
-        output_files = self.logic.scanDirectoryForFilesWithExtension(output_dir, extension=[".json", ".csv"])
+        # get output files (archived runs have none)
+        output_files = [os.path.join(output_dir, f) for f in record.output_files if f.endswith((".json", ".csv"))] if record and not record.archived else []
         
         # clear output list
         self.ui.lstOutputFiles.clear()
@@ -1015,67 +1167,123 @@ class MHubRunnerWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         else:
             tableNode = self.ui.outputTableSelector.currentNode()
         
-        # if file is json, open text
+        # json files are split into a Key/Value table and one table per record array
+        self._outputTables = []
         if output_file.endswith(".json"):
-            # self.openFile(output_file)
-         
-            import json
-            
-            # read json file
-            with open(output_file, 'r') as f:
-                data = json.load(f)
-                
-            # flatten nested json into dot-notation keys (array items in square brackets)
-            def flatten_json(y):
-                out = {}
-                def flatten(x, name=''):
-                    if type(x) is dict:
-                        for a in x:
-                            flatten(x[a], name + a + '.')
-                    elif type(x) is list:
-                        i = 0
-                        for a in x:
-                            flatten(a, name + str(i) + '.')
-                            i += 1
-                    else:
-                        out[name[:-1]] = x
-                flatten(y)
-                return out
-            
-            # flatten json
-            data = flatten_json(data)
-            
-            # debug
-            print("Flattened json: ", data)
-            
-            # create table
-            self.logic.renderTableData(tableNode, ["Key", "Value"], [[k, v] for k, v in data.items()])
+            tables = JsonFlattener().tables(JsonFlattener.eventsFromFile(output_file))
+            self._outputTables = [RowsPageSource(header, rows) for _, header, rows in tables]
+            source = self._outputTables[0] if self._outputTables else RowsPageSource(["Key", "Value"], [])
          
         elif output_file.endswith(".csv"):
-
-            import csv
             
-            # read csv file 
-            with open(output_file, 'r') as f:
-                reader = csv.reader(f)
-                csv_header = next(reader)
-                csv_data = list(reader)
-                
-            # create table
-            self.logic.renderTableData(tableNode, csv_header, csv_data)   
+            # rows are indexed once and only parsed page by page
+            tables = []
+            source = CsvPageSource(output_file)
+            
+        else:
+            return
+        
+        # table selection (only for json files with record arrays)
+        self.ui.cmbOutputTable.blockSignals(True)
+        self.ui.cmbOutputTable.clear()
+        self.ui.cmbOutputTable.addItems([name for name, _, _ in tables])
+        self.ui.cmbOutputTable.visible = len(tables) > 1
+        self.ui.cmbOutputTable.blockSignals(False)
+        
+        # show source
+        self.setOutputSource(source)
+        
+    def onOutputTableSelect(self, index: int) -> None:
+        if 0 <= index < len(self._outputTables):
+            self.setOutputSource(self._outputTables[index])
+        
+    def setOutputSource(self, source: 'RowsPageSource') -> None:
+        
+        # replace the previous source
+        if self._outputSource is not None and self._outputSource not in self._outputTables:
+            self._outputSource.close()
+        self._outputSource = source
+        
+        # update column selection and filter column
+        self.ui.cmbOutputColumns.blockSignals(True)
+        self.ui.cmbOutputFilterColumn.blockSignals(True)
+        self.ui.cmbOutputColumns.clear()
+        self.ui.cmbOutputColumns.addItems(source.header)
+        for i in range(len(source.header)):
+            self.ui.cmbOutputColumns.setCheckState(self.ui.cmbOutputColumns.model().index(i, 0), qt.Qt.Checked)
+        self.ui.cmbOutputFilterColumn.clear()
+        self.ui.cmbOutputFilterColumn.addItems(["All columns"] + source.header)
+        self.ui.cmbOutputColumns.blockSignals(False)
+        self.ui.cmbOutputFilterColumn.blockSignals(False)
+        
+        # apply current filter and show first page
+        self.onOutputFilter()
+        
+    def onOutputFilter(self, *args) -> None:
+        if self._outputSource is None:
+            return
+        
+        # filter in all columns (index 0) or in the selected one
+        column = self.ui.cmbOutputFilterColumn.currentIndex - 1
+        self._outputSource.setFilter(self.ui.txtOutputFilter.text, column if column >= 0 else None)
+        self.renderOutputPage(0)
+        
+    def renderOutputPage(self, page: int) -> None:
+        assert self.logic is not None
+        if self._outputSource is None:
+            return
+        
+        # clamp page
+        pages = self._outputSource.pages(self._outputPageSize)
+        self._outputPage = max(0, min(page, pages - 1))
+        
+        # selected columns (all if nothing is selected)
+        columns = [index.row() for index in self.ui.cmbOutputColumns.checkedIndexes()] or None
+        
+        # render the page into the table node
+        header, rows = self._outputSource.page(self._outputPage, self._outputPageSize, sorted(columns) if columns else None)
+        self.logic.renderTableData(self.ui.outputTableSelector.currentNode(), header, rows)
+        
+        # update page controls
+        self.ui.lblOutputPage.text = f"{self._outputPage + 1} / {pages} ({len(self._outputSource)} rows)"
+        self.ui.cmdOutputPrevPage.enabled = self._outputPage > 0
+        self.ui.cmdOutputNextPage.enabled = self._outputPage < pages - 1
 
     def onCancelButton(self) -> None:
         
+        # the run started from this widget, any run otherwise (e.g. runs reattached after a restart of Slicer)
+        filters = {"run_id": self._run.run_id} if self._run is not None else {}
+        
         # search for the running process
-        tasks = ProgressObserver.getTasksWhere(operation="run")
-        assert len(tasks) <= 1, "Multiple tasks running"
-        assert len(tasks) > 0, "No task running"
+        tasks = ProgressObserver.getTasksWhere(operation="run", **filters)
+        queued = [name for name in ResourceManager.getQueued() if self._run is None or name == self._run.run_id]
+        
+        # the run of this widget that is still staging its input or pulling its image stops preparing
+        if self._run is not None and self._run.graph is not None and not self._run.graph.stopped:
+            self._run.graph.cancel()
+            return
+        
+        # runs waiting for resources are only removed from the queue
+        if not tasks and queued:
+            for name in queued:
+                ResourceManager.cancel(name)
+            return
         
-        # get task
+        if not tasks:
+            print("No run to cancel")
+            return
+        
+        # several runs: let the user pick the one to cancel
         task = tasks[0]
+        if len(tasks) > 1:
+            labels = [f"{t.data['run_id']} ({t.data['image_name']})" for t in tasks]
+            label = qt.QInputDialog.getItem(slicer.util.mainWindow(), "Cancel running model", "Select the run to cancel:", labels, 0, False)
+            if label not in labels:
+                return
+            task = tasks[labels.index(label)]
         
         # details of the running task
-        details = task.data
+        details = "\n".join(f"{key}: {value}" for key, value in task.data.items())
         
         # ask the user if he wants to stop the running model
         msg = qt.QMessageBox()
@@ -1121,91 +1329,120 @@ class MHubRunnerWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         # get backend
         backend = self.ui.backendSelector.currentText
         
-        ###### TEST (for caching on host)
-        # get InstanceUIDs (only available for nodes loaded through the dicom module)
+        # get input node
+        assert self.logic is not None
         node = self.ui.inputSelector.currentNode()
-        instanceUIDs = node.GetAttribute('DICOM.instanceUIDs')
-
-        # create hash from instanceUIDs
-        hash = hashlib.sha256()
-        hash.update(instanceUIDs.encode('utf-8'))
-        instance_idh = hash.hexdigest()
 
         # get selected model
         model = self.getModelFromTableSelection()
         assert model is not None, "No model selected"
-
-        print(instance_idh)
-        
-        # runid as yy.mm.dd-hh.mm.ss-model.name
-        runid = f"{datetime.now().strftime('%y.%m.%d-%H.%M.%S')}_{model.name}"
     
         with slicer.util.tryWithErrorDisplay(_("Failed to compute results."), waitCursor=True):
             assert self.logic is not None
             
-            import shutil
-            
-            # TODO: create temp directory for slicer-mhub under $HOME/.slicer-mhub ??
-            #tmp_dir = "/Users/lenny/Projects/SlicerMHubIntegration/SlicerMHubRunner/return_data"
-            tmp_dir = "/tmp/mhub_slicer_extension"
-            runs_dir = self.ui.pthRunsDirectory.currentPath
-
-            input_dir = os.path.join(tmp_dir, "input")
-            output_dir = os.path.join(runs_dir, runid)
-            
-            # if input dir exists, remove it -> we always make sure to run on a fresh input dir (NOTE: parallel execution ofc wouldn't work like this)
-            if os.path.exists(input_dir):
-                shutil.rmtree(input_dir)
-                
-            # create temp dir with input and output dir
-            os.makedirs(input_dir, exist_ok=True)
-            os.makedirs(output_dir, exist_ok=True)
-            
             # get selected gpus
-            # TODO: make gpus None 
-            gpus: Optional[List[int]] = None
-            if self.ui.chkGpuEnabled.checked:
-                gpus = []
-                for i in range(self.ui.lstHostGpu.count):
-                    item = self.ui.lstHostGpu.item(i)
-                    if item.checkState() == qt.Qt.Checked:
-                        print("Selected GPU: ", item.text())
-                        gpus.append(i)
-            
-            # copy selected dicom data into input directory
-            self.logic.copy_node(
-                self.ui.inputSelector.currentNode(),
-                input_dir
+            gpus = self.logic.selectGpus(
+                self.ui.chkGpuEnabled.checked, 
+                [i for i in range(self.ui.lstHostGpu.count) if self.ui.lstHostGpu.item(i).checkState() == qt.Qt.Checked],
+                backend
             )
             
+            # create the run and stage the input
+            runs_dir = self.ui.pthRunsDirectory.currentPath
+            output_format = list(OutputFormat)[self.ui.cmbOutputFormat.currentIndex]
+            ctx = self.logic.prepareRun(node, model, backend, gpus, runs_dir, output_format)
+            
             # clear logs
-            self.ui.txtLogs.clear()
+            self.logView.clear()
+            
+            # timeout learned from previous runs of this model (reported before the run starts)
+            self.logView.append(f"Running {model.label} on {ctx.input_size / 1e6:.1f} MB input, {ctx.timeout}")
             
             # PROGRESS handler
             def onProgress(progress: float, stdout: Optional[str]):
                 self.ui.applyButton.text = f"Running {model.label} ({progress}s)"
                 
-                # remove all color formatting from stdout string
-                if stdout is not None:
-                    stdout = re.sub(r'\x1b\[[0-9;]*m', '', stdout)
+                # display stdout in txtLogs (batched)
+                if stdout:
+                    self.logView.write(stdout)
+                   
+            # STATUS handler (module progress parsed from the mhub output)
+            def onStatus(progress: MHubProgress):
+                fraction = progress.fraction
+                if fraction is None:
+                    self.ui.prgRun.setRange(0, 0)
+                else:
+                    self.ui.prgRun.setRange(0, 1000)
+                    self.ui.prgRun.setValue(int(fraction * 1000))
+                
+                # current module, step and eta
+                text = progress.module or "Starting"
+                text += f" ({progress.index}/{progress.total})" if progress.total else ""
+                text += f" step {progress.step}/{progress.steps}" if progress.steps else ""
+                text += f" - ETA {int(progress.eta // 60)}:{int(progress.eta % 60):02d}" if progress.eta is not None and progress.eta >= 0 else ""
+                self.ui.prgRun.setFormat(text)
+                   
+            # STAGING handler (input files copied in the background)
+            def onStaging(progress: StagingProgress):
+                self.ui.prgRun.setRange(0, 1000)
+                self.ui.prgRun.setValue(int(progress.fraction * 1000))
+                text = f"Staging {progress.files}/{progress.total_files} files, {progress.rate / 1e6:.0f} MB/s"
+                text += f" - ETA {int(progress.eta // 60)}:{int(progress.eta % 60):02d}" if progress.eta is not None else ""
+                self.ui.prgRun.setFormat(text)
+                   
+            # TELEMETRY handler (live resource gauges)
+            def onTelemetry(sample: TelemetrySample):
+                self.ui.wdgTelemetry.visible = True
+                
+                # cpu relative to the container's cpu limit (100% per core)
+                cpus = ResourceManager.getProfile(model.name, gpus is not None).cpus if backend == "docker" else float(os.cpu_count() or 1)
+                self.ui.prgCpu.setValue(min(int(sample.cpu_percent / cpus), 100))
+                self.ui.prgCpu.setFormat(f"CPU {sample.cpu_percent:.0f}%")
+                
+                # memory relative to the container's memory limit
+                self.ui.prgMemory.setValue(min(int(100 * sample.memory_mb / sample.memory_limit_mb), 100) if sample.memory_limit_mb else 0)
+                self.ui.prgMemory.setFormat(f"RAM {sample.memory_mb / 1024:.1f} / {sample.memory_limit_mb / 1024:.1f} GB")
                 
-                # display stdout in txtLogs
-                if stdout is not None and stdout.strip() != "":
-                    self.ui.txtLogs.appendPlainText(stdout)
+                # gpu memory
+                self.ui.prgGpuMemory.visible = sample.gpu_memory_mb is not None
+                if sample.gpu_memory_mb is not None and sample.gpu_memory_total_mb:
+                    self.ui.prgGpuMemory.setValue(min(int(100 * sample.gpu_memory_mb / sample.gpu_memory_total_mb), 100))
+                    self.ui.prgGpuMemory.setFormat(f"GPU {sample.gpu_memory_mb / 1024:.1f} / {sample.gpu_memory_total_mb / 1024:.1f} GB")
+                
+                # disk io
+                self.ui.lblDiskIO.text = f"IO r {sample.block_read_mb:.0f} MB, w {sample.block_write_mb:.0f} MB"
+                   
+            # IMPORT handlers
+            def onImportProgress(stage: str, done: int, total: int):
+                self.logView.append(f"Importing segmentations: {stage} ({done}/{total})")
+                
+            def onImportStop(timings: Dict[str, float]):
+                self.logView.append("Imported segmentations in " + ", ".join(f"{k}: {v:.2f}s" for k, v in timings.items()))
                    
             # TERMINATION handler
             def onStop(returncode: int, stdout: str, timedout: bool, killed: bool):
                 assert self.logic is not None
+                self._run = None
+                self.ui.prgRun.visible = False
+                self.ui.wdgTelemetry.visible = False
+                self.logView.flush()
                 
                 # ---------------------- process model results
 
-                if 'Segmentation' in model.categories:
-                    dsegfiles = self.logic.scanDirectoryForFilesWithExtension(output_dir)
-                    self.logic.addFilesToDatabase(dsegfiles, operation="copy")
-                    self.logic.importSegmentations(dsegfiles)
+                # results of a run this run attached to are imported by the caller that started it
+                if not ctx.attached:
+                    self.logic.importRunResults(ctx, onProgress=onImportProgress, onStop=onImportStop)
+                
+                # peak resource usage (the context points to the run that actually ran, see startRun)
+                record = self.logic.getRunHistory(runs_dir).get(ctx.run_id)
+                if record and record.peak_memory_mb is not None:
+                    self.logView.append(f"Peak usage: CPU {record.peak_cpu:.0f}%, RAM {record.peak_memory_mb / 1024:.1f} GB" + (f", GPU {record.peak_gpu_memory_mb / 1024:.1f} GB" if record.peak_gpu_memory_mb is not None else ""))
+                
+                # stage timings so far (the segmentation import is added to the trace when it finishes)
+                self.logView.append("Run timings: " + ", ".join(f"{k}: {v:.2f}s" for k, v in RunTrace.get(ctx.output_dir).summary().items()))
                     
                 if 'Prediction' in model.categories:
-                    self.updateOutputRunDirectories(open_latest=True)
+                    self.updateOutputRunDirectories(open_latest=True, reconcile=False)
                     self.ui.outputCollapsibleButton.collapsed = False
                     
                 # ---------------------- Message Box
@@ -1216,6 +1453,7 @@ class MHubRunnerWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
                 text = f"Running {model.label} (mhubai/{model.name}:latest) finished with return code {returncode}."
                 text += "\nProcess timed out." if timedout else ""
                 text += "\nProcess was killed." if killed else ""
+                text += f"\n{model.label} has no {output_format.label} workflow, the segmentations were written as DICOM SEG." if ctx.workflow == "default" and output_format != OutputFormat.DICOMSEG and 'Segmentation' in model.categories else ""
                 msg.setText(text)
                 msg.setDetailedText(stdout)
                 msg.addButton(qt.QMessageBox.Ok)
@@ -1225,16 +1463,30 @@ class MHubRunnerWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
                 
                 self._checkCanApply()
                 
-            # run model logic
-            self.logic.run_mhub(
-                model=model,
-                backend=backend,
-                gpus=gpus,
-                input_dir=input_dir,
-                output_dir=output_dir,
-                onProgress=onProgress,
-                onStop=onStop
-            )
+                # ---------------------- Keep runs directory bounded (if enabled)
+                
+                if self.ui.chkRetentionAuto.checked:
+                    self.applyRunRetention(confirm=False)
+                
+            # run model logic (the widget is busy until onStop)
+            self._run = ctx
+            try:
+                started = self.logic.startRun(
+                    ctx,
+                    onProgress=onProgress,
+                    onStop=onStop,
+                    onStatus=onStatus,
+                    onTelemetry=onTelemetry,
+                    onStaging=onStaging
+                )
+            except Exception:
+                self._run = None
+                raise
+            
+            # show progress
+            self.ui.prgRun.setRange(0, 0)
+            self.ui.prgRun.setFormat("Starting" if started else "Preparing")
+            self.ui.prgRun.visible = True
             
        
 #
@@ -1296,6 +1548,148 @@ class MHubRunnerWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
 #     def onStop(self):
 #         pass
 
+class LogView:
+    """
+    Bounded, throttled log output for a QPlainTextEdit. Appends are batched and flushed at most 
+    frequency times per second, only the last max_lines lines are kept (dropped lines are reported 
+    on the overflow label). ANSI colors are rendered, other escape codes are removed.
+    """
+    
+    # select graphic rendition (colors, bold) and all other escape sequences (cursor movement, ...)
+    sgr_pattern: re.Pattern = re.compile(r'\x1b\[([0-9;]*)m')
+    escape_pattern: re.Pattern = re.compile(r'\x1b(?:\[[0-9;?]*[A-Za-ln-z]|[()][A-Z0-9]|[=>])')
+    
+    # ansi color codes (30-37, 90-97)
+    colors: Dict[int, str] = {
+        30: "#000000", 31: "#c23621", 32: "#25bc24", 33: "#adad27", 34: "#492ee1", 35: "#d338d3", 36: "#33bbc8", 37: "#808080",
+        90: "#808080", 91: "#ff0000", 92: "#00c000", 93: "#c0c000", 94: "#0000ff", 95: "#ff00ff", 96: "#00c0c0", 97: "#a0a0a0",
+    }
+    
+    def __init__(self, widget, overflow_label=None, max_lines: int = 5000, frequency: float = 4, color: bool = True):
+        self.widget = widget
+        self.overflow_label = overflow_label
+        self.max_lines = max_lines
+        self.color = color
+        
+        # pending lines and the incomplete last line of the stream
+        self._pending: List[str] = []
+        self._partial = ""
+        self._lines = 0
+        
+        # current sgr state (persists across lines)
+        self._fg: Optional[str] = None
+        self._bold = False
+        
+        # the widget drops the oldest blocks itself
+        self.widget.setMaximumBlockCount(max_lines)
+        
+        # flush timer
+        self._timer: qt.QTimer = qt.QTimer()
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(1000/frequency)
+        self._timer.timeout.connect(self.flush)
+        
+    def write(self, text: str) -> None:
+        """
+        Append a chunk of a stream, incomplete lines are kept until the line is complete.
+        """
+        lines = (self._partial + text).split("\n")
+        self._partial = self._redraw(lines.pop())
+        self._pending.extend(self._redraw(line) for line in lines)
+        self._schedule()
+        
+    def append(self, line: str) -> None:
+        """
+        Append a complete line (e.g. a status message).
+        """
+        if self._partial:
+            self._pending.append(self._partial)
+            self._partial = ""
+        self._pending.append(line)
+        self._schedule()
+        
+    def flush(self) -> None:
+        self._timer.stop()
+        
+        # the incomplete line is only flushed if nothing else is pending (e.g. a prompt or a progress bar)
+        if not self._pending and self._partial.strip():
+            self._pending.append(self._partial)
+            self._partial = ""
+        if not self._pending:
+            return
+        
+        # lines beyond the visible buffer are never rendered
+        lines, self._pending = self._pending[-self.max_lines:], []
+        self._lines += len(lines)
+        
+        # render
+        if self.color:
+            self.widget.appendHtml("".join(f'<p style="margin:0; white-space:pre-wrap">{self._html(line)}</p>' for line in lines))
+        else:
+            self.widget.appendPlainText("\n".join(self.escape_pattern.sub("", self.sgr_pattern.sub("", line)) for line in lines))
+        
+        self._updateOverflow()
+        
+    def clear(self) -> None:
+        self._timer.stop()
+        self._pending, self._partial, self._lines = [], "", 0
+        self._fg, self._bold = None, False
+        self.widget.clear()
+        self._updateOverflow()
+        
+    def _schedule(self) -> None:
+        
+        # count lines that are dropped before they are rendered
+        if len(self._pending) > self.max_lines:
+            self._lines += len(self._pending) - self.max_lines
+            del self._pending[:-self.max_lines]
+        
+        if not self._timer.isActive():
+            self._timer.start()
+            
+    def _updateOverflow(self) -> None:
+        if self.overflow_label is None:
+            return
+        dropped = self._lines - self.max_lines
+        self.overflow_label.visible = dropped > 0
+        self.overflow_label.text = f"{dropped} earlier lines not shown (only the last {self.max_lines} lines are kept)" if dropped > 0 else ""
+        
+    def _redraw(self, line: str) -> str:
+        
+        # progress bars redraw the line with \r, only the latest state is kept
+        return line[line.rstrip("\r").rfind("\r") + 1:]
+        
+    def _html(self, line: str) -> str:
+        import html
+        line = self.escape_pattern.sub("", line.rstrip("\r"))
+        out = []
+        pos = 0
+        for match in self.sgr_pattern.finditer(line):
+            out.append(self._span(html.escape(line[pos:match.start()])))
+            self._sgr(match.group(1))
+            pos = match.end()
+        out.append(self._span(html.escape(line[pos:])))
+        return "".join(out)
+    
+    def _span(self, text: str) -> str:
+        if not text:
+            return ""
+        style = (f"color:{self._fg};" if self._fg else "") + ("font-weight:bold;" if self._bold else "")
+        return f'<span style="{style}">{text}</span>' if style else text
+    
+    def _sgr(self, params: str) -> None:
+        for code in [int(c) for c in params.split(";") if c.isdigit()] or [0]:
+            if code == 0:
+                self._fg, self._bold = None, False
+            elif code == 1:
+                self._bold = True
+            elif code == 22:
+                self._bold = False
+            elif code == 39:
+                self._fg = None
+            elif code in self.colors:
+                self._fg = self.colors[code]
+
 class ModelStatus(Enum):
     UNKNOWN = "unknown"         # Model status is unknown
     PULLABLE = "pullable"       # Model can be pulled
@@ -1303,6 +1697,19 @@ class ModelStatus(Enum):
     PULLED = "pulled"           # Model is available locally
     RUNNING = "running"         # Model is running
     
+class OutputFormat(Enum):
+    DICOMSEG = "dicomseg"       # DICOM SEG, imported through the dicom database
+    NIFTI = "nifti"             # NIfTI label map, loaded directly
+    NRRD = "nrrd"               # NRRD label map, loaded directly
+    
+    @property
+    def label(self) -> str:
+        return {"dicomseg": "DICOM SEG", "nifti": "NIfTI", "nrrd": "NRRD"}[self.value]
+    
+    @property
+    def extensions(self) -> List[str]:
+        return {"dicomseg": [".seg.dcm"], "nifti": [".nii.gz", ".nii"], "nrrd": [".nrrd"]}[self.value]
+    
 @dataclass
 class Model:
     id: str
@@ -1331,15 +1738,16 @@ class Model:
             return True
         return False
     
-# @dataclass
-# class HostInformation:
-#     name: str
-#     canConnect: bool
-#     testedOn: datetime
+@dataclass
+class HostInformation:
+    name: str
+    canConnect: bool
+    testedOn: datetime
     
-#     dockerVersion: str
-#     gpus: List[str]
-#     cachedSubjects: List[str]
+    dockerVersion: str
+    gpus: List[str]
+    cachedSubjects: List[str]
+    dockerAvailable: bool = False
 
 @dataclass
 class BackendInformation:
@@ -1481,9 +1889,12 @@ class ProgressObserver:
     # keep track of all running tasks
     _tasks: List['ProgressObserver'] = []
     
+    # seconds between SIGTERM and SIGKILL when a process is cancelled or times out
+    grace_period: float = 10
+    
     @classmethod
     def killAll(cls):
-        for task in cls._tasks:
+        for task in list(cls._tasks):
             task.kill()
             
     @classmethod
@@ -1521,6 +1932,8 @@ class ProgressObserver:
         
         # set variables
         self._disabled = False
+        self._terminating: Optional[tuple[bool, bool]] = None
+        self._terminate_deadline = 0.0
         self._timeout = timeout
         self._frequency = frequency
         self._seconds_elapsed = 0.0
@@ -1558,13 +1971,14 @@ class ProgressObserver:
     def _run(self, cmd: List[str]):
         import subprocess
         
-        # run command
+        # run command (in its own process group, so it can be terminated with all its children)
         self._proc = subprocess.Popen(
             cmd, 
             stdout=open(self._stdout_file_name, 'w', encoding='utf-8'), 
             stderr=subprocess.PIPE,
             text=True,
-            encoding='utf-8'
+            encoding='utf-8',
+            start_new_session=True
         )
         
         # start timer
@@ -1596,12 +2010,20 @@ class ProgressObserver:
         # update time
         self._seconds_elapsed += 1.0 / self._frequency
         
+        # cancelled or timed out: wait until the process is gone
+        if self._terminating is not None:
+            if self._terminated():
+                self._timer.stop()
+                try:
+                    self._stop(-1, *self._terminating)
+                except Exception as e:
+                    print("Error when killing process: stop method failed. ", self.cmd, e)
+                self._tasks.remove(self)
+            return
+        
         # check timeout condition
         if self._timeout > 0 and self._seconds_elapsed > self._timeout:
-            self._timer.stop()
-            self._proc.kill()
-            self._stop(-1, True, False)
-            self._tasks.remove(self)
+            self._shutdown(timedout=True, killed=False)
             return
         
         # stop timer if process is done
@@ -1632,103 +2054,2531 @@ class ProgressObserver:
 
     def kill(self):
         
-        # disable
-        self._disabled = True
+        # the task stays listed until the process is gone, so its resources are not handed out twice
+        self._shutdown(timedout=False, killed=True)
         
-        # stop the timer
-        self._timer.stop()
+    @property
+    def terminating(self) -> bool:
+        return self._terminating is not None
         
-        # try to stop 
-        try:
-            self._stop(-1, False, True)
-        except Exception as e:
-            print("Error when killing process: stop method failed. ", self.cmd, e)
+    def _shutdown(self, timedout: bool, killed: bool):
+        import time
+        
+        # only once
+        if self._terminating is not None:
+            return
+        self._terminating = (timedout, killed)
+        self._terminate_deadline = time.monotonic() + self.grace_period
+        
+        # terminate, the timer stops the task once the process is gone
+        self._terminate()
+        if not self._timer.isActive():
+            self._timer.start()
             
-        # then stop timer, kill process and remove from tasks
-        if self._proc is not None:
-            self._proc.kill()
+    def _terminate(self):
+        import signal
+        
+        # SIGTERM to the process group, SIGKILL follows after the grace period
+        assert self._proc is not None
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(os.getpgid(self._proc.pid), signal.SIGTERM)
+            else:
+                self._proc.terminate()
+        except (ProcessLookupError, PermissionError):
+            pass
+        
+    def _terminated(self) -> bool:
+        import time, signal
+        assert self._proc is not None
+        
+        if self._proc.poll() is not None:
+            return True
+        
+        # escalate
+        if time.monotonic() > self._terminate_deadline:
+            try:
+                if hasattr(os, "killpg"):
+                    os.killpg(os.getpgid(self._proc.pid), signal.SIGKILL)
+                else:
+                    self._proc.kill()
+            except (ProcessLookupError, PermissionError):
+                pass
             
-        # remove from tasks
-        self._tasks.remove(self)
+        return False
   
-class ProcessChain:
+class SegmentationImportPipeline:
+    """
+    Import DICOM SEG files into the dicom database and the scene without blocking the UI.
     
-    @dataclass
-    class CMD:
-        index: int
-        cmd: List[str]
-        name: Optional[str] = None
-        frequency: float = 2
-        timeout: int = 0
-        returncode: Optional[int] = None
-        success: Optional[bool] = None
-        started: bool = False
+    index: all files are handed to the dicom indexer in a single call, indexing runs in the background
+    parse: SEG headers are parsed in a worker thread (segment count per file)
+    load:  files are examined and loaded one per timer tick (smallest first), so segmentations appear progressively
+    """
     
-    def __init__(self):
-        self.cmds: List['ProcessChain.CMD'] = []
-        self.started = False
-        self.stopped = False
-        self.success = True
-        self.index = -1
+    # keep track of all running pipelines
+    _pipelines: List['SegmentationImportPipeline'] = []
+    
+    def __init__(self, files: List[str], operation: Literal["reference", "copy"] = "copy", load: bool = True, frequency: float = 20):
+        """
+        files:     DICOM SEG files to import
+        operation: add files by reference or copy them into the dicom database
+        load:      load the segmentations into the scene, otherwise only add them to the database
+        frequency: scheduling frequency in Hz
+        """
+        self.files = [os.path.abspath(f) for f in files]
+        self.operation = operation
+        self.load = load
+        
+        # results
+        self.segments: Dict[str, int] = {}
+        self.loaded: List[str] = []
+        self.timings: Dict[str, float] = {"index": 0.0, "parse": 0.0, "examine": 0.0, "load": 0.0, "total": 0.0}
+        
+        # state
+        self._stage: Literal["idle", "index", "load", "done"] = "idle"
+        self._queue: List[str] = []
+        self._indexer = None
+        self._parser: Optional[threading.Thread] = None
+        self._started = 0.0
+        
+        # callbacks
+        self._onProgress: Optional[Callable[[str, int, int], None]] = None
+        self._onStop: Optional[Callable[[Dict[str, float]], None]] = None
         
-        self._seconds_elapsed = 0.0
+        # initialize timer
+        self._timer: qt.QTimer = qt.QTimer()
+        self._timer.setInterval(1000/frequency)
+        self._timer.timeout.connect(self._onTimeout)
         
-        self._onStop: Optional[Callable[[bool], None]] = None
-        self._onProgress: Optional[Callable[['ProcessChain.CMD', float], None]] = None
+    def start(self):
+        import time
+        self._started = time.monotonic()
         
-    def add(self, cmd: List[str], name: Optional[str] = None, timeout: int = 0, frequency: float = 2):
-        assert not self.started, "Process chain already started"
-        self.cmds.append(self.CMD(len(self.cmds), cmd, name, frequency, timeout))
+        # parse headers in a worker thread
+        self._parser = threading.Thread(target=self._parse, daemon=True)
+        self._parser.start()
         
-    def start(self):
-        self.started = True
-
-        # start first process
-        self._start_next()
+        # index all files in a single (background) import
+        self._indexer = ctk.ctkDICOMIndexer()
+        self._indexer.addListOfFiles(slicer.dicomDatabase, self.files, self.operation == "copy")
+        self._stage = "index"
         
-    def _start_next(self):
-        if self.index < len(self.cmds):
-            self.index += 1
-            self._start_process(self.cmds[self.index].cmd)
-        else:
-            self.stopped = True            
-
-            # invoke callback if defined
-            if self._onStop:
-                self._onStop(True)
-       
-    def _on_process_stop(self, returncode: int, stdout: str, timedout: bool, killed: bool):
-        if timedout or killed or returncode != 0:
-            self.success = False
-            self.stopped = True
-            
-            # invoke callback if defined
-            if self._onStop:
-                self._onStop(False)
-        else:
-            self._start_next()
+        # start timer
+        self._timer.start()
         
-    def _on_process_progress(self, time: float, stdout: str):
-        self._seconds_elapsed += time
+        # add to pipelines
+        self._pipelines.append(self)
         
-        # invoke progress callback if defined
-        if self._onProgress:
-            self._onProgress(self.cmds[self.index], time)
+    def _parse(self):
+        import time, pydicom
+        started = time.monotonic()
+        
+        # count segments per file (header only, no pixel data)
+        for file in self.files:
+            try:
+                ds = pydicom.dcmread(file, stop_before_pixels=True)
+                self.segments[file] = len(ds.get("SegmentSequence", []))
+            except Exception as e:
+                print(f"Failed to parse SEG header of {file}: {e}")
+                self.segments[file] = 0
+                
+        self.timings["parse"] = time.monotonic() - started
+        
+    def _onTimeout(self):
+        import time
         
-    def _start_process(self, cmd: List[str]):
-        p = ProgressObserver(cmd)
-        p.onStop(self._on_process_stop)
-        p.onProgress(self._on_process_progress)
+        if self._stage == "index":
+            
+            # wait for indexing and header parsing to finish
+            assert self._parser is not None and self._indexer is not None
+            if self._indexer.isImporting() or self._parser.is_alive():
+                if self._onProgress:
+                    self._onProgress("index", len(self.segments), len(self.files))
+                return
+            self.timings["index"] = time.monotonic() - self._started
+            
+            # load files with fewer segments first
+            self._queue = sorted(self.files, key=lambda f: self.segments.get(f, 0)) if self.load else []
+            self._stage = "load"
+            
+        elif self._stage == "load" and self._queue:
+            import DICOMSegmentationPlugin
+            
+            # examine and load the next file
+            file = self._queue.pop(0)
+            importer = DICOMSegmentationPlugin.DICOMSegmentationPluginClass()
+            
+            started = time.monotonic()
+            loadables = importer.examineFiles([file])
+            self.timings["examine"] += time.monotonic() - started
+            
+            started = time.monotonic()
+            for loadable in loadables:
+                if importer.load(loadable):
+                    self.loaded.append(file)
+            self.timings["load"] += time.monotonic() - started
+            
+            if self._onProgress:
+                self._onProgress("load", len(self.files) - len(self._queue), len(self.files))
+            
+        elif self._stage == "load":
+            
+            # done
+            self._timer.stop()
+            self._stage = "done"
+            self._pipelines.remove(self)
+            self.timings["total"] = time.monotonic() - self._started
+            
+            # debug
+            print("Segmentation import timings [s]: ", ", ".join(f"{k}: {v:.2f}" for k, v in self.timings.items()))
+            
+            if self._onStop:
+                self._onStop(self.timings)
+            
+    def onProgress(self, callback: Callable[[str, int, int], None]):
+        self._onProgress = callback
     
-    def onStop(self, callback: Callable[[bool], None]):
+    def onStop(self, callback: Callable[[Dict[str, float]], None]):
         self._onStop = callback
 
-    def onProgress(self, callback: Callable[['ProcessChain.CMD', float], None]):
-        self._onProgress = callback
-
-
-# MHubRunnerLogic
-#
+@dataclass
+class StagingProgress:
+    files: int                          # files staged (copied, moved or present already)
+    total_files: int
+    bytes: int
+    total_bytes: int
+    elapsed: float                      # seconds
+    
+    @property
+    def fraction(self) -> float:
+        return self.bytes / self.total_bytes if self.total_bytes else 1.0
+    
+    @property
+    def rate(self) -> float:
+        """bytes per second"""
+        return self.bytes / self.elapsed if self.elapsed > 0 else 0.0
+    
+    @property
+    def eta(self) -> Optional[float]:
+        """seconds remaining"""
+        return (self.total_bytes - self.bytes) / self.rate if self.rate > 0 else None
+
+class StagingWorker:
+    """
+    Copies input files into a directory with a pool of threads. Files are copied in the kernel where the platform
+    supports it (copy_file_range, then sendfile), with a buffered copy as fallback, in chunks so a cancellation 
+    takes effect right away. Files are written under a temporary name and renamed once complete. Complete copies 
+    in an ahead directory (see MHubRunnerLogic.prefetchRun) are moved instead, files present already are kept. 
+    Copies keep the modification time of their source, a copy counts as complete if size and modification time 
+    match the source. run() is the work function of a ThreadProgressObserver, progress can be polled from any thread.
+    """
+    
+    workers: int = 8
+    chunk_size: int = 16 * 2**20
+    
+    def __init__(self, files: List[str], target_dir: str, ahead_dir: Optional[str] = None):
+        self.files = files
+        self.target_dir = target_dir
+        self.ahead_dir = ahead_dir
+        self.moved = 0
+        
+        # progress
+        self._lock = threading.Lock()
+        self._files = 0
+        self._bytes = 0
+        self._total_bytes = 0
+        self._started: Optional[float] = None
+        
+    @property
+    def progress(self) -> StagingProgress:
+        import time
+        with self._lock:
+            return StagingProgress(self._files, len(self.files), self._bytes, self._total_bytes, time.monotonic() - self._started if self._started else 0.0)
+    
+    def run(self, stdout, cancel: threading.Event) -> int:
+        import time, shutil
+        from concurrent.futures import ThreadPoolExecutor
+        
+        os.makedirs(self.target_dir, exist_ok=True)
+        self._total_bytes = sum(os.path.getsize(f) for f in self.files)
+        self._started = time.monotonic()
+        
+        # a failing copy stops the others
+        stop = threading.Event()
+        def stage(file: str):
+            if cancel.is_set() or stop.is_set():
+                return
+            try:
+                self._stage(file, cancel, stop)
+            except Exception:
+                stop.set()
+                raise
+        
+        errors = []
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for future in [pool.submit(stage, f) for f in self.files]:
+                if future.exception() is not None:
+                    errors.append(future.exception())
+        
+        if cancel.is_set():
+            return -1
+        if errors:
+            stdout.write(f"Staging into {self.target_dir} failed: {errors[0]}\n")
+            return 1
+        
+        if self.ahead_dir is not None:
+            shutil.rmtree(self.ahead_dir, ignore_errors=True)
+        
+        # summary
+        p = self.progress
+        stdout.write(f"Staged {p.total_files} files ({p.total_bytes / 1e6:.1f} MB) into {self.target_dir} in {p.elapsed:.1f}s, {p.rate / 1e6:.0f} MB/s" + (f", {self.moved} staged ahead" if self.moved else "") + "\n")
+        return 0
+    
+    def _stage(self, file: str, cancel: threading.Event, stop: threading.Event):
+        target = os.path.join(self.target_dir, os.path.basename(file))
+        ahead = os.path.join(self.ahead_dir, os.path.basename(file)) if self.ahead_dir else None
+        st = os.stat(file)
+        size = st.st_size
+        
+        # present already or staged ahead
+        if self._isCopyOf(target, st):
+            pass
+        elif ahead is not None and self._isCopyOf(ahead, st):
+            os.replace(ahead, target)
+            with self._lock:
+                self.moved += 1
+        else:
+            self._copy(file, target, st, cancel, stop)
+            return
+        
+        with self._lock:
+            self._files += 1
+            self._bytes += size
+    
+    @staticmethod
+    def _isCopyOf(path: str, st: os.stat_result) -> bool:
+        try:
+            copy = os.stat(path)
+        except OSError:
+            return False
+        return copy.st_size == st.st_size and copy.st_mtime_ns == st.st_mtime_ns
+    
+    def _copy(self, src: str, dst: str, st: os.stat_result, cancel: threading.Event, stop: threading.Event):
+        import shutil
+        part = dst + ".part"
+        size = st.st_size
+        
+        with open(src, 'rb') as fsrc, open(part, 'wb') as fdst:
+            methods = [m for m in ["copy_file_range", "sendfile"] if hasattr(os, m)] + ["buffered"]
+            offset = 0
+            while offset < size:
+                if cancel.is_set() or stop.is_set():
+                    break
+                count = min(self.chunk_size, size - offset)
+                try:
+                    if methods[0] == "copy_file_range":
+                        copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), count, offset, offset)  # type: ignore
+                    elif methods[0] == "sendfile":
+                        fdst.seek(offset)
+                        copied = os.sendfile(fdst.fileno(), fsrc.fileno(), offset, count)  # type: ignore
+                    else:
+                        fsrc.seek(offset)
+                        fdst.seek(offset)
+                        copied = fdst.write(fsrc.read(count))
+                except OSError:
+                    
+                    # not supported for these files (e.g. across file systems), try the next method
+                    if methods[0] == "buffered":
+                        raise
+                    methods.pop(0)
+                    continue
+                if copied == 0:
+                    break
+                offset += copied
+                with self._lock:
+                    self._bytes += copied
+        
+        # incomplete copies and copies of a source that was modified (or grew) meanwhile are discarded
+        if offset < size or not self._isCopyOf(src, st):
+            os.remove(part)
+            if not cancel.is_set() and not stop.is_set():
+                raise IOError(f"{src} changed while it was copied")
+            return
+        shutil.copystat(src, part)
+        os.replace(part, dst)
+        with self._lock:
+            self._files += 1
+
+class ProcessGraph:
+    """
+    Runs backend steps (e.g. pull, create, setup, stage, run) as a dependency graph. A node starts once all nodes
+    it depends on succeeded, independent nodes run in parallel. A failing node is retried according to its retry
+    policy, once it failed for good the running nodes are cancelled and the remaining ones skipped.
+    Nodes run a command (ProgressObserver) or python work in a thread (ThreadProgressObserver).
+    """
+    
+    @dataclass
+    class Node:
+        name: str
+        cmd: List[str]
+        after: List[str] = field(default_factory=list)      # names of the nodes this node depends on
+        work: Optional[Callable[[Any, threading.Event], int]] = None
+        timeout: int = 0
+        frequency: float = 2
+        retries: int = 0                                    # additional attempts if the node fails (not if cancelled)
+        retry_delay: float = 0                              # seconds between attempts
+        data: Optional[Dict[str, Any]] = None
+        state: Literal["pending", "running", "done", "failed", "cancelled", "skipped"] = "pending"
+        attempts: int = 0
+        returncode: Optional[int] = None
+        timedout: bool = False
+        killed: bool = False
+        started: Optional[float] = None                     # wall clock start of the first attempt
+        duration: Optional[float] = None                    # seconds of all attempts (including retry delays)
+        stdout: str = ""
+    
+    # keep track of all running graphs
+    _graphs: List['ProcessGraph'] = []
+        
+    def __init__(self, trace: Optional['RunTrace'] = None):
+        self.nodes: Dict[str, 'ProcessGraph.Node'] = {}
+        self.started = False
+        self.stopped = False
+        self.cancelled = False
+        self._aborted = False
+        
+        # every attempt of a node is recorded as a span
+        self.trace = trace
+        
+        self._observers: Dict[str, ProgressObserver] = {}
+        self._spans: Dict[str, int] = {}
+        self._starting: Dict[str, float] = {}               # monotonic start of the node's first attempt
+        
+        self._onStop: Optional[Callable[[int, str, bool, bool], None]] = None
+        self._onProgress: Optional[Callable[['ProcessGraph.Node', float, str], None]] = None
+        
+    def add(self, 
+            name: str, 
+            cmd: List[str], 
+            after: Optional[List[str]] = None, 
+            timeout: int = 0, 
+            frequency: float = 2, 
+            retries: int = 0, 
+            retry_delay: float = 0, 
+            data: Optional[Dict[str, Any]] = None, 
+            work: Optional[Callable[[Any, threading.Event], int]] = None) -> 'ProcessGraph.Node':
+        assert not self.started, "Process graph already started"
+        assert name not in self.nodes, f"Duplicate node {name}"
+        assert all(a in self.nodes for a in after or []), f"Unknown dependency of {name}"
+        
+        # dependencies have to be added first, so the graph is acyclic by construction
+        node = self.Node(name, cmd, list(after or []), work, timeout, frequency, retries, retry_delay, data)
+        self.nodes[name] = node
+        return node
+    
+    @property
+    def success(self) -> bool:
+        return self.stopped and all(n.state == "done" for n in self.nodes.values())
+    
+    def start(self):
+        assert not self.started, "Process graph already started"
+        self.started = True
+        self._graphs.append(self)
+        self._schedule()
+        
+    def cancel(self):
+        """
+        Cancel the graph: pending nodes are skipped, running nodes are killed.
+        """
+        if self.stopped or self.cancelled:
+            return
+        self.cancelled = True
+        self._abort()
+        
+    def _abort(self):
+        if self._aborted:
+            return
+        self._aborted = True
+        for node in self.nodes.values():
+            if node.state == "pending":
+                node.state = "cancelled"
+        for observer in list(self._observers.values()):
+            observer.kill()
+        self._schedule()
+        
+    def _schedule(self):
+        
+        # start every pending node whose dependencies are done
+        if not self._aborted:
+            for node in self.nodes.values():
+                if node.state == "pending" and node.name not in self._observers and all(self.nodes[a].state == "done" for a in node.after):
+                    self._startNode(node)
+        
+        # stopped once nothing runs anymore (nodes waiting for a retry are still running)
+        if not self.stopped and not any(n.state == "running" for n in self.nodes.values()):
+            self.stopped = True
+            if self in self._graphs:
+                self._graphs.remove(self)
+            for node in self.nodes.values():
+                if node.state == "pending":
+                    node.state = "skipped"
+            
+            # the first node that failed (or was cancelled) decides the result
+            stopped = [n for n in self.nodes.values() if n.state in ["failed", "cancelled"] and n.returncode is not None]
+            failed = next((n for n in stopped if n.state == "failed"), stopped[0] if stopped else None)
+            returncode = 0 if self.success else (failed.returncode if failed is not None and failed.returncode else -1)
+            stdout = "".join(n.stdout for n in self.nodes.values())
+            
+            # invoke callback if defined
+            if self._onStop:
+                self._onStop(returncode, stdout, failed.timedout if failed else False, self.cancelled or (failed.killed if failed else False))
+    
+    def _startNode(self, node: 'ProcessGraph.Node'):
+        import time
+        
+        node.state = "running"
+        node.attempts += 1
+        if node.started is None:
+            node.started = time.time()
+            self._starting[node.name] = time.monotonic()
+        
+        if self.trace:
+            self._spans[node.name] = self.trace.begin(node.name, "process", cmd=" ".join(node.cmd), attempt=node.attempts)
+        
+        # run
+        try:
+            if node.work is not None:
+                observer: ProgressObserver = ThreadProgressObserver(node.work, node.cmd, frequency=node.frequency, timeout=node.timeout, data=node.data)
+            else:
+                observer = ProgressObserver(node.cmd, frequency=node.frequency, timeout=node.timeout, data=node.data)
+        except Exception as e:
+            print(f"Failed to start {node.name}: {e}")
+            self._onNodeStop(node, -1, f"{e}\n", False, False)
+            return
+        
+        self._observers[node.name] = observer
+        observer.onStop(lambda returncode, stdout, timedout, killed: self._onNodeStop(node, returncode, stdout, timedout, killed))
+        observer.onProgress(lambda seconds, stdout: self._onNodeProgress(node, seconds, stdout))
+        
+    def _onNodeStop(self, node: 'ProcessGraph.Node', returncode: int, stdout: str, timedout: bool, killed: bool):
+        import time
+        
+        self._observers.pop(node.name, None)
+        node.returncode, node.timedout, node.killed = returncode, timedout, killed
+        node.stdout += stdout
+        
+        if self.trace:
+            self.trace.end(self._spans.pop(node.name, 0), returncode=returncode, timedout=timedout, killed=killed)
+        
+        if returncode == 0 and not timedout and not killed:
+            node.state = "done"
+        
+        elif not killed and not self._aborted and node.attempts <= node.retries:
+            
+            # retry (the node stays running while it waits)
+            print(f"{node.name} failed with return code {returncode}, retry {node.attempts} of {node.retries}")
+            if node.retry_delay > 0:
+                qt.QTimer.singleShot(int(node.retry_delay * 1000), lambda: self._retryNode(node))
+            else:
+                self._startNode(node)
+            return
+        
+        else:
+            node.state = "cancelled" if killed else "failed"
+        
+        node.duration = time.monotonic() - self._starting[node.name]
+        
+        # failed for good, stop the rest of the graph
+        if node.state != "done":
+            self._abort()
+        self._schedule()
+    
+    def _retryNode(self, node: 'ProcessGraph.Node'):
+        
+        # the graph may have been cancelled during the delay
+        if self._aborted:
+            node.state = "cancelled"
+            self._schedule()
+        else:
+            self._startNode(node)
+    
+    def _onNodeProgress(self, node: 'ProcessGraph.Node', seconds: float, stdout: str):
+        
+        # seconds since the current attempt of the node started
+        if self._onProgress:
+            self._onProgress(node, seconds, stdout)
+    
+    def onStop(self, callback: Callable[[int, str, bool, bool], None]):
+        self._onStop = callback
+
+    def onProgress(self, callback: Callable[['ProcessGraph.Node', float, str], None]):
+        self._onProgress = callback
+
+
+class WorkerProcess:
+    """
+    Minimal stand-in for subprocess.Popen that runs a python callable in a background thread.
+    The callable receives a text stream (stdout) and a cancel event and returns a return code.
+    """
+    
+    def __init__(self, work: Callable[[Any, threading.Event], int], stdout_file_name: str):
+        self.returncode: Optional[int] = None
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._main, args=(work, stdout_file_name), daemon=True)
+        self._thread.start()
+        
+    def _main(self, work: Callable[[Any, threading.Event], int], stdout_file_name: str):
+        
+        # run work, all output goes into the stdout file observed by the ProgressObserver
+        with open(stdout_file_name, 'a', encoding='utf-8') as stdout:
+            try:
+                returncode = work(stdout, self._cancel)
+            except Exception as e:
+                stdout.write(f"\nERROR: {e}\n")
+                returncode = 1
+                
+        # set return code last, the observer stops polling once it is set
+        self.returncode = -9 if self._cancel.is_set() else returncode
+
+    def poll(self) -> Optional[int]:
+        return self.returncode
+    
+    def wait(self, timeout: Optional[float] = None) -> Optional[int]:
+        self._thread.join(timeout)
+        return self.returncode
+    
+    def kill(self):
+        self._cancel.set()
+        
+class ThreadProgressObserver(ProgressObserver):
+    """
+    ProgressObserver for python work that runs in a background thread instead of a subprocess.
+    """
+    
+    def __init__(self, work: Callable[[Any, threading.Event], int], cmd: List[str], frequency: float = 2, timeout: int = 0, data: Optional[Dict[str, Any]] = None):
+        self._work = work
+        super().__init__(cmd, frequency, timeout, data)
+        
+    def _run(self, cmd: List[str]):
+        
+        # run work in thread
+        self._proc = WorkerProcess(self._work, self._stdout_file_name)
+        
+        # start timer
+        self._timer.start()
+        
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for the work to return (e.g. after kill), False if it still runs after timeout seconds.
+        """
+        assert self._proc is not None
+        return self._proc.wait(timeout) is not None
+        
+    def _terminate(self):
+        
+        # request cancellation, the work cleans up (e.g. stops remote containers) and returns
+        assert self._proc is not None
+        self._proc.kill()
+        
+    def _terminated(self) -> bool:
+        import time
+        assert self._proc is not None
+        
+        # threads cannot be killed, work that ignores the cancel event is abandoned after the grace period
+        if self._proc.poll() is None and time.monotonic() > self._terminate_deadline + self.grace_period:
+            print("Worker did not stop after cancellation, abandoning it. ", self.cmd)
+            return True
+        
+        return self._proc.poll() is not None
+
+class ContainerProgressObserver(ProgressObserver):
+    """
+    ProgressObserver for a named docker container started with docker run (or followed with docker logs -f 
+    after a restart of Slicer). Cancelling or a timeout stops the container itself (SIGTERM, SIGKILL after 
+    the grace period) instead of only the docker client, and the task only stops once the container is 
+    confirmed to be gone. Containers are not started with --rm, so their exit code outlives the client: 
+    the task reports the container's exit code and removes the container when it stops. The docker calls that 
+    can block (stop, inspect, rm) run in a background thread, the timer only polls for their completion.
+    """
+    
+    def __init__(self, cmd: List[str], container: str, docker_exec: str, frequency: float = 2, timeout: int = 0, data: Optional[Dict[str, Any]] = None):
+        self.container = container
+        self.docker_exec = docker_exec
+        self.removed: Optional[bool] = None
+        self._stopper: Optional[threading.Thread] = None
+        self._collector: Optional[threading.Thread] = None
+        self._exitcode: Optional[int] = None
+        super().__init__(cmd, frequency, timeout, data)
+    
+    @staticmethod
+    def inspect(docker_exec: str, container: str) -> Optional[tuple[str, int]]:
+        """
+        State (e.g. running, exited) and exit code of a container, None if there is no such container.
+        """
+        import subprocess
+        result = subprocess.run([docker_exec, "container", "inspect", "--format", "{{.State.Status}} {{.State.ExitCode}}", container], capture_output=True, text=True, timeout=30)
+        if result.returncode != 0:
+            return None
+        status, _, exitcode = result.stdout.strip().partition(" ")
+        return status, int(exitcode or -1)
+    
+    def _onTimeout(self):
+        
+        # the client exited with the container: collect its exit code and remove it in the background
+        if self._terminating is None and self._collector is None and self._proc is not None and self._proc.poll() is not None:
+            self._collector = threading.Thread(target=self._collectContainer, daemon=True)
+            self._collector.start()
+        
+        # the task stops once the container is collected
+        if self._collector is not None and self._collector.is_alive():
+            return
+        super()._onTimeout()
+    
+    def _stop(self, returncode: int, timedout: bool, killed: bool):
+        
+        # exit code of the container (see _collectContainer)
+        if self._terminating is None and self._exitcode is not None:
+            returncode = self._exitcode
+            
+        super()._stop(returncode, timedout, killed)
+    
+    def _collectContainer(self):
+        import subprocess
+        
+        try:
+            state = self.inspect(self.docker_exec, self.container)
+            if state is not None and state[0] in ["exited", "dead"]:
+                self._exitcode = state[1]
+            subprocess.run([self.docker_exec, "rm", "-f", self.container], capture_output=True, timeout=30)
+        except Exception as e:
+            print(f"Failed to remove container {self.container}: {e}")
+        
+    def _terminate(self):
+        
+        # docker stop blocks for up to the grace period, run it in the background
+        self._stopper = threading.Thread(target=self._stopContainer, daemon=True)
+        self._stopper.start()
+        
+    def _terminated(self) -> bool:
+        assert self._proc is not None and self._stopper is not None
+        if self._stopper.is_alive():
+            return False
+        
+        # the client exits with the container, kill it if it does not
+        if self._proc.poll() is None:
+            self._proc.kill()
+        return self._proc.poll() is not None
+        
+    def _stopContainer(self):
+        import subprocess
+        
+        try:
+            
+            # SIGTERM, docker sends SIGKILL after the grace period
+            subprocess.run([self.docker_exec, "stop", "--time", str(int(self.grace_period)), self.container], capture_output=True, timeout=self.grace_period + 30)
+            
+            # remove the stopped container and confirm it is gone
+            subprocess.run([self.docker_exec, "rm", "-f", self.container], capture_output=True, timeout=30)
+            self.removed = self.inspect(self.docker_exec, self.container) is None
+            
+        except Exception as e:
+            print(f"Failed to stop container {self.container}: {e}")
+            self.removed = False
+            
+        # report in the task output
+        with open(self._stdout_file_name, 'a', encoding='utf-8') as f:
+            f.write(f"\nContainer {self.container} " + ("stopped and removed." if self.removed else "could not be confirmed removed, check 'docker ps'.") + "\n")
+
+@dataclass
+class TelemetrySample:
+    time: float                                 # unix timestamp
+    cpu_percent: float = 0.0                    # 100% = one core
+    memory_mb: float = 0.0
+    memory_limit_mb: float = 0.0
+    block_read_mb: float = 0.0                  # cumulative
+    block_write_mb: float = 0.0
+    gpu_memory_mb: Optional[float] = None       # used memory of the run's gpus (all processes)
+    gpu_memory_total_mb: Optional[float] = None
+
+class ContainerTelemetry:
+    """
+    Samples CPU, memory and block I/O of a running container from the docker stats stream and the
+    memory of its GPUs from nvidia-smi, once per second. Both streams run as observed processes.
+    """
+    
+    # docker stats sizes, e.g. "1.5GiB / 7.6GiB" or "12.3MB / 0B"
+    size_pattern: re.Pattern = re.compile(r"([\d.]+)\s*([kKMGT]?i?B)")
+    units: Dict[str, float] = {"B": 1, "kB": 1e3, "KB": 1e3, "KiB": 2**10, "MB": 1e6, "MiB": 2**20, "GB": 1e9, "GiB": 2**30, "TB": 1e12, "TiB": 2**40}
+    
+    def __init__(self, docker_exec: str, container: str, gpus: Optional[List[int]] = None):
+        self.container = container
+        self.samples: List[TelemetrySample] = []
+        self.current: Optional[TelemetrySample] = None
+        self._onSample: Optional[Callable[[TelemetrySample], None]] = None
+        self._buffer = ""
+        self._gpu: Optional[tuple[float, float]] = None
+        self._gpus: Dict[int, tuple[float, float]] = {}
+        
+        # container stats (one json object per line and second)
+        self._stats = ProgressObserver([docker_exec, "stats", "--format", "{{json .}}", container], frequency=1, data={"operation": "telemetry", "container": container})
+        self._stats.onProgress(self._onStats)
+        
+        # gpu memory
+        self._nvidia: Optional[ProgressObserver] = None
+        if gpus is not None:
+            cmd = ["nvidia-smi", "--query-gpu=index,memory.used,memory.total", "--format=csv,noheader,nounits", "-l", "1"]
+            cmd += ["-i", ",".join(str(i) for i in gpus)] if gpus else []
+            try:
+                self._nvidia = ProgressObserver(cmd, frequency=1, data={"operation": "telemetry", "container": container})
+                self._nvidia.onProgress(self._onNvidia)
+            except OSError as e:
+                print(f"GPU telemetry not available: {e}")
+                
+    def stop(self) -> None:
+        for observer in [self._stats, self._nvidia]:
+            if observer is not None and observer in ProgressObserver._tasks:
+                observer.kill()
+    
+    def summary(self) -> Dict[str, Optional[float]]:
+        """
+        Peak and mean values of all samples.
+        """
+        def stats(values: List[float]) -> tuple[Optional[float], Optional[float]]:
+            return (max(values), sum(values) / len(values)) if values else (None, None)
+        
+        peak_cpu, mean_cpu = stats([s.cpu_percent for s in self.samples])
+        peak_memory, mean_memory = stats([s.memory_mb for s in self.samples])
+        peak_gpu, _ = stats([s.gpu_memory_mb for s in self.samples if s.gpu_memory_mb is not None])
+        last = self.samples[-1] if self.samples else None
+        
+        return {
+            "peak_cpu": peak_cpu,
+            "mean_cpu": mean_cpu,
+            "peak_memory_mb": peak_memory,
+            "mean_memory_mb": mean_memory,
+            "peak_gpu_memory_mb": peak_gpu,
+            "block_read_mb": last.block_read_mb if last else None,
+            "block_write_mb": last.block_write_mb if last else None,
+        }
+        
+    def onSample(self, callback: Callable[[TelemetrySample], None]):
+        self._onSample = callback
+        
+    def _onStats(self, time: float, stdout: str):
+        import json, time as _time
+        
+        # complete lines only (the stream also contains terminal control codes)
+        lines = (self._buffer + stdout).split("\n")
+        self._buffer = lines.pop()
+        for line in lines:
+            start, end = line.find("{"), line.rfind("}")
+            if start < 0 or end < start:
+                continue
+            try:
+                stats = json.loads(line[start:end + 1])
+            except ValueError:
+                continue
+            
+            # parse
+            memory = self._sizes(stats.get("MemUsage", ""))
+            block = self._sizes(stats.get("BlockIO", ""))
+            sample = TelemetrySample(
+                time=_time.time(),
+                cpu_percent=float(stats.get("CPUPerc", "0").rstrip("%") or 0),
+                memory_mb=memory[0] if memory else 0.0,
+                memory_limit_mb=memory[1] if len(memory) > 1 else 0.0,
+                block_read_mb=block[0] if block else 0.0,
+                block_write_mb=block[1] if len(block) > 1 else 0.0,
+                gpu_memory_mb=self._gpu[0] if self._gpu else None,
+                gpu_memory_total_mb=self._gpu[1] if self._gpu else None
+            )
+            self.samples.append(sample)
+            self.current = sample
+            
+            if self._onSample:
+                self._onSample(sample)
+    
+    def _onNvidia(self, time: float, stdout: str):
+        
+        # one line per gpu and interval (index, used, total), the latest values of all gpus are summed
+        for line in stdout.split("\n"):
+            match = re.match(r"^\s*(\d+)\s*,\s*([\d.]+)\s*,\s*([\d.]+)\s*$", line)
+            if match:
+                self._gpus[int(match.group(1))] = (float(match.group(2)), float(match.group(3)))
+        if self._gpus:
+            self._gpu = (sum(u for u, _ in self._gpus.values()), sum(t for _, t in self._gpus.values()))
+    
+    def _sizes(self, text: str) -> List[float]:
+        return [float(value) * self.units.get(unit, 1) / 2**20 for value, unit in self.size_pattern.findall(text)]
+
+@dataclass
+class ResourceProfile:
+    cpus: float             # cpu cores
+    memory_mb: int          # memory (0 = unlimited / unknown)
+    shm_mb: int = 2048      # shared memory (data loaders of pytorch models need more than docker's 64 MB default)
+
+@dataclass
+class Admission:
+    name: str
+    profile: ResourceProfile
+    start: Callable[[], None]
+    cancel: Callable[[], None]
+
+class ResourceManager:
+    """
+    CPU / RAM budget for local inference containers. Part of the machine is reserved for Slicer, every
+    run gets limits from its model profile and queued runs are admitted in order once their profile 
+    fits into what is left of the budget (a run that needs more than the whole budget runs alone).
+    """
+    
+    # reserved for Slicer
+    reserve_cpus: float = 2
+    reserve_memory_mb: int = 4096
+    
+    # per-model profiles, models without a profile get the default (cpu) or gpu profile
+    default_profile: ResourceProfile = ResourceProfile(cpus=4, memory_mb=8192)
+    gpu_profile: ResourceProfile = ResourceProfile(cpus=2, memory_mb=8192, shm_mb=4096)
+    profiles: Dict[str, ResourceProfile] = {}
+    
+    # admitted and waiting runs
+    _running: Dict[str, ResourceProfile] = {}
+    _queue: List[Admission] = []
+    
+    @classmethod
+    def getBudget(cls) -> ResourceProfile:
+        cpus = float(os.cpu_count() or 1)
+        memory = cls._physicalMemoryMB()
+        return ResourceProfile(
+            cpus=max(cpus - cls.reserve_cpus, 1.0),
+            memory_mb=max(memory - cls.reserve_memory_mb, 1024) if memory else 0,
+            shm_mb=0
+        )
+        
+    @classmethod
+    def getProfile(cls, model: str, gpu: bool) -> ResourceProfile:
+        """
+        Profile of a model, clamped to the budget so a single run can never exceed it.
+        """
+        profile = cls.profiles.get(model, cls.gpu_profile if gpu else cls.default_profile)
+        budget = cls.getBudget()
+        return ResourceProfile(
+            cpus=min(profile.cpus, budget.cpus),
+            memory_mb=min(profile.memory_mb, budget.memory_mb) if budget.memory_mb else profile.memory_mb,
+            shm_mb=profile.shm_mb
+        )
+    
+    @classmethod
+    def getDockerArgs(cls, profile: ResourceProfile) -> List[str]:
+        args = [f"--cpus={profile.cpus:g}", f"--shm-size={profile.shm_mb}m"]
+        if profile.memory_mb:
+            args += [f"--memory={profile.memory_mb}m", f"--memory-swap={profile.memory_mb}m"]
+        return args
+    
+    @classmethod
+    def getAvailable(cls) -> ResourceProfile:
+        budget = cls.getBudget()
+        return ResourceProfile(
+            cpus=budget.cpus - sum(p.cpus for p in cls._running.values()),
+            memory_mb=budget.memory_mb - sum(p.memory_mb for p in cls._running.values()),
+            shm_mb=0
+        )
+    
+    @classmethod
+    def fits(cls, profile: ResourceProfile) -> bool:
+        available = cls.getAvailable()
+        return profile.cpus <= available.cpus + 1e-6 and (not cls.getBudget().memory_mb or profile.memory_mb <= available.memory_mb)
+    
+    @classmethod
+    def submit(cls, name: str, profile: ResourceProfile, start: Callable[[], None], cancel: Callable[[], None]) -> bool:
+        """
+        Queue a run, start() is called once it is admitted. Returns True if the run started right away.
+        """
+        cls._queue.append(Admission(name, profile, start, cancel))
+        cls._admit()
+        return name in cls._running
+    
+    @classmethod
+    def reserve(cls, name: str, profile: ResourceProfile) -> None:
+        """
+        Account for a run that is running already (e.g. a container reattached after a restart of Slicer).
+        """
+        cls._running[name] = profile
+    
+    @classmethod
+    def release(cls, name: str) -> None:
+        """
+        Return the resources of a finished run and admit the next runs.
+        """
+        cls._running.pop(name, None)
+        cls._admit()
+        
+    @classmethod
+    def cancel(cls, name: str) -> bool:
+        """
+        Remove a waiting run from the queue, returns False if it is not queued.
+        """
+        admission = next((a for a in cls._queue if a.name == name), None)
+        if admission is None:
+            return False
+        cls._queue.remove(admission)
+        admission.cancel()
+        return True
+    
+    @classmethod
+    def getQueued(cls) -> List[str]:
+        return [a.name for a in cls._queue]
+        
+    @classmethod
+    def _admit(cls) -> None:
+        
+        # in order, a run that does not fit blocks the ones behind it (no starvation of large runs)
+        while cls._queue and (not cls._running or cls.fits(cls._queue[0].profile)):
+            admission = cls._queue.pop(0)
+            cls._running[admission.name] = admission.profile
+            try:
+                admission.start()
+            except Exception as e:
+                print(f"Failed to start {admission.name}: {e}")
+                cls._running.pop(admission.name, None)
+                admission.cancel()
+    
+    @staticmethod
+    def _physicalMemoryMB() -> int:
+        try:
+            import psutil
+            return int(psutil.virtual_memory().total / 2**20)
+        except ImportError:
+            pass
+        try:
+            return int(os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') / 2**20)
+        except (ValueError, OSError, AttributeError):
+            return 0
+
+@dataclass
+class Flight:
+    key: str
+    callbacks: List[Callable[..., None]]
+    data: Any = None                    # e.g. the context of a run in flight
+
+class SingleFlight:
+    """
+    Coalesces duplicate concurrent operations (pulls of the same image, identical runs). The first call with a key
+    starts the operation, calls with the same key while it is in flight attach to it, and every caller receives the
+    result (the arguments of done) once it completes. Blocking probes (e.g. listing local images) use call().
+    """
+    
+    # operations in flight by key (probes are called from worker threads too)
+    _flights: Dict[str, Flight] = {}
+    _lock = threading.Lock()
+    
+    @classmethod
+    def get(cls, key: str) -> Optional[Flight]:
+        return cls._flights.get(key)
+    
+    @classmethod
+    def run(cls, key: str, start: Callable[[Callable[..., None]], None], callback: Optional[Callable[..., None]] = None, data: Any = None) -> bool:
+        """
+        start(done) starts the operation, which calls done(*result) when it completes.
+        Returns False if the call attached to an operation in flight.
+        """
+        with cls._lock:
+            flight = cls._flights.get(key)
+            if flight is not None:
+                print(f"Attaching to {key} in flight ({len(flight.callbacks) + 1} callers)")
+                if callback is not None:
+                    flight.callbacks.append(callback)
+                return False
+            
+            flight = Flight(key, [callback] if callback is not None else [], data)
+            cls._flights[key] = flight
+        
+        def done(*result):
+            with cls._lock:
+                if cls._flights.get(key) is flight:
+                    del cls._flights[key]
+                callbacks = list(flight.callbacks)
+            for cb in callbacks:
+                try:
+                    cb(*result)
+                except Exception as e:
+                    print(f"Callback of {key} failed: {e}")
+        
+        try:
+            start(done)
+        except Exception:
+            with cls._lock:
+                if cls._flights.get(key) is flight:
+                    del cls._flights[key]
+            raise
+        
+        return True
+    
+    @classmethod
+    def call(cls, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        Blocking variant of run(): fn() is called unless a call with the same key is in flight (in another thread),
+        whose result (or exception) is returned instead.
+        """
+        results: List[Any] = []
+        finished = threading.Event()
+        
+        def callback(value: Any, error: Optional[Exception]):
+            results.extend([value, error])
+            finished.set()
+        
+        def start(done: Callable[..., None]):
+            try:
+                value = fn()
+            except Exception as e:
+                done(None, e)
+                return
+            done(value, None)
+        
+        if not cls.run(key, start, callback):
+            finished.wait()
+        value, error = results
+        if error is not None:
+            raise error
+        return value
+
+@dataclass
+class MHubProgress:
+    module: Optional[str] = None        # module currently running
+    index: int = 0                      # position of the current module (1-based)
+    total: Optional[int] = None         # number of modules in the workflow (if known)
+    step: Optional[int] = None          # step i of n within the current module (e.g. progress bars)
+    steps: Optional[int] = None
+    elapsed: float = 0.0                # seconds since the run started
+    eta: Optional[float] = None         # estimated seconds remaining
+    
+    @property
+    def fraction(self) -> Optional[float]:
+        if not self.total or not self.index:
+            return None
+        step = self.step / self.steps if self.step is not None and self.steps else 0.0
+        return min((self.index - 1 + step) / self.total, 1.0)
+
+class MHubProgressParser:
+    """
+    Turns the (--print) stdout stream of an MHub container into structured progress: the module that 
+    is running, step i of n within the module and the duration of every finished module.
+    The ETA uses the module timings of previous runs of the same model and workflow if available.
+    
+    With --print, mhubio (Module.execute) frames every module of the workflow with a banner:
+    
+        --------------------------
+        Start DicomImporter
+        ... output of the module ...
+        Done in 12.3456 seconds.
+    
+    The workflow length is not printed, it is known from previous runs only.
+    """
+    
+    # module banner, the start line only counts right after the separator (modules may log "Start ..." themselves)
+    separator_pattern: re.Pattern = re.compile(r"^-{26}$")
+    start_pattern: re.Pattern = re.compile(r"^Start (?P<module>[A-Za-z_]\w*)$")
+    done_pattern: re.Pattern = re.compile(r"^Done in (?P<seconds>\d+(?:\.\d*)?(?:e[+-]?\d+)?) seconds\.$")
+    
+    # progress within a module, e.g. tqdm "45%|####      | 9/20 [00:03<00:04]"
+    step_pattern: re.Pattern = re.compile(r"(?P<step>\d+)\s*/\s*(?P<steps>\d+)\s*\[")
+    
+    # ansi color codes
+    ansi_pattern: re.Pattern = re.compile(r'\x1b\[[0-9;]*[A-Za-z]')
+    
+    def __init__(self, expected: Optional[List[tuple[str, float]]] = None):
+        """
+        expected: (module, seconds) of a previous run of the same model and workflow
+        """
+        import time
+        self.expected = expected or []
+        self.progress = MHubProgress(total=len(self.expected) or None)
+        self.timings: List[tuple[str, float]] = []
+        
+        # wall clock start of the current module
+        self._started = time.time()
+        self._module_started = self._started
+        self._buffer = ""
+        
+        # banner state: the previous line was the separator, the current module printed its done line
+        self._separated = False
+        self._done = False
+        
+    def feed(self, stdout: str) -> List[tuple[str, float, float]]:
+        """
+        Parse the next chunk of stdout, returns the modules that finished with this chunk as (module, started, seconds).
+        """
+        import time
+        now = time.time()
+        finished = []
+        
+        # complete lines only (progress bars redraw with \r), the rest is kept for the next chunk
+        lines = re.split(r"[\r\n]", self._buffer + self.ansi_pattern.sub("", stdout))
+        self._buffer = lines.pop()
+        
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            separated, self._separated = self._separated, bool(self.separator_pattern.match(line))
+            
+            # module start
+            match = self.start_pattern.match(line) if separated else None
+            if match:
+                if self.progress.module is not None and not self._done:
+                    finished.append(self._finishModule(now))
+                self.progress.module = match.group("module")
+                self.progress.index += 1
+                self.progress.step = self.progress.steps = None
+                self._module_started = now
+                self._done = False
+                continue
+            
+            # module end, with the duration measured by mhub
+            match = self.done_pattern.match(line)
+            if match and self.progress.module is not None and not self._done:
+                finished.append(self._finishModule(now, float(match.group("seconds"))))
+                self.progress.step = self.progress.steps
+                self._done = True
+                continue
+            
+            # step within the current module
+            match = self.step_pattern.search(line)
+            if match and int(match.group("steps")) > 0:
+                self.progress.step = int(match.group("step"))
+                self.progress.steps = int(match.group("steps"))
+                
+        self._update(now)
+        return finished
+    
+    def finish(self) -> List[tuple[str, float, float]]:
+        """
+        Close the last module when the run stopped.
+        """
+        import time
+        if self.progress.module is None or self._done:
+            self.progress.module = None
+            return []
+        finished = [self._finishModule(time.time())]
+        self.progress.module = None
+        return finished
+    
+    def _finishModule(self, now: float, seconds: Optional[float] = None) -> tuple[str, float, float]:
+        assert self.progress.module is not None
+        seconds = now - self._module_started if seconds is None else seconds
+        self.timings.append((self.progress.module, seconds))
+        return self.progress.module, now - seconds, seconds
+    
+    def _update(self, now: float) -> None:
+        progress = self.progress
+        progress.elapsed = now - self._started
+        
+        if not progress.module or not progress.index:
+            progress.eta = sum(d for _, d in self.expected) - progress.elapsed if self.expected else None
+            return
+        
+        # time spent in the current module and its completion (if it reports steps)
+        in_module = now - self._module_started
+        done = progress.step / progress.steps if progress.step is not None and progress.steps else None
+        
+        # remaining time of the current module
+        if self._done:
+            current = 0.0
+        elif done:
+            current = in_module * (1 - done) / done
+        elif progress.index <= len(self.expected):
+            current = max(self.expected[progress.index - 1][1] - in_module, 0.0)
+        else:
+            current = None
+            
+        # remaining time of the modules that did not start yet
+        if progress.index <= len(self.expected) and (not progress.total or progress.total == len(self.expected)):
+            later = sum(d for _, d in self.expected[progress.index:])
+        elif progress.total and self.timings:
+            later = (progress.total - progress.index) * sum(d for _, d in self.timings) / len(self.timings)
+        else:
+            later = None
+        
+        progress.eta = current + later if current is not None and later is not None else None
+        
+class SSHConnectionPool:
+    """
+    Keeps one persistent ssh connection per host. All commands and file transfers to a host
+    are multiplexed as channels over that single connection.
+    """
+    
+    _clients: Dict[str, Any] = {}
+    _lock = threading.Lock()
+    
+    @classmethod
+    def get(cls, hostid: str):
+        with cls._lock:
+            
+            # reuse the connection if it is still alive
+            client = cls._clients.get(hostid)
+            transport = client.get_transport() if client is not None else None
+            if transport is not None and transport.is_active():
+                return client
+            
+            # (re-)connect
+            client = cls._connect(hostid)
+            cls._clients[hostid] = client
+            return client
+    
+    @classmethod
+    def close(cls, hostid: str):
+        with cls._lock:
+            client = cls._clients.pop(hostid, None)
+            if client is not None:
+                client.close()
+    
+    @classmethod
+    def closeAll(cls):
+        for hostid in list(cls._clients.keys()):
+            cls.close(hostid)
+    
+    @classmethod
+    def _connect(cls, hostid: str):
+        import paramiko
+        
+        # hostid is either an alias from ~/.ssh/config or [user@]host[:port]
+        user, _, host = hostid.rpartition("@")
+        host, _, port = host.partition(":")
+        
+        # resolve host settings from ssh config
+        config = paramiko.SSHConfig()
+        config_file = os.path.expanduser("~/.ssh/config")
+        if os.path.exists(config_file):
+            config = paramiko.SSHConfig.from_path(config_file)
+        hc = config.lookup(host)
+        
+        # known hosts, only auto-accept unknown host keys if the ssh config explicitly allows it
+        client = paramiko.SSHClient()
+        client.load_system_host_keys()
+        known_hosts_file = os.path.expanduser(hc.get("userknownhostsfile", "").split(" ")[0])
+        if known_hosts_file and os.path.isfile(known_hosts_file):
+            client.load_host_keys(known_hosts_file)
+        if hc.get("stricthostkeychecking", "yes").lower() == "no":
+            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        else:
+            client.set_missing_host_key_policy(paramiko.RejectPolicy())
+        
+        # connect
+        client.connect(
+            hostname=hc.get("hostname", host),
+            port=int(port or hc.get("port", 22)),
+            username=user or hc.get("user"),
+            key_filename=hc.get("identityfile"),
+            timeout=10
+        )
+        
+        # keep the connection open between runs
+        client.get_transport().set_keepalive(30)
+        
+        # debug
+        print(f"SSH connection to {hostid} established")
+        
+        return client
+
+class SSHHost:
+    """
+    Execute commands and transfer files on a remote host through the pooled ssh connection.
+    """
+    
+    # base directory on the host (same layout as the local temp directory)
+    base_dir: str = "/tmp/mhub_slicer_extension"
+    
+    def __init__(self, hostid: str):
+        self.hostid = hostid
+    
+    @property
+    def client(self):
+        return SSHConnectionPool.get(self.hostid)
+        
+    def exec(self, cmd: List[str], timeout: int = 30) -> tuple[int, str]:
+        import shlex
+        
+        # run command in a new channel and wait for it to finish
+        _, stdout, stderr = self.client.exec_command(shlex.join(cmd), timeout=timeout)
+        output = stdout.read().decode('utf-8', errors='replace') + stderr.read().decode('utf-8', errors='replace')
+        returncode = stdout.channel.recv_exit_status()
+        
+        return returncode, output
+    
+    def stream(self, cmd: List[str], stdout, cancel: threading.Event) -> int:
+        import shlex, codecs, time
+        
+        # open a channel with a pty so the remote process terminates with the channel
+        channel = self.client.get_transport().open_session()
+        channel.get_pty()
+        channel.exec_command(shlex.join(cmd))
+        
+        # forward remote output into stdout until the command terminates
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        while not channel.exit_status_ready() or channel.recv_ready():
+            if cancel.is_set():
+                channel.close()
+                return -1
+            if channel.recv_ready():
+                stdout.write(decoder.decode(channel.recv(32768)))
+                stdout.flush()
+            else:
+                time.sleep(0.1)
+                
+        return channel.recv_exit_status()
+    
+    def upload(self, local_files: List[str], remote_dir: str, cancel: Optional[threading.Event] = None) -> None:
+        import posixpath
+        
+        # make sure the remote directory exists
+        self.exec(["mkdir", "-p", remote_dir])
+        
+        # upload files
+        sftp = self.client.open_sftp()
+        try:
+            for local_file in local_files:
+                if cancel is not None and cancel.is_set():
+                    return
+                sftp.put(local_file, posixpath.join(remote_dir, os.path.basename(local_file)))
+        finally:
+            sftp.close()
+            
+    def download(self, remote_dir: str, local_dir: str) -> List[str]:
+        import posixpath, stat
+        
+        # recursively download all files from the remote directory
+        files: List[str] = []
+        sftp = self.client.open_sftp()
+        try:
+            pending = [(remote_dir, local_dir)]
+            while pending:
+                rdir, ldir = pending.pop()
+                os.makedirs(ldir, exist_ok=True)
+                for attr in sftp.listdir_attr(rdir):
+                    rpath = posixpath.join(rdir, attr.filename)
+                    lpath = os.path.join(ldir, attr.filename)
+                    if stat.S_ISDIR(attr.st_mode or 0):
+                        pending.append((rpath, lpath))
+                    else:
+                        sftp.get(rpath, lpath)
+                        files.append(lpath)
+        finally:
+            sftp.close()
+            
+        return files
+    
+    def stopContainer(self, name: str, grace_period: float = 10) -> bool:
+        """
+        Stop a container (SIGTERM, SIGKILL after the grace period), remove it and confirm it is gone.
+        """
+        self.exec(["docker", "stop", "--time", str(int(grace_period)), name], timeout=int(grace_period) + 30)
+        self.exec(["docker", "rm", "-f", name])
+        return self.inspectContainer(name) is None
+    
+    def inspectContainer(self, name: str) -> Optional[tuple[str, int]]:
+        """
+        State (e.g. running, exited) and exit code of a container, None if there is no such container.
+        """
+        returncode, stdout = self.exec(["docker", "container", "inspect", "--format", "{{.State.Status}} {{.State.ExitCode}}", name])
+        if returncode != 0:
+            return None
+        status, _, exitcode = stdout.strip().partition(" ")
+        return status, int(exitcode or -1)
+    
+    def getInformation(self) -> HostInformation:
+        import posixpath
+        
+        # compile host information, a failing connection results in an unavailable host
+        hi = HostInformation(self.hostid, False, datetime.now(), "N/A", [], [])
+        try:
+            rc, version = self.exec(["docker", "--version"], timeout=5)
+            hi.canConnect = True
+            
+            # docker is missing or not usable by the user (the output is the error then)
+            if rc == 0:
+                hi.dockerVersion, hi.dockerAvailable = version.strip(), True
+            else:
+                hi.dockerVersion = f"Docker not available (return code {rc}): {version.strip()}"
+                print(f"Docker is not available on {self.hostid}: {hi.dockerVersion}")
+            rc, gpus = self.exec(["nvidia-smi", "--list-gpus"], timeout=5)
+            hi.gpus = [gpu for gpu in gpus.split("\n") if gpu.strip()] if rc == 0 else []
+            rc, cache = self.exec(["ls", posixpath.join(self.base_dir, "cache")], timeout=5)
+            hi.cachedSubjects = [c for c in cache.split("\n") if c.strip()] if rc == 0 else []
+        except Exception as e:
+            print(f"Failed to get host information for {self.hostid}: {e}")
+            
+        return hi
+
+
+class SeriesTransfer:
+    """
+    Delta transfer of a DICOM series into the series cache on a remote host.
+    Files are identified by the hash of their instance UID, files without one (e.g. exported volumes) by
+    their content hash. Files the host already has are skipped, missing files are streamed as 
+    fast-compressed tar chunks over parallel channels.
+    """
+    
+    # number of parallel transfer channels
+    chunks: int = 4
+    
+    # gzip compression level (1 = fastest, DICOM pixel data rarely compresses much better at higher levels)
+    compresslevel: int = 1
+    
+    # manifest of completely transferred files inside each series cache directory
+    manifest_file: str = ".manifest"
+    
+    def __init__(self, host: SSHHost, files: Dict[str, str]):
+        """
+        host:  remote host
+        files: mapping of instance UID (dicom database files) or content hash (other files) to local file
+        """
+        import posixpath
+        
+        self.host = host
+        self.files = {self.fileKey(key, path): path for key, path in files.items()}
+        self.series_hash = hashlib.sha256(" ".join(sorted(files.keys())).encode('utf-8')).hexdigest()
+        self.cache_dir = posixpath.join(host.base_dir, "cache", self.series_hash)
+        
+        # statistics
+        self.transferred_files = 0
+        self.transferred_bytes = 0
+        self._lock = threading.Lock()
+        
+    @staticmethod
+    def fileKey(key: str, path: str) -> str:
+        
+        # dicom database files have no extension, other files keep theirs (e.g. .nrrd) so the workflow reads them
+        extension = ".nii.gz" if path.endswith(".nii.gz") else os.path.splitext(path)[1]
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()[:32] + (extension or ".dcm")
+        
+    def getCachedFiles(self) -> List[str]:
+        import posixpath
+        
+        # only files listed in the manifest are complete
+        returncode, stdout = self.host.exec(["cat", posixpath.join(self.cache_dir, self.manifest_file)])
+        if returncode != 0:
+            return []
+        
+        return [line.strip() for line in stdout.split("\n") if line.strip()]
+    
+    def getMissingFiles(self) -> Dict[str, str]:
+        cached = set(self.getCachedFiles())
+        return {key: path for key, path in self.files.items() if key not in cached}
+    
+    def transfer(self, stdout, cancel: threading.Event) -> None:
+        from concurrent.futures import ThreadPoolExecutor
+        
+        # check what is missing on the host
+        missing = sorted(self.getMissingFiles().items())
+        stdout.write(f"Series {self.series_hash[:12]}: {len(self.files) - len(missing)} of {len(self.files)} files cached on {self.host.hostid}\n")
+        if not missing:
+            return
+        
+        # split missing files into chunks of similar size and send them in parallel
+        chunks = [missing[i::self.chunks] for i in range(self.chunks)]
+        chunks = [chunk for chunk in chunks if chunk]
+        
+        self.host.exec(["mkdir", "-p", self.cache_dir])
+        with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+            for future in [executor.submit(self._sendChunk, chunk, cancel) for chunk in chunks]:
+                future.result()
+                
+        # report
+        stdout.write(f"Transferred {self.transferred_files} files ({self.transferred_bytes / 1e6:.1f} MB uncompressed)\n")
+                
+    def _sendChunk(self, chunk: List[tuple[str, str]], cancel: threading.Event) -> None:
+        import shlex, gzip, tarfile, posixpath
+        
+        # remote side extracts the stream into the series cache
+        channel = self.host.client.get_transport().open_session()
+        channel.exec_command(shlex.join(["tar", "-xzf", "-", "-C", self.cache_dir]))
+        
+        # stream files as tar through a fast gzip compressor
+        sent: List[str] = []
+        with channel.makefile('wb') as raw:
+            with gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=self.compresslevel) as gz:
+                with tarfile.open(fileobj=gz, mode='w|') as tar:
+                    for key, path in chunk:
+                        if cancel.is_set():
+                            break
+                        tar.add(path, arcname=key)
+                        sent.append(key)
+                        with self._lock:
+                            self.transferred_files += 1
+                            self.transferred_bytes += os.path.getsize(path)
+        channel.shutdown_write()
+        returncode = channel.recv_exit_status()
+        
+        # only register files in the manifest once the chunk arrived completely
+        if returncode != 0:
+            raise RuntimeError(f"Transfer to {self.host.hostid} failed with return code {returncode}")
+        if cancel.is_set():
+            return
+        
+        manifest = self.host.client.get_transport().open_session()
+        manifest.exec_command(shlex.join(["sh", "-c", f"cat >> {shlex.quote(posixpath.join(self.cache_dir, self.manifest_file))}"]))
+        manifest.sendall("".join(f"{key}\n" for key in sent).encode('utf-8'))
+        manifest.shutdown_write()
+        manifest.recv_exit_status()
+        
+    def linkInto(self, remote_dir: str) -> None:
+        import shlex
+        
+        # hard-link all files of the series from the cache into the (run specific) input directory
+        script = f"mkdir -p {shlex.quote(remote_dir)} && cd {shlex.quote(self.cache_dir)} && while read f; do ln -f \"$f\" {shlex.quote(remote_dir)}/; done < {self.manifest_file}"
+        returncode, stdout = self.host.exec(["sh", "-c", script], timeout=120)
+        assert returncode == 0, f"Failed to link cached series into {remote_dir}: {stdout}"
+
+
+class RowsPageSource:
+    """
+    Paginated, filterable access to table rows held in memory.
+    """
+    
+    def __init__(self, header: List[str], rows: List[List[Any]]):
+        self.header = header
+        self._rows = rows
+        self._selection: Optional[List[int]] = None
+        
+    def __len__(self) -> int:
+        return len(self._selection) if self._selection is not None else self._count()
+    
+    def _count(self) -> int:
+        return len(self._rows)
+        
+    def _row(self, index: int) -> List[Any]:
+        return self._rows[index]
+    
+    def setFilter(self, text: str, column: Optional[int] = None) -> None:
+        """
+        Only keep rows that contain text (case insensitive) in the given column or in any column.
+        """
+        text = text.strip().lower()
+        if not text:
+            self._selection = None
+            return
+        
+        selection = []
+        for index in range(self._count()):
+            row = self._row(index)
+            cells = row[column:column + 1] if column is not None else row
+            if any(text in str(cell).lower() for cell in cells):
+                selection.append(index)
+        self._selection = selection
+        
+    def pages(self, page_size: int) -> int:
+        return max(1, -(-len(self) // page_size))
+    
+    def page(self, page: int, page_size: int, columns: Optional[List[int]] = None) -> tuple[List[str], List[List[Any]]]:
+        """
+        Rows of one page, optionally reduced to the selected columns.
+        """
+        start = page * page_size
+        indices = self._selection[start:start + page_size] if self._selection is not None else range(start, min(start + page_size, self._count()))
+        rows = [self._row(i) for i in indices]
+        
+        if columns is None:
+            return self.header, rows
+        return [self.header[c] for c in columns], [[row[c] if c < len(row) else "" for c in columns] for row in rows]
+    
+    def close(self) -> None:
+        pass
+
+class CsvPageSource(RowsPageSource):
+    """
+    Paginated access to a csv file. The file is memory-mapped and the offsets of all rows are
+    indexed once, only rows of the requested page (or filter) are parsed.
+    """
+    
+    def __init__(self, file: str, encoding: str = 'utf-8'):
+        import mmap, csv
+        from array import array
+        
+        self.encoding = encoding
+        self._file = open(file, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(file) > 0 else b""
+        
+        # index row start offsets (newlines inside quoted fields don't end a row)
+        self._offsets = array('q')
+        size = len(self._mm)
+        quoted = self._mm.find(b'"') != -1
+        start, pos, quotes = 0, 0, 0
+        while pos < size:
+            end = self._mm.find(b"\n", pos)
+            end = size if end == -1 else end + 1
+            if quoted:
+                quotes += self._mm[pos:end].count(b'"')
+            if quotes % 2 == 0:
+                self._offsets.append(start)
+                start, quotes = end, 0
+            pos = end
+        self._offsets.append(size)
+        
+        # header is the first row
+        header = next(csv.reader([self._mm[self._offsets[0]:self._offsets[1]].decode(encoding)])) if len(self._offsets) > 1 else []
+        super().__init__(header, [])
+        
+    def _count(self) -> int:
+        return max(0, len(self._offsets) - 2)
+    
+    def _row(self, index: int) -> List[Any]:
+        import csv
+        
+        # +1 skips the header row
+        data = self._mm[self._offsets[index + 1]:self._offsets[index + 2]].decode(self.encoding)
+        return next(csv.reader([data.rstrip("\r\n")]), [])
+        
+    def close(self) -> None:
+        if not isinstance(self._mm, bytes):
+            self._mm.close()
+        self._file.close()
+
+
+class JsonFlattener:
+    """
+    Iterative (non-recursive) flattening of nested json into tables. Arrays of objects (records)
+    become a table with one row per record and one column per (flattened) key, all other values
+    end up in a Key/Value table. Works on a stream of parse events, so large files can be
+    processed with ijson without loading the whole document.
+    """
+    
+    @dataclass
+    class Frame:
+        kind: Literal["map", "array"]
+        path: List[str]
+        key: Optional[str] = None
+        index: int = -1
+        records: Optional[List[Dict[str, Any]]] = None
+        demoted: bool = False
+    
+    @staticmethod
+    def eventsFromFile(file: str):
+        """
+        Parse events of a json file, streamed with ijson if available.
+        """
+        import json
+        try:
+            import ijson
+        except ModuleNotFoundError:
+            ijson = None
+        
+        if ijson is None:
+            with open(file, 'r') as f:
+                yield from JsonFlattener.events(json.load(f))
+            return
+            
+        with open(file, 'rb') as f:
+            for _prefix, event, value in ijson.parse(f, use_float=True):
+                if event in ["start_map", "end_map", "start_array", "end_array", "map_key"]:
+                    yield event, value
+                else:
+                    yield "scalar", value
+    
+    @staticmethod
+    def events(data: Any):
+        """
+        Parse events (ijson style) of an in-memory json object.
+        """
+        stack = [iter([(None, data)])]
+        closers: List[Optional[str]] = [None]
+        while stack:
+            try:
+                key, value = next(stack[-1])
+            except StopIteration:
+                stack.pop()
+                closer = closers.pop()
+                if closer:
+                    yield closer, None
+                continue
+            
+            if key is not None:
+                yield "map_key", key
+            if isinstance(value, dict):
+                yield "start_map", None
+                stack.append(iter(value.items()))
+                closers.append("end_map")
+            elif isinstance(value, list):
+                yield "start_array", None
+                stack.append((None, v) for v in value)
+                closers.append("end_array")
+            else:
+                yield "scalar", value
+    
+    def tables(self, events) -> List[tuple[str, List[str], List[List[Any]]]]:
+        """
+        Split into a Key/Value table and one table per record array: [(name, header, rows), ...]
+        """
+        values: List[List[Any]] = []
+        tables: List[tuple[str, List[str], List[List[Any]]]] = []
+        stack: List[JsonFlattener.Frame] = []
+        
+        for event, value in events:
+            if event == "map_key":
+                stack[-1].key = value
+                continue
+            
+            if event in ["end_map", "end_array"]:
+                frame = stack.pop()
+                if frame.records is not None:
+                    tables.append(self._table(frame))
+                continue
+            
+            # a new child of the current container
+            path = self._childPath(stack)
+            parent = stack[-1] if stack else None
+            if parent is not None and parent.kind == "array":
+                
+                # arrays whose first item is an object are record candidates (outermost only) ...
+                if parent.index == 0 and event == "start_map" and not parent.demoted and not any(f.records is not None for f in stack):
+                    parent.records = []
+                    
+                # ... until an item is not an object
+                if parent.records is not None and event != "start_map":
+                    self._demote(parent, values)
+                
+                # every record starts a new row
+                if parent.records is not None:
+                    parent.records.append({})
+            
+            if event in ["start_map", "start_array"]:
+                stack.append(self.Frame("map" if event == "start_map" else "array", path))
+                continue
+            
+            # leaves go into the row of the (outermost) record they belong to, or into the Key/Value table
+            owner = next((f for f in stack if f.records is not None), None)
+            if owner is not None:
+                owner.records[-1][".".join(path[len(owner.path) + 1:])] = value
+            else:
+                values.append([".".join(path), value])
+                
+        if values:
+            tables.insert(0, ("values", ["Key", "Value"], values))
+        return tables
+    
+    def _childPath(self, stack: List['JsonFlattener.Frame']) -> List[str]:
+        if not stack:
+            return []
+        parent = stack[-1]
+        if parent.kind == "map":
+            return parent.path + [str(parent.key)]
+        parent.index += 1
+        return parent.path + [str(parent.index)]
+    
+    def _demote(self, frame: 'JsonFlattener.Frame', values: List[List[Any]]) -> None:
+        assert frame.records is not None
+        prefix = ".".join(frame.path)
+        for index, row in enumerate(frame.records):
+            for key, value in row.items():
+                values.append([".".join(p for p in [prefix, str(index), key] if p), value])
+        frame.records = None
+        frame.demoted = True
+        
+    def _table(self, frame: 'JsonFlattener.Frame') -> tuple[str, List[str], List[List[Any]]]:
+        assert frame.records is not None
+        
+        # columns in order of first appearance
+        columns: Dict[str, None] = {}
+        for row in frame.records:
+            columns.update(dict.fromkeys(row))
+        header = list(columns)
+        
+        return ".".join(frame.path) or "records", header, [[row.get(c, "") for c in header] for row in frame.records]
+
+
+class RunTrace:
+    """
+    Timing spans of a single run (staging, container, import, ...), stored in the run directory in
+    Chrome trace format so runs can be inspected and compared in chrome://tracing or ui.perfetto.dev.
+    Each span category is drawn as its own lane.
+    """
+    
+    # trace file inside the run directory (hidden, so it is not listed as an output file)
+    file_name: str = ".mhub_trace.json"
+    
+    # traces of the runs started in this session, by run directory
+    _traces: Dict[str, 'RunTrace'] = {}
+    
+    @classmethod
+    def get(cls, run_dir: str) -> 'RunTrace':
+        run_dir = os.path.normpath(run_dir)
+        if run_dir not in cls._traces:
+            cls._traces[run_dir] = cls(run_dir)
+        return cls._traces[run_dir]
+    
+    @classmethod
+    def load(cls, run_dir: str) -> List[Dict[str, Any]]:
+        import json
+        file = os.path.join(run_dir, cls.file_name)
+        if not os.path.isfile(file):
+            return []
+        with open(file, 'r') as f:
+            return json.load(f).get("traceEvents", [])
+    
+    def __init__(self, run_dir: str):
+        self.run_dir = run_dir
+        self.events: List[Dict[str, Any]] = []
+        
+        # spans are opened and closed from the main thread and from worker threads
+        self._open: Dict[int, Dict[str, Any]] = {}
+        self._lanes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._next = 0
+        
+    def begin(self, name: str, cat: str = "run", **args) -> int:
+        """
+        Open a span, returns the span id to close it with end().
+        """
+        import time
+        with self._lock:
+            self._next += 1
+            self._open[self._next] = {"name": name, "cat": cat, "ph": "X", "ts": time.time() * 1e6, "pid": 1, "tid": self._lane(cat), "args": args}
+            return self._next
+    
+    def end(self, span: int, **args) -> float:
+        """
+        Close a span, returns its duration in seconds.
+        """
+        import time
+        with self._lock:
+            event = self._open.pop(span, None)
+            if event is None:
+                return 0.0
+            event["dur"] = time.time() * 1e6 - event["ts"]
+            event["args"].update(args)
+            self.events.append(event)
+            return event["dur"] / 1e6
+    
+    @contextmanager
+    def span(self, name: str, cat: str = "run", **args):
+        span = self.begin(name, cat, **args)
+        try:
+            yield span
+        finally:
+            self.end(span)
+            
+    def add(self, name: str, cat: str, started: float, seconds: float, **args) -> None:
+        """
+        Add a span that was measured elsewhere (started is a unix timestamp).
+        """
+        with self._lock:
+            self.events.append({"name": name, "cat": cat, "ph": "X", "ts": started * 1e6, "dur": seconds * 1e6, "pid": 1, "tid": self._lane(cat), "args": args})
+    
+    def counter(self, name: str, cat: str = "run", **values) -> None:
+        """
+        Add a sample of one or more counters (drawn as a graph).
+        """
+        import time
+        with self._lock:
+            self.events.append({"name": name, "cat": cat, "ph": "C", "ts": time.time() * 1e6, "pid": 1, "args": values})
+    
+    def instant(self, name: str, cat: str = "run", **args) -> None:
+        import time
+        with self._lock:
+            self.events.append({"name": name, "cat": cat, "ph": "i", "s": "t", "ts": time.time() * 1e6, "pid": 1, "tid": self._lane(cat), "args": args})
+    
+    def summary(self) -> Dict[str, float]:
+        """
+        Total duration in seconds per span name (in order of appearance).
+        """
+        totals: Dict[str, float] = {}
+        with self._lock:
+            for event in self.events:
+                if event["ph"] == "X":
+                    totals[event["name"]] = totals.get(event["name"], 0.0) + event["dur"] / 1e6
+        return totals
+    
+    def save(self) -> str:
+        """
+        Write all closed spans to the run directory, returns the trace file.
+        """
+        import json
+        
+        with self._lock:
+            
+            # name the lanes after their category
+            lanes = [{"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": cat}} for cat, tid in self._lanes.items()]
+            trace = {"traceEvents": lanes + sorted(self.events, key=lambda e: e["ts"]), "displayTimeUnit": "ms"}
+        
+        # replace atomically, the trace is rewritten whenever a stage finishes
+        file = os.path.join(self.run_dir, self.file_name)
+        with open(file + ".tmp", 'w') as f:
+            json.dump(trace, f)
+        os.replace(file + ".tmp", file)
+        
+        return file
+    
+    def _lane(self, cat: str) -> int:
+        return self._lanes.setdefault(cat, len(self._lanes) + 1)
+
+@dataclass
+class TimeoutPolicy:
+    safety_factor: float = 2.0      # timeout is this multiple of the longest expected duration
+    margin: float = 120             # seconds added for image startup and download
+    min_timeout: int = 300          # bounds of the learned timeout
+    max_timeout: int = 86400
+    default: int = 1200             # timeout without recorded runs
+    samples: int = 20               # number of recent successful runs considered
+
+@dataclass
+class TimeoutEstimate:
+    timeout: int                    # seconds
+    expected: Optional[float]       # expected run duration for the input size (median of the scaled samples)
+    samples: int                    # number of runs the estimate is based on
+    source: str                     # which runs were used (e.g. "on docker (gpu)")
+    
+    def __str__(self) -> str:
+        fmt = lambda s: f"{int(s // 60)}:{int(s % 60):02d}"
+        if self.expected is None:
+            return f"timeout {fmt(self.timeout)} (default, {self.source})"
+        return f"timeout {fmt(self.timeout)} (expected {fmt(self.expected)} from {self.samples} {'run' if self.samples == 1 else 'runs'} {self.source})".replace(" )", ")")
+
+@dataclass
+class RunRecord:
+    run_id: str
+    model: str
+    input_hash: Optional[str]
+    backend: Optional[str]
+    gpus: Optional[str]
+    workflow: Optional[str]
+    started: float
+    duration: Optional[float]
+    returncode: Optional[int]
+    output_files: List[str]
+    status: str
+    size: Optional[int] = None
+    imported: Optional[int] = None
+    archived: Optional[int] = None
+    input_size: Optional[int] = None
+    peak_cpu: Optional[float] = None
+    mean_cpu: Optional[float] = None
+    peak_memory_mb: Optional[float] = None
+    mean_memory_mb: Optional[float] = None
+    peak_gpu_memory_mb: Optional[float] = None
+    block_read_mb: Optional[float] = None
+    block_write_mb: Optional[float] = None
+    input_dir: Optional[str] = None
+    input_files: Dict[str, str] = field(default_factory=dict)
+    timeout: Optional[int] = None
+    host: Optional[str] = None
+    container: Optional[str] = None
+    session: Optional[str] = None
+
+@dataclass
+class RunContext:
+    run_id: str
+    model: 'Model'
+    backend: str
+    gpus: Optional[List[int]]
+    runs_dir: str
+    input_dir: str                                          # staged input (removed when the run stops)
+    output_dir: str                                         # <runs_dir>/<run_id>
+    workflow: str
+    output_format: OutputFormat
+    input_hash: str                                         # content fingerprint (of the hashed files once prepared)
+    input_files: Dict[str, str] = field(default_factory=dict) # files transferred directly (ssh)
+    input_key: str = ""                                     # path and stat key of the input, known right away
+    hashing: List[str] = field(default_factory=list)        # files whose content fingerprint becomes input_hash (see startRun)
+    staging: List[str] = field(default_factory=list)        # files still to be copied into input_dir (see startRun)
+    input_size: int = 0
+    timeout: Optional[TimeoutEstimate] = None
+    graph: Optional['ProcessGraph'] = None                  # staging / pulling before the run starts (see startRun)
+    attached: bool = False                                  # attached to an identical run, its caller imports the results
+    export: Any = None                                      # node exported once the workflows of the model are known (see startRun)
+
+class RunHistory:
+    """
+    SQLite index of all runs in a runs directory. Runs are recorded when they are queued, start and finish,
+    runs added from outside (e.g. copied into the runs directory) are picked up by reconcile().
+    
+    Queued and running runs also serve as job journal: they keep everything needed to resubmit or reattach 
+    to them (staged input, container, host) together with the Slicer session that owns them. Runs of an 
+    earlier session that never finished are returned by getOrphans() (see MHubRunnerLogic.recoverRuns).
+    """
+    
+    # database file inside the runs directory (hidden, so it is not listed as a run)
+    db_name: str = ".mhub_runs.sqlite"
+    
+    # the slicer session that queued or started a run
+    session: str = f"{os.getpid()}-{datetime.now().strftime('%y%m%d%H%M%S')}"
+    
+    # columns of the runs table, missing columns are added to existing databases
+    columns: Dict[str, str] = {
+        "run_id": "TEXT PRIMARY KEY",
+        "model": "TEXT",
+        "input_hash": "TEXT",
+        "backend": "TEXT",
+        "gpus": "TEXT",
+        "workflow": "TEXT",
+        "started": "REAL",
+        "duration": "REAL",
+        "returncode": "INTEGER",
+        "output_files": "TEXT",
+        "status": "TEXT",
+        "size": "INTEGER",
+        "imported": "INTEGER",
+        "archived": "INTEGER",
+        "input_size": "INTEGER",
+        "peak_cpu": "REAL",
+        "mean_cpu": "REAL",
+        "peak_memory_mb": "REAL",
+        "mean_memory_mb": "REAL",
+        "peak_gpu_memory_mb": "REAL",
+        "block_read_mb": "REAL",
+        "block_write_mb": "REAL",
+        "input_dir": "TEXT",
+        "input_files": "TEXT",
+        "timeout": "INTEGER",
+        "host": "TEXT",
+        "container": "TEXT",
+        "session": "TEXT",
+    }
+    
+    def __init__(self, runs_dir: str):
+        self.runs_dir = runs_dir
+        self.db_file = os.path.join(runs_dir, self.db_name)
+        os.makedirs(runs_dir, exist_ok=True)
+        self._migrate()
+        
+    def _connect(self):
+        import sqlite3
+        return sqlite3.connect(self.db_file, timeout=10)
+    
+    def _migrate(self) -> None:
+        with self._connect() as db:
+            db.execute(f"CREATE TABLE IF NOT EXISTS runs ({', '.join(f'{c} {t}' for c, t in self.columns.items())})")
+            existing = [row[1] for row in db.execute("PRAGMA table_info(runs)")]
+            for column, type in self.columns.items():
+                if column not in existing:
+                    db.execute(f"ALTER TABLE runs ADD COLUMN {column} {type}")
+            db.execute("CREATE INDEX IF NOT EXISTS runs_started ON runs (started)")
+            
+            # duration of every workflow module of a run
+            db.execute("CREATE TABLE IF NOT EXISTS modules (run_id TEXT, idx INTEGER, module TEXT, duration REAL, PRIMARY KEY (run_id, idx))")
+            
+    def queue(self, 
+              run_id: str, 
+              model: str, 
+              input_hash: str, 
+              backend: str, 
+              gpus: Optional[List[int]], 
+              workflow: str = "default", 
+              input_size: Optional[int] = None, 
+              input_dir: Optional[str] = None, 
+              input_files: Optional[Dict[str, str]] = None, 
+              timeout: Optional[int] = None, 
+              host: Optional[str] = None) -> None:
+        import time, json
+        with self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO runs (run_id, model, input_hash, backend, gpus, workflow, started, input_size, input_dir, input_files, timeout, host, session, status) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'queued')",
+                (run_id, model, input_hash, backend, self._gpus(gpus), workflow, time.time(), input_size, input_dir, json.dumps(input_files or {}), timeout, host, self.session)
+            )
+            
+    def start(self, run_id: str, container: Optional[str] = None) -> None:
+        import time
+        self._execute(
+            "UPDATE runs SET started = ?, container = ?, session = ?, status = 'running' WHERE run_id = ?",
+            (time.time(), container, self.session, run_id)
+        )
+            
+    def finish(self, run_id: str, returncode: int, status: Literal["finished", "cancelled", "lost"] = "finished") -> RunRecord:
+        import time, json
+        
+        # output files relative to the run directory
+        run_dir = os.path.join(self.runs_dir, run_id)
+        output_files = [os.path.relpath(os.path.join(root, f), run_dir) for root, _, files in os.walk(run_dir) for f in files if not f.startswith(".")]
+        size = sum(os.path.getsize(os.path.join(run_dir, f)) for f in output_files)
+        
+        with self._connect() as db:
+            db.execute(
+                "UPDATE runs SET duration = ? - started, returncode = ?, output_files = ?, size = ?, status = ? WHERE run_id = ?",
+                (time.time(), returncode, json.dumps(output_files), size, status, run_id)
+            )
+        
+        record = self.get(run_id)
+        assert record is not None, f"Run {run_id} not recorded"
+        return record
+    
+    def getOrphans(self) -> List[RunRecord]:
+        """
+        Queued and running runs of sessions that ended (e.g. Slicer was closed or crashed), in the order they were
+        queued. Runs of other sessions that are still alive (a second Slicer or a batch run on the same runs 
+        directory) are theirs.
+        """
+        records = self.query("WHERE status IN ('queued', 'running') AND (session IS NULL OR session != ?) ORDER BY started", (self.session,))
+        return [record for record in records if not self.isSessionAlive(record.session)]
+    
+    @staticmethod
+    def isSessionAlive(session: Optional[str]) -> bool:
+        """
+        Whether the process of a session (<pid>-<started>) is still running.
+        """
+        try:
+            pid = int((session or "").split("-")[0])
+        except ValueError:
+            return False
+        if pid == os.getpid():
+            return True
+        
+        # os.kill terminates the process on windows, ask for its exit code instead
+        if os.name == "nt":
+            import ctypes
+            kernel32 = ctypes.windll.kernel32  # type: ignore
+            handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+            if not handle:
+                return False
+            exitcode = ctypes.c_ulong()
+            kernel32.GetExitCodeProcess(handle, ctypes.byref(exitcode))
+            kernel32.CloseHandle(handle)
+            return exitcode.value == 259  # STILL_ACTIVE
+        
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            
+            # a process of another user
+            return True
+        return True
+    
+    def adopt(self, record: RunRecord) -> bool:
+        """
+        Take over an orphaned run, returns False if another session took it over already.
+        """
+        with self._connect() as db:
+            return db.execute("UPDATE runs SET session = ? WHERE run_id = ? AND session IS ?", (self.session, record.run_id, record.session)).rowcount == 1
+    
+    def get(self, run_id: str) -> Optional[RunRecord]:
+        records = self.query("WHERE run_id = ?", (run_id,))
+        return records[0] if records else None
+    
+    def list(self, limit: Optional[int] = None, **where) -> List[RunRecord]:
+        """
+        Runs ordered by start time (latest first), optionally filtered by column values.
+        """
+        conditions = " AND ".join(f"{c} = ?" for c in where if c in self.columns)
+        clause = f"WHERE {conditions} " if conditions else ""
+        clause += "ORDER BY started DESC" + (f" LIMIT {int(limit)}" if limit else "")
+        return self.query(clause, tuple(v for c, v in where.items() if c in self.columns))
+    
+    def query(self, clause: str, params: tuple = ()) -> List[RunRecord]:
+        import json
+        fields = list(RunRecord.__dataclass_fields__)
+        with self._connect() as db:
+            rows = db.execute(f"SELECT {', '.join(fields)} FROM runs {clause}", params).fetchall()
+        records = []
+        for row in rows:
+            values = dict(zip(fields, row))
+            values["output_files"] = json.loads(values["output_files"]) if values["output_files"] else []
+            values["input_files"] = json.loads(values["input_files"]) if values["input_files"] else {}
+            records.append(RunRecord(**values))
+        return records
+        
+    def reconcile(self) -> int:
+        """
+        Add run directories that are not indexed yet, drop runs whose directory was removed.
+        Returns the number of changed records.
+        """
+        import json
+        
+        # only directories that are unknown to the index are inspected (archived runs have no directory)
+        known = {row[0] for row in self._execute("SELECT run_id FROM runs WHERE archived IS NULL OR archived = 0")}
+        found = {d.name: d for d in os.scandir(self.runs_dir) if d.is_dir() and not d.name.startswith(".")}
+        added = [d for name, d in found.items() if name not in known]
+        removed = [name for name in known if name not in found]
+        
+        with self._connect() as db:
+            for d in added:
+                
+                # run ids are <yy.mm.dd-hh.mm.ss>_<model>
+                _, _, model = d.name.partition("_")
+                output_files = [os.path.relpath(os.path.join(root, f), d.path) for root, _, files in os.walk(d.path) for f in files if not f.startswith(".")]
+                size = sum(os.path.getsize(os.path.join(d.path, f)) for f in output_files)
+                db.execute(
+                    "INSERT OR REPLACE INTO runs (run_id, model, started, output_files, size, status) VALUES (?, ?, ?, ?, ?, 'external')",
+                    (d.name, model, d.stat().st_ctime, json.dumps(output_files), size)
+                )
+            db.executemany("DELETE FROM runs WHERE run_id = ?", [(name,) for name in removed])
+        
+        return len(added) + len(removed)
+    
+    def estimateTimeout(self, model: str, backend: str, gpus: Optional[List[int]], input_size: Optional[int], policy: TimeoutPolicy = TimeoutPolicy()) -> TimeoutEstimate:
+        """
+        Timeout learned from the durations of previous successful runs of the model, preferring runs on the 
+        same backend and device (cpu / gpu). Durations are scaled linearly with the input size (but not below 
+        half of the recorded duration, container startup does not shrink with the input).
+        """
+        import statistics
+        
+        # most specific runs first
+        cpu = self._gpus(gpus) == "cpu"
+        device = "gpus = 'cpu'" if cpu else "gpus != 'cpu'"
+        candidates = [
+            (f"on {backend} ({'cpu' if cpu else 'gpu'})", f"AND backend = ? AND {device}", (backend,)),
+            (f"on {'cpu' if cpu else 'gpu'}", f"AND {device}", ()),
+            ("", "", ()),
+        ]
+        for source, clause, params in candidates:
+            samples = self._execute(
+                f"SELECT duration, input_size FROM runs WHERE model = ? AND returncode = 0 AND duration IS NOT NULL {clause} ORDER BY started DESC LIMIT ?",
+                (model,) + params + (policy.samples,)
+            )
+            if samples:
+                break
+        else:
+            return TimeoutEstimate(policy.default, None, 0, "no previous runs")
+        
+        # scale every sample to the input size
+        estimates = [d * max(input_size / s, 0.5) if input_size and s else d for d, s in samples]
+        
+        # bounded timeout from the longest estimate
+        timeout = int(policy.safety_factor * max(estimates) + policy.margin)
+        timeout = min(max(timeout, policy.min_timeout), policy.max_timeout)
+        
+        return TimeoutEstimate(timeout, statistics.median(estimates), len(samples), source)
+    
+    def setTelemetry(self, run_id: str, summary: Dict[str, Optional[float]]) -> None:
+        """
+        Store peak / mean resource usage of a run (see ContainerTelemetry.summary).
+        """
+        columns = [c for c in summary if c in self.columns]
+        if columns:
+            self._execute(f"UPDATE runs SET {', '.join(f'{c} = ?' for c in columns)} WHERE run_id = ?", tuple(summary[c] for c in columns) + (run_id,))
+    
+    def setImported(self, run_id: str) -> None:
+        self._execute("UPDATE runs SET imported = 1 WHERE run_id = ?", (run_id,))
+        
+    def setArchived(self, run_id: str, size: int) -> None:
+        import time
+        
+        # archived holds the time the run was compacted (archives expire on their own, see RunRetention)
+        self._execute("UPDATE runs SET archived = ?, size = ? WHERE run_id = ?", (int(time.time()), size, run_id))
+        
+    def delete(self, run_id: str) -> None:
+        self._execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+        self._execute("DELETE FROM modules WHERE run_id = ?", (run_id,))
+        
+    def setModuleTimings(self, run_id: str, timings: List[tuple[str, float]]) -> None:
+        with self._connect() as db:
+            db.execute("DELETE FROM modules WHERE run_id = ?", (run_id,))
+            db.executemany("INSERT INTO modules (run_id, idx, module, duration) VALUES (?, ?, ?, ?)", [(run_id, i, m, d) for i, (m, d) in enumerate(timings)])
+    
+    def getModuleTimings(self, run_id: str) -> List[tuple[str, float]]:
+        return [(m, d) for m, d in self._execute("SELECT module, duration FROM modules WHERE run_id = ? ORDER BY idx", (run_id,))]
+    
+    def getExpectedModuleTimings(self, model: str, workflow: str, backend: Optional[str] = None, runs: int = 5) -> List[tuple[str, float]]:
+        """
+        Mean module durations of the latest successful runs of a model and workflow (optionally on the same backend).
+        """
+        backend_clause = "AND backend = ? " if backend else ""
+        params = (model, workflow) + ((backend,) if backend else ()) + (runs,)
+        return [(m, d) for m, d in self._execute(
+            "SELECT module, AVG(duration) FROM modules WHERE run_id IN ("
+            f"SELECT run_id FROM runs WHERE model = ? AND workflow = ? AND returncode = 0 {backend_clause}"
+            "AND run_id IN (SELECT run_id FROM modules) ORDER BY started DESC LIMIT ?"
+            ") GROUP BY idx, module ORDER BY idx",
+            params
+        )]
+    
+    def _execute(self, sql: str, params: tuple = ()) -> list:
+        with self._connect() as db:
+            return db.execute(sql, params).fetchall()
+    
+    @staticmethod
+    def _gpus(gpus: Optional[List[int]]) -> str:
+        if gpus is None:
+            return "cpu"
+        return ",".join(str(g) for g in gpus) if gpus else "all"
+    
+    @staticmethod
+    def _parseGpus(gpus: Optional[str]) -> Optional[List[int]]:
+        if not gpus or gpus == "cpu":
+            return None
+        return [int(g) for g in gpus.split(",")] if gpus != "all" else []
+
+
+@dataclass
+class RetentionPolicy:
+    max_age_days: float = 30        # runs older than this expire (0 = no limit)
+    max_count: int = 100            # only the latest runs are kept (0 = no limit)
+    max_total_mb: float = 10000     # latest runs are kept until their total size exceeds this (0 = no limit)
+    archive_max_age_days: float = 365   # archives older than this (since they were compacted) expire (0 = no limit)
+    archive_max_total_mb: float = 0     # latest archives are kept until their total size exceeds this (0 = no limit)
+
+class RunRetention:
+    """
+    Keeps the runs directory bounded. Expired runs whose outputs were already imported into the
+    dicom database are compacted into a compressed archive, all other expired runs are purged. 
+    Archives have limits of their own and are purged once they expire. Queued and running runs 
+    are never touched, neither are directories that were not created by a run (indexed as external, 
+    see RunHistory.reconcile), e.g. when the runs directory points to an existing data folder.
+    """
+    
+    # archives are stored in a hidden directory, so they are not listed as runs
+    archive_dir_name: str = ".archive"
+    
+    def __init__(self, history: RunHistory, policy: RetentionPolicy, actions: Optional[List[tuple[RunRecord, Literal["compact", "purge"]]]] = None):
+        """
+        actions: the plan to apply (e.g. the one the user confirmed), planned when applied otherwise
+        """
+        self.history = history
+        self.policy = policy
+        self.actions = actions
+        self.archive_dir = os.path.join(history.runs_dir, self.archive_dir_name)
+        
+    def plan(self) -> List[tuple[RunRecord, Literal["compact", "purge"]]]:
+        import time
+        
+        now = time.time()
+        actions: List[tuple[RunRecord, Literal["compact", "purge"]]] = []
+        
+        # latest first: age, count and size limits all keep the latest runs
+        records = [r for r in self.history.list() if r.status not in ["queued", "running", "external"]]
+        
+        # run directories
+        total = 0.0
+        for index, record in enumerate(r for r in records if not r.archived):
+            total += (record.size or 0) / 1e6
+            expired = (self.policy.max_age_days > 0 and now - record.started > self.policy.max_age_days * 86400) \
+                   or (self.policy.max_count > 0 and index >= self.policy.max_count) \
+                   or (self.policy.max_total_mb > 0 and total > self.policy.max_total_mb)
+            if expired:
+                actions.append((record, "compact" if record.imported else "purge"))
+        
+        # archives, aged from the time they were compacted (older indices only stored a flag)
+        total = 0.0
+        for record in (r for r in records if r.archived):
+            total += (record.size or 0) / 1e6
+            archived = record.archived if record.archived and record.archived > 1 else record.started
+            expired = (self.policy.archive_max_age_days > 0 and now - archived > self.policy.archive_max_age_days * 86400) \
+                   or (self.policy.archive_max_total_mb > 0 and total > self.policy.archive_max_total_mb)
+            if expired:
+                actions.append((record, "purge"))
+                
+        return actions
+    
+    def apply(self, stdout, cancel: threading.Event) -> int:
+        import shutil, tarfile
+        
+        for record, action in self.actions if self.actions is not None else self.plan():
+            if cancel.is_set():
+                return -1
+            
+            run_dir = os.path.join(self.history.runs_dir, record.run_id)
+            archive = os.path.join(self.archive_dir, f"{record.run_id}.tar.gz")
+            
+            if action == "compact":
+                os.makedirs(self.archive_dir, exist_ok=True)
+                with tarfile.open(archive, "w:gz") as tar:
+                    tar.add(run_dir, arcname=record.run_id)
+                shutil.rmtree(run_dir, ignore_errors=True)
+                self.history.setArchived(record.run_id, os.path.getsize(archive))
+            else:
+                shutil.rmtree(run_dir, ignore_errors=True)
+                if os.path.exists(archive):
+                    os.remove(archive)
+                self.history.delete(record.run_id)
+            
+            # log
+            stdout.write(f"{action} {record.run_id}\n")
+            
+        return 0
+
+
+class HashIndex:
+    """
+    Persistent index of file content hashes. Files are hashed once (memory-mapped, on a pool of threads) and 
+    the hash is memoized by path, modification time and size, so repeated lookups of unchanged files only 
+    stat them. The fingerprint of a set of files (e.g. a dicom series) combines their content hashes and 
+    changes whenever any file changes, even if its instance UID stays the same.
+    """
+    
+    # database file inside the index directory
+    db_name: str = "hashes.sqlite"
+    
+    # blake2b is part of hashlib and releases the GIL while hashing, so files are hashed in parallel
+    digest_size: int = 16
+    workers: int = 8
+    
+    def __init__(self, index_dir: str):
+        self.db_file = os.path.join(index_dir, self.db_name)
+        os.makedirs(index_dir, exist_ok=True)
+        with self._connect() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, hash TEXT)")
+    
+    def _connect(self):
+        import sqlite3
+        return sqlite3.connect(self.db_file, timeout=10)
+    
+    def hashFiles(self, files: List[str]) -> Dict[str, str]:
+        """
+        Content hash of every file, only files that are new or changed since they were indexed are read.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        
+        # current modification time and size
+        stats = {f: os.stat(f) for f in set(files)}
+        
+        # memoized hashes of unchanged files (in batches, sqlite limits the number of query parameters)
+        hashes: Dict[str, str] = {}
+        paths = list(stats)
+        with self._connect() as db:
+            for i in range(0, len(paths), 500):
+                batch = paths[i:i + 500]
+                for path, mtime_ns, size, hash in db.execute(f"SELECT path, mtime_ns, size, hash FROM files WHERE path IN ({', '.join('?' * len(batch))})", batch):
+                    if stats[path].st_mtime_ns == mtime_ns and stats[path].st_size == size:
+                        hashes[path] = hash
+        
+        # hash new and changed files
+        missing = [f for f in stats if f not in hashes]
+        if missing:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                hashes.update(zip(missing, pool.map(self.hashFile, missing)))
+            with self._connect() as db:
+                db.executemany(
+                    "INSERT OR REPLACE INTO files (path, mtime_ns, size, hash) VALUES (?, ?, ?, ?)", 
+                    [(f, stats[f].st_mtime_ns, stats[f].st_size, hashes[f]) for f in missing]
+                )
+                
+        return hashes
+    
+    def fingerprint(self, files: List[str]) -> str:
+        """
+        Hash of the contents of a set of files, independent of their order and location.
+        """
+        hash = hashlib.blake2b(digest_size=self.digest_size * 2)
+        for file_hash in sorted(self.hashFiles(files).values()):
+            hash.update(file_hash.encode('utf-8'))
+        return hash.hexdigest()
+    
+    @classmethod
+    def statKey(cls, files: List[str]) -> str:
+        """
+        Cheap identity of a set of files from their path, modification time and size (only stats them).
+        """
+        hash = hashlib.blake2b(digest_size=cls.digest_size * 2)
+        for f in sorted(set(files)):
+            st = os.stat(f)
+            hash.update(f"{f}:{st.st_mtime_ns}:{st.st_size}\n".encode('utf-8'))
+        return hash.hexdigest()
+    
+    @classmethod
+    def hashFile(cls, file: str) -> str:
+        import mmap
+        hash = hashlib.blake2b(digest_size=cls.digest_size)
+        with open(file, 'rb') as f:
+            
+            # empty files cannot be mapped
+            if os.fstat(f.fileno()).st_size > 0:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                    hash.update(m)
+        return hash.hexdigest()
+
+
+# MHubRunnerLogic
+#
 
 class MHubRunnerLogic(ScriptedLoadableModuleLogic):
     """This class should implement all the actual
@@ -1740,6 +4590,12 @@ class MHubRunnerLogic(ScriptedLoadableModuleLogic):
     https://github.com/Slicer/Slicer/blob/main/Base/Python/slicer/ScriptedLoadableModule.py
     """
 
+    # staged inputs, one directory per run
+    staging_dir: str = os.path.join(tempfile.gettempdir(), "mhub_slicer_extension")
+    
+    # pull the image and stage the input when a model is selected, before the run is started (see prefetchRun)
+    speculative: bool = False
+
     def __init__(self) -> None:
         """
         Called when the logic class is instantiated. Can be used for initializing member variables.
@@ -1747,11 +4603,7 @@ class MHubRunnerLogic(ScriptedLoadableModuleLogic):
         ScriptedLoadableModuleLogic.__init__(self)
         self.setupPythonRequirements()
         self._executables: Dict[str, str] = {}
-        # self.hosts: List[str] = []
-        # self.hostInfo: Dict[str, HostInformation] = {}
-
-        # load available hosts
-        # self.getAvailableSshHosts()
+        self._sshHost: Optional[str] = None
 
     def getParameterNode(self):
         return MHubRunnerParameterNode(super().getParameterNode())
@@ -1771,6 +4623,564 @@ class MHubRunnerLogic(ScriptedLoadableModuleLogic):
         except ModuleNotFoundError as e:
             #self.log('paramiko is required. Installing...')
             slicer.util.pip_install('paramiko')
+    
+    def getRunHistory(self, runs_dir: str) -> RunHistory:
+        
+        # one index per runs directory
+        if not hasattr(self, "_run_histories"):
+            self._run_histories: Dict[str, RunHistory] = {}
+        if runs_dir not in self._run_histories:
+            self._run_histories[runs_dir] = RunHistory(runs_dir)
+            
+        return self._run_histories[runs_dir]
+    
+    def planRunRetention(self, runs_dir: str, policy: RetentionPolicy) -> List[tuple[RunRecord, Literal["compact", "purge"]]]:
+        """
+        The runs a cleanup would compact or purge.
+        """
+        return RunRetention(self.getRunHistory(runs_dir), policy).plan()
+    
+    def applyRunRetention(self, runs_dir: str, policy: RetentionPolicy, onStop: Optional[Callable[[int, str, bool, bool], None]] = None, actions: Optional[List[tuple[RunRecord, Literal["compact", "purge"]]]] = None) -> None:
+        """
+        Compact and purge expired runs (or the given actions) in a background thread.
+        """
+        
+        # one cleanup at a time
+        if ProgressObserver.getTasksWhere(operation="retention", runs_dir=runs_dir):
+            return
+        
+        # run async
+        retention = RunRetention(self.getRunHistory(runs_dir), policy, actions)
+        po = ThreadProgressObserver(retention.apply, ["retention", runs_dir], frequency=1, data={"operation": "retention", "runs_dir": runs_dir})
+        if onStop: po.onStop(onStop)
+    
+    def createRunId(self, model: 'Model', runs_dir: str) -> str:
+        """
+        Run id as yy.mm.dd-hh.mm.ss_model.name (with a counter if runs start in the same second).
+        """
+        timestamp = datetime.now().strftime('%y.%m.%d-%H.%M.%S')
+        runid = f"{timestamp}_{model.name}"
+        i = 1
+        while os.path.exists(os.path.join(runs_dir, runid)) or os.path.exists(os.path.join(self.staging_dir, runid)):
+            i += 1
+            runid = f"{timestamp}-{i}_{model.name}"
+        return runid
+    
+    def selectGpus(self, enabled: bool, indices: Optional[List[int]] = None, backend: str = "docker") -> Optional[List[int]]:
+        """
+        None runs on cpu, an empty list on all gpus, otherwise on the given (available) gpus.
+        """
+        if not enabled:
+            return None
+        available = len([g for g in self.getGPUInformation(self._sshHost if backend == "ssh" else None) if g.strip()])
+        return [i for i in indices if i < available] if indices else []
+    
+    def prepareRun(self, node, model: 'Model', backend: str, gpus: Optional[List[int]], runs_dir: str, output_format: OutputFormat = OutputFormat.DICOMSEG) -> RunContext:
+        """
+        Create the run directories and stage the input node: other than dicom nodes are exported as nrrd / nifti, 
+        the files of dicom nodes are listed for staging when the run starts (or transferred directly from the 
+        dicom database by the ssh backend).
+        """
+        runid = self.createRunId(model, runs_dir)
+        input_dir = os.path.join(self.staging_dir, runid, "input")
+        output_dir = os.path.join(runs_dir, runid)
+        os.makedirs(input_dir, exist_ok=True)
+        os.makedirs(output_dir, exist_ok=True)
+        
+        # stage timings of this run
+        trace = RunTrace.get(output_dir)
+        
+        # files to copy into the input directory
+        staging: List[str] = []
+        
+        # workflow that produces the selected segmentation format (if the model supports it), unless the workflows of 
+        # the model are not known yet: they are listed once the image is available (see startRun)
+        workflow = (self.getOutputWorkflow(model, backend, output_format, probe=False) or "") if 'Segmentation' in model.categories else "default"
+        
+        # the ssh backend transfers the files straight from the dicom database (only what the host doesn't have cached yet)
+        input_files = self.getNodeInstanceFiles(node) if backend == "ssh" else {}
+        export = None
+        
+        if not self.isDicomNode(node) and self.getModelWorkflows(model, backend, probe=False) is None:
+            
+            # nodes without dicom source are exported once the workflow that reads them is known (see startRun)
+            assert slicer.util.arrayFromVolume(node).ndim == 3, f"{node.GetName()} is not a scalar volume, only scalar volumes can be exported"
+            workflow, export = "", node
+        
+        elif not self.isDicomNode(node):
+            
+            # nodes without dicom source (e.g. resampled, cropped or filtered in memory) are exported directly and run with a workflow that reads nrrd / nifti
+            input_workflow = self.getInputWorkflow(model, backend)
+            assert input_workflow is not None, f"{model.label} only supports DICOM input, {node.GetName()} was not loaded from DICOM."
+            workflow, output_format = input_workflow
+            with trace.span("export", "stage", format=output_format.label):
+                self.exportVolumeNode(node, input_dir, output_format)
+        
+        elif not input_files:
+            
+            # dicom files are copied when the run starts, while the image is pulled (see startRun)
+            staging = self.get_node_paths(node)
+                
+        # the content fingerprint of dicom files is computed while the run is prepared, off the ui thread (see startRun)
+        input_key = self.getNodeKey(node)
+        hashing = self._getHashableFiles(node)
+        
+        # debug
+        print(f"Running workflow {workflow or '(listed once the image is available)'} for output format {output_format.label}")
+        
+        ctx = RunContext(
+            run_id=runid,
+            model=model,
+            backend=backend,
+            gpus=gpus,
+            runs_dir=runs_dir,
+            input_dir=input_dir,
+            output_dir=output_dir,
+            workflow=workflow,
+            output_format=output_format,
+            input_hash=input_key,
+            input_files=input_files,
+            staging=staging,
+            input_key=input_key,
+            hashing=hashing,
+            export=export
+        )
+        
+        # timeout learned from previous runs of this model
+        ctx.input_size = self.getInputSize(input_dir, input_files) + sum(os.path.getsize(f) for f in staging if os.path.isfile(f))
+        ctx.timeout = self.estimateRunTimeout(model, backend, gpus, ctx.input_size, runs_dir=runs_dir)
+        
+        return ctx
+    
+    def startRun(self, 
+                 ctx: RunContext, 
+                 onProgress: Optional[Callable[[float, str], None]] = None, 
+                 onStop: Optional[Callable[[int, str, bool, bool], None]] = None, 
+                 onStatus: Optional[Callable[[MHubProgress], None]] = None, 
+                 onTelemetry: Optional[Callable[[TelemetrySample], None]] = None,
+                 onStaging: Optional[Callable[[StagingProgress], None]] = None) -> bool:
+        """
+        Run a prepared run, the staged input is removed when the run stops. The input files are staged and 
+        fingerprinted while the image is pulled (if it is not available locally), the run starts once all is done. An identical run 
+        (same model, backend, workflow, gpus and input) in flight is not started again: the context is pointed to
+        that run (and marked attached) and onStop receives its result, only the caller that started the run imports
+        its results. Returns False if the run is not started right away (preparing, 
+        waiting for resources or attached to an identical run).
+        """
+        import shutil
+        key = f"run:{ctx.model.name}:{ctx.backend}:{ctx.workflow or ctx.output_format.name}:{RunHistory._gpus(ctx.gpus)}:{ctx.input_key or ctx.input_hash}"
+        
+        # attach to an identical run in flight, the directories created for this run are not needed
+        flight = SingleFlight.get(key)
+        if flight is not None:
+            primary: RunContext = flight.data
+            print(f"Run {ctx.run_id} is identical to run {primary.run_id}, attaching to it")
+            self._removeStagedInput(ctx.input_dir)
+            shutil.rmtree(ctx.output_dir, ignore_errors=True)
+            ctx.run_id, ctx.input_dir, ctx.output_dir, ctx.staging, ctx.hashing, ctx.graph = primary.run_id, primary.input_dir, primary.output_dir, [], [], primary.graph
+            ctx.attached = True
+            SingleFlight.run(key, lambda done: None, onStop)
+            return False
+        
+        started = [False]
+        
+        def _start(done: Callable[[int, str, bool, bool], None]):
+            started[0] = self._startRun(ctx, onProgress, done, onStatus, onTelemetry, onStaging)
+        
+        SingleFlight.run(key, _start, onStop, data=ctx)
+        return started[0]
+    
+    def _startRun(self, 
+                  ctx: RunContext, 
+                  onProgress: Optional[Callable[[float, str], None]], 
+                  onStop: Callable[[int, str, bool, bool], None], 
+                  onStatus: Optional[Callable[[MHubProgress], None]], 
+                  onTelemetry: Optional[Callable[[TelemetrySample], None]], 
+                  onStaging: Optional[Callable[[StagingProgress], None]]) -> bool:
+        
+        def _on_stop(returncode: int, stdout: str, timedout: bool, killed: bool):
+            self._removeStagedInput(ctx.input_dir)
+            onStop(returncode, stdout, timedout, killed)
+        
+        def _run() -> bool:
+            return self.run_mhub(
+                model=ctx.model,
+                backend=ctx.backend,  # type: ignore
+                gpus=ctx.gpus,
+                input_dir=ctx.input_dir,
+                output_dir=ctx.output_dir,
+                onProgress=onProgress,
+                onStop=_on_stop,
+                timeout=ctx.timeout.timeout if ctx.timeout else None,
+                input_files=ctx.input_files or None,
+                workflow=ctx.workflow,
+                input_hash=ctx.input_hash,
+                onStatus=onStatus,
+                onTelemetry=onTelemetry
+            )
+        
+        # staging and pulling are independent steps
+        pg = self._prepareGraph(ctx)
+        if not pg.nodes:
+            return _run()
+        
+        # run once prepared
+        def _on_prepared(returncode: int, stdout: str, timedout: bool, killed: bool):
+            ctx.staging, ctx.hashing, ctx.graph = [], [], None
+            export, ctx.export = ctx.export, None
+            if returncode != 0:
+                _on_stop(returncode, stdout, timedout, killed)
+                return
+            try:
+                
+                # nodes without dicom source are exported in the format of the workflow (on the ui thread)
+                if export is not None:
+                    with RunTrace.get(ctx.output_dir).span("export", "stage", format=ctx.output_format.label):
+                        self.exportVolumeNode(export, ctx.input_dir, ctx.output_format)
+                    ctx.input_size = self.getInputSize(ctx.input_dir, ctx.input_files)
+                    ctx.timeout = self.estimateRunTimeout(ctx.model, ctx.backend, ctx.gpus, ctx.input_size, runs_dir=ctx.runs_dir)
+                
+                _run()
+            except Exception as e:
+                print(f"Failed to start run {ctx.run_id}: {e}")
+                _on_stop(-1, f"{stdout}\nFailed to start run: {e}\n", False, False)
+        
+        # progress of the steps, bytes per second and eta of the staging worker
+        def _on_progress(node: ProcessGraph.Node, seconds: float, stdout: str):
+            if node.name == "stage" and onStaging is not None and node.data:
+                onStaging(node.data["worker"].progress)
+            if onProgress is not None:
+                onProgress(seconds, stdout)
+        
+        pg.onStop(_on_prepared)
+        pg.onProgress(_on_progress)
+        ctx.graph = pg
+        pg.start()
+        
+        return False
+    
+    def _prepareGraph(self, ctx: RunContext) -> ProcessGraph:
+        pg = ProcessGraph(trace=RunTrace.get(ctx.output_dir))
+        image_name = f"mhubai/{ctx.model.name}:latest"
+        
+        # copy the input files, taking over what was staged ahead (see prefetchRun)
+        if ctx.staging:
+            for task in ProgressObserver.getTasksWhere(operation="stage ahead", input_key=ctx.input_key):
+                task.kill()
+                
+                # the copy ahead has to stop before its files are moved
+                assert isinstance(task, ThreadProgressObserver)
+                task.join(task.grace_period)
+            worker = StagingWorker(list(ctx.staging), ctx.input_dir, self._getStageAheadDir(ctx.input_key))
+            pg.add("stage", ["stage", ctx.input_dir], work=worker.run, frequency=4, data={"operation": "stage", "run_id": ctx.run_id, "worker": worker})
+        
+        # content fingerprint of the input files (memoized by the hash index, so only new or changed files are read)
+        if ctx.hashing:
+            hash_index, files = self.getHashIndex(), list(ctx.hashing)
+            def fingerprint(stdout, cancel: threading.Event) -> int:
+                try:
+                    ctx.input_hash = hash_index.fingerprint(files)
+                except OSError as e:
+                    
+                    # the run is still identified by its path and stat key
+                    stdout.write(f"Failed to fingerprint the input: {e}\n")
+                return 0
+            pg.add("hash", ["hash", ctx.input_dir], work=fingerprint, frequency=1)
+        
+        # the image is pulled by the backend otherwise (remote hosts pull on their own)
+        if ctx.backend in ["docker", "udocker"] and (SingleFlight.get(f"pull:{ctx.backend}:{image_name}") or not self.isImageAvailable(image_name, ctx.backend, cached=False)):
+            
+            # start (or attach to) the pull, the node waits for it
+            pulled = threading.Event()
+            result: List[int] = []
+            def on_pulled(returncode: int, *args):
+                result.append(returncode)
+                pulled.set()
+            self.update_image(image_name, on_stop=on_pulled, backend=ctx.backend)
+            
+            def wait(stdout, cancel: threading.Event) -> int:
+                stdout.write(f"Pulling {image_name}\n")
+                while not pulled.wait(0.5):
+                    if cancel.is_set():
+                        return -1
+                
+                # a failed pull does not fail the run, the backend uses the local image (if any) or pulls again
+                if result[0] != 0:
+                    stdout.write(f"Pulling {image_name} failed with return code {result[0]}\n")
+                return 0
+            pg.add("pull", ["pull", image_name], work=wait, frequency=1)
+        
+        # the workflows are listed from the image, so only once it is available
+        if not ctx.workflow:
+            def resolve(stdout, cancel: threading.Event) -> int:
+                return self._resolveWorkflow(ctx, stdout)
+            pg.add("workflow", ["workflow", image_name], after=["pull"] if "pull" in pg.nodes else [], work=resolve, frequency=1)
+            
+        return pg
+    
+    def _resolveWorkflow(self, ctx: RunContext, stdout) -> int:
+        
+        # nodes without dicom source run with a workflow that reads nrrd / nifti
+        if ctx.export is not None:
+            input_workflow = self.getInputWorkflow(ctx.model, ctx.backend)
+            if input_workflow is None:
+                stdout.write(f"{ctx.model.label} only supports DICOM input, {ctx.export.GetName()} was not loaded from DICOM.\n")
+                return 1
+            ctx.workflow, ctx.output_format = input_workflow
+            return 0
+        
+        # the workflow of the selected segmentation format, the default workflow writes DICOM SEG
+        ctx.workflow = self.getOutputWorkflow(ctx.model, ctx.backend, ctx.output_format) or "default"
+        if ctx.workflow == "default" and ctx.output_format != OutputFormat.DICOMSEG:
+            stdout.write(f"{ctx.model.label} has no {ctx.output_format.label} workflow, the segmentations are written as DICOM SEG\n")
+        else:
+            stdout.write(f"Running workflow {ctx.workflow} for output format {ctx.output_format.label}\n")
+        return 0
+    
+    def prefetchRun(self, node, model: 'Model', backend: str) -> None:
+        """
+        Speculatively pull the image of a model and stage a dicom input node (e.g. when a model is selected), so
+        a run of the model on the node that follows finds both ready (see startRun). Does nothing unless speculative
+        preparation is enabled.
+        """
+        if not self.speculative:
+            return
+        
+        # pulls ahead of earlier selections are not needed anymore
+        image_name = f"mhubai/{model.name}:latest"
+        self.cancelPrefetch(image_name=image_name, backend=backend)
+        
+        # pull the image
+        if backend in ["docker", "udocker"] and not self.isImageAvailable(image_name, backend, cached=True):
+            print(f"Pulling {image_name} ahead of the run")
+            self.update_image(image_name, backend=backend, speculative=True)
+        
+        # stage the input (the ssh backend transfers from the dicom database)
+        if node is not None and backend != "ssh" and self.isDicomNode(node):
+            self._stageAhead(node)
+    
+    def cancelPrefetch(self, image_name: Optional[str] = None, backend: Optional[str] = None) -> None:
+        """
+        Stop the speculative pulls (except the one of image_name on backend), pulls a run or the user waits for are 
+        not speculative anymore (see update_image). Without image_name, the input staged ahead is dropped as well.
+        """
+        for task in ProgressObserver.getTasksWhere(operation="update", speculative=True):
+            if task.data and not task.terminating and (task.data["image_name"], task.data["backend"]) != (image_name, backend):
+                print(f"Cancelling the pull of {task.data['image_name']} ahead of the run")
+                task.kill()
+        
+        # input staged ahead
+        if image_name is None:
+            self._dropStagedAhead()
+    
+    def _dropStagedAhead(self, keep: Optional[str] = None) -> None:
+        import shutil
+        ahead_root = os.path.join(self.staging_dir, ".ahead")
+        
+        # stop the copies first, a worker that is still copying keeps its directory
+        tasks = [t for t in ProgressObserver.getTasksWhere(operation="stage ahead") if t.data and self._getStageAheadDir(t.data["input_key"]) != keep]
+        for task in tasks:
+            task.kill()
+        busy = [self._getStageAheadDir(t.data["input_key"]) for t in tasks if isinstance(t, ThreadProgressObserver) and not t.join(t.grace_period)]
+        
+        for entry in os.scandir(ahead_root) if os.path.isdir(ahead_root) else []:
+            if entry.path != keep and entry.path not in busy:
+                shutil.rmtree(entry.path, ignore_errors=True)
+    
+    def _stageAhead(self, node) -> None:
+        input_key = self.getNodeKey(node)
+        ahead_dir = self._getStageAheadDir(input_key)
+        
+        # one speculative copy at a time, the latest selection wins
+        if any(not t.terminating for t in ProgressObserver.getTasksWhere(operation="stage ahead", input_key=input_key)):
+            return
+        self._dropStagedAhead(keep=ahead_dir)
+        
+        # copy in the background
+        worker = StagingWorker(self.get_node_paths(node), ahead_dir)
+        ThreadProgressObserver(worker.run, ["stage", ahead_dir], frequency=1, data={"operation": "stage ahead", "input_key": input_key})
+    
+    def _getStageAheadDir(self, input_key: str) -> str:
+        return os.path.join(self.staging_dir, ".ahead", hashlib.sha1(input_key.encode()).hexdigest()[:16])
+    
+    def importRunResults(self, ctx: RunContext, onProgress: Optional[Callable[[str, int, int], None]] = None, onStop: Optional[Callable[[Dict[str, float]], None]] = None, load: bool = True) -> bool:
+        """
+        Add the segmentations of a finished run to the dicom database and (optionally) load them into the scene.
+        Label maps of nrrd / nifti workflows are loaded directly, DICOM SEGs are imported in the background.
+        Returns False if the model produces no segmentations.
+        """
+        if 'Segmentation' not in ctx.model.categories:
+            return False
+        
+        trace = RunTrace.get(ctx.output_dir)
+        
+        # fast path: load label maps directly, DICOM SEGs (if any) only go into the database
+        if ctx.workflow != "default":
+            labelmaps = self.scanDirectoryForFilesWithExtension(ctx.output_dir, extension=ctx.output_format.extensions)
+            if load:
+                with trace.span("load labelmaps", "import", files=len(labelmaps)):
+                    self.importLabelmaps(labelmaps)
+            load = False
+        
+        # dicom seg import
+        dsegfiles = self.scanDirectoryForFilesWithExtension(ctx.output_dir)
+        span = trace.begin("import segmentations", "import", files=len(dsegfiles))
+        
+        def _on_stop(timings: Dict[str, float]):
+            
+            # record the import stages
+            trace.end(span, **timings)
+            trace.save()
+            
+            # outputs are in the dicom database now, the run can be compacted
+            if dsegfiles:
+                self.getRunHistory(ctx.runs_dir).setImported(ctx.run_id)
+            
+            if onStop is not None:
+                onStop(timings)
+        
+        self.importSegmentationsAsync(dsegfiles, onProgress=onProgress, onStop=_on_stop, load=load)
+        return True
+    
+    def recoverRuns(self, runs_dir: str, onStop: Optional[Callable[[RunRecord], None]] = None) -> List[RunRecord]:
+        """
+        Recover the runs of an earlier Slicer session that were still queued or running when it ended (closed or 
+        crashed), runs of sessions that are still alive are left alone (see RunHistory.getOrphans). Containers of running runs are reattached (containers that exited meanwhile are collected right 
+        away), queued runs are resubmitted if their staged input still exists. Runs that cannot be recovered are 
+        recorded as lost. onStop receives the final record of every recovered run. Returns the recovered runs.
+        """
+        history = self.getRunHistory(runs_dir)
+        
+        # take the runs over (another session could be recovering the same runs directory)
+        orphans = [record for record in history.getOrphans() if history.adopt(record)]
+        
+        for record in orphans:
+            print(f"Recovering {record.status} run {record.run_id} ({record.backend})")
+            try:
+                if record.status == "queued":
+                    self._resubmitRun(history, record, onStop)
+                else:
+                    self._reattachRun(history, record, onStop)
+            except Exception as e:
+                print(f"Failed to recover run {record.run_id}: {e}")
+                self._removeStagedInput(record.input_dir)
+                lost = history.finish(record.run_id, -1, "lost")
+                if onStop is not None:
+                    onStop(lost)
+                    
+        return orphans
+    
+    def _resubmitRun(self, history: RunHistory, record: RunRecord, onStop: Optional[Callable[[RunRecord], None]] = None) -> None:
+        
+        # the staged input lives in the temp directory and does not survive a reboot
+        staged = bool(record.input_files) and all(os.path.isfile(f) for f in record.input_files.values()) \
+              or bool(record.input_dir) and os.path.isdir(record.input_dir) and any(os.scandir(record.input_dir))  # type: ignore
+        assert staged, "staged input no longer available"
+        
+        def _on_stop(returncode: int, stdout: str, timedout: bool, killed: bool):
+            self._removeStagedInput(record.input_dir)
+            if onStop is not None:
+                onStop(history.get(record.run_id))  # type: ignore
+        
+        # queue again with the journaled parameters
+        self.run_mhub(
+            model=self.getModel(record.model),
+            backend=record.backend,  # type: ignore
+            gpus=RunHistory._parseGpus(record.gpus),
+            input_dir=record.input_dir or "",
+            output_dir=os.path.join(history.runs_dir, record.run_id),
+            onStop=_on_stop,
+            timeout=record.timeout,
+            input_files=record.input_files or None,
+            workflow=record.workflow or "default",
+            input_hash=record.input_hash,
+            hostid=record.host
+        )
+        
+    def _reattachRun(self, history: RunHistory, record: RunRecord, onStop: Optional[Callable[[RunRecord], None]] = None) -> None:
+        import time
+        assert record.container, f"{record.backend} runs cannot be reattached"
+        
+        output_dir = os.path.join(history.runs_dir, record.run_id)
+        image_name = f"mhubai/{record.model}:latest"
+        trace = RunTrace.get(output_dir)
+        
+        # what is left of the original timeout
+        timeout = max(int(record.timeout - (time.time() - record.started)), 60) if record.timeout else 0
+        
+        span = trace.begin("reattached", "backend", container=record.container, host=record.host or "local")
+        
+        def _on_stop(returncode: int, stdout: str, timedout: bool, killed: bool):
+            trace.end(span, returncode=returncode, timedout=timedout, killed=killed)
+            trace.save()
+            finished = history.finish(record.run_id, returncode)
+            ResourceManager.release(record.run_id)
+            self._removeStagedInput(record.input_dir)
+            if onStop is not None:
+                onStop(finished)
+        
+        if record.backend == "docker":
+            self._attach_mhub_docker(record.container, image_name, output_dir, None, _on_stop, timeout)
+            
+            # the container takes its share of the local budget until it stops
+            ResourceManager.reserve(record.run_id, ResourceManager.getProfile(record.model, record.gpus != "cpu"))
+            
+        elif record.backend == "ssh":
+            assert record.host, "ssh host of the run is unknown"
+            self._attach_mhub_ssh(record.host, record.container, image_name, output_dir, None, _on_stop, timeout)
+            
+        else:
+            raise ValueError(f"{record.backend} runs cannot be reattached")
+    
+    def _removeStagedInput(self, input_dir: Optional[str]) -> None:
+        import shutil
+        
+        # input is staged in <staging_dir>/<run_id>/input, nothing outside the staging directory is removed
+        if input_dir and os.path.abspath(input_dir).startswith(os.path.join(os.path.abspath(self.staging_dir), "")):
+            shutil.rmtree(os.path.dirname(os.path.abspath(input_dir)), ignore_errors=True)
+    
+    def getInputSize(self, input_dir: str, input_files: Optional[Dict[str, str]] = None) -> int:
+        """
+        Size of the model input in bytes (files transferred directly or the staged input directory).
+        """
+        files = list(input_files.values()) if input_files else [os.path.join(root, f) for root, _, files in os.walk(input_dir) for f in files]
+        return sum(os.path.getsize(f) for f in files if os.path.isfile(f))
+    
+    def estimateRunTimeout(self, model: 'Model', backend: str, gpus: Optional[List[int]], input_size: Optional[int], runs_dir: Optional[str] = None, history: Optional[RunHistory] = None, policy: TimeoutPolicy = TimeoutPolicy()) -> TimeoutEstimate:
+        """
+        Timeout for a run learned from the recorded durations of previous runs.
+        """
+        assert history is not None or runs_dir is not None, "Either a runs directory or a run history is required"
+        history = history or self.getRunHistory(runs_dir)  # type: ignore
+        return history.estimateTimeout(model.name, backend, gpus, input_size, policy)
+    
+    def exportRunTrace(self, run_dir: str, file: str) -> bool:
+        """
+        Copy the stage timings of a run (Chrome trace JSON) to file, returns False if the run has no trace.
+        """
+        import shutil
+        trace_file = os.path.join(run_dir, RunTrace.file_name)
+        if not os.path.isfile(trace_file):
+            return False
+        shutil.copyfile(trace_file, file)
+        return True
+    
+    def getAvailableSshHosts(self) -> List[str]:
+        from sshconf import read_ssh_config
+        
+        # read hosts from ssh config (wildcard patterns can't be connected to)
+        config_file = os.path.expanduser("~/.ssh/config")
+        if not os.path.exists(config_file):
+            return []
+        hosts = read_ssh_config(config_file).hosts()
+        
+        return [h for h in hosts if "*" not in h and "?" not in h]
+    
+    def getSshHost(self) -> Optional[str]:
+        return self._sshHost
+    
+    def setSshHost(self, hostid: Optional[str]) -> None:
+        self._sshHost = hostid if hostid else None
         
     def getModel(self, model_name: str) -> Model:
         
@@ -1937,7 +5347,12 @@ class MHubRunnerLogic(ScriptedLoadableModuleLogic):
         return udocker_executable
     
     def getBackendInformation(self, name: str) -> BackendInformation:
-        assert name in ["docker", "udocker"]
+        assert name in ["docker", "udocker", "ssh"]
+        
+        # concurrent probes of the same backend share one call
+        return SingleFlight.call(f"probe:{name}:{self._sshHost if name == 'ssh' else ''}", lambda: self._getBackendInformation(name))
+    
+    def _getBackendInformation(self, name: str) -> BackendInformation:
         import subprocess, re
         
         # initialize bi
@@ -1985,6 +5400,14 @@ class MHubRunnerLogic(ScriptedLoadableModuleLogic):
             except Exception as e:
                 bi.version = "E"
                 bi.available = False
+                
+        elif name == "ssh":
+            if self._sshHost is None:
+                bi.version = "No host selected"
+            else:
+                hi = SSHHost(self._sshHost).getInformation()
+                bi.version = f"{hi.name}: {hi.dockerVersion} ({len(hi.cachedSubjects)} cached series)" if hi.canConnect else "E"
+                bi.available = hi.canConnect and hi.dockerAvailable
         
         # return 
         return bi
@@ -2012,9 +5435,13 @@ class MHubRunnerLogic(ScriptedLoadableModuleLogic):
         else:
             slicer.util.pip_uninstall('udocker')
         
-    def getGPUInformation(self) -> List[str]:
+    def getGPUInformation(self, host: Optional[str] = None) -> List[str]:
         import subprocess
         
+        # gpus of a remote host
+        if host is not None:
+            return SSHHost(host).getInformation().gpus
+        
         # try to get gpus from nvidia-smi
         # TODO: extract additional version information from nvidia-smi 
         #       or have a separate availability cheecker for nvidia-smi
@@ -2027,15 +5454,30 @@ class MHubRunnerLogic(ScriptedLoadableModuleLogic):
         # return
         return gpus
 
-    def getLocalImages(self, backend: str, cached: bool = True) -> List[str]:
+    def isImageAvailable(self, image_name: str, backend: str, cached: bool = True) -> bool:
         
-        # get images
-        import subprocess
+        # local images are listed with their size, e.g. "mhubai/lungmask:latest (2.1GB)"
+        return any(image.split()[0] == image_name for image in self.getLocalImages(backend, cached) if image.strip())
+    
+    def _pull_cmd(self, backend: str, image_name: str) -> List[str]:
+        executable = self.getUDockerExecutable() if backend == "udocker" else self.getDockerExecutable()
+        assert executable is not None, f"{backend} executable not found"
+        return [executable, "pull", image_name]
+    
+    def getLocalImages(self, backend: str, cached: bool = True) -> List[str]:
         
         # cache
         if cached and hasattr(self, "_images_cache") and backend in self._images_cache:
             return self._images_cache[backend]
         
+        # concurrent listings of the same backend share one call
+        return SingleFlight.call(f"images:{backend}:{self._sshHost if backend == 'ssh' else ''}", lambda: self._listLocalImages(backend))
+    
+    def _listLocalImages(self, backend: str) -> List[str]:
+        
+        # get images
+        import subprocess
+        
         # load images based on backend
         try:
             if backend == "docker":
@@ -2051,6 +5493,13 @@ class MHubRunnerLogic(ScriptedLoadableModuleLogic):
                 result = subprocess.run([udocker_exec, "images"], timeout=5, check=True, capture_output=True)
                 images = result.stdout.decode('utf-8').split("\n")
                 images = [image.split()[0] for image in images if image.startswith("mhubai/")]
+                
+            elif backend == "ssh":
+                assert self._sshHost is not None, "No ssh host selected"
+                returncode, stdout = SSHHost(self._sshHost).exec(["docker", "images", "--filter", "reference=mhubai/*", "--format", "{{.Repository}}|{{.Tag}}|{{.Size}}"], timeout=5)
+                assert returncode == 0, f"Failed to list images on {self._sshHost}"
+                images = [i.split("|") for i in stdout.split("\n")]
+                images = [f"{i[0]}:latest ({i[2]})" for i in images if len(i) == 3 and i[1] == "latest"]
             
             # remove empty strings
             images = [image for image in images if image != ""]
@@ -2068,35 +5517,219 @@ class MHubRunnerLogic(ScriptedLoadableModuleLogic):
         
     def get_node_paths(self, node) -> List[str]:
         storageNode=node.GetStorageNode()
-        if storageNode is not None:
+        if storageNode is not None and storageNode.GetFileName():
             return [storageNode.GetFullNameFromFileName()]
-        else:
+        elif self.isDicomNode(node):
             instanceUIDs=node.GetAttribute('DICOM.instanceUIDs').split()
             return [slicer.dicomDatabase.fileForInstance(instanceUID) for instanceUID in instanceUIDs]
+        else:
+            # node only exists in memory (e.g. resampled, cropped or filtered), see exportVolumeNode
+            return []
 
-    def renderTableData(self, tableNode, header: list[str], data: list[list[str]]) -> None:
+    def getNodeInstanceFiles(self, node) -> Dict[str, str]:
+        """
+        Map the instance UIDs of a node loaded through the dicom module to their files in the dicom database.
+        """
+        instanceUIDs = node.GetAttribute('DICOM.instanceUIDs')
+        if not instanceUIDs:
+            return {}
+        return {uid: slicer.dicomDatabase.fileForInstance(uid) for uid in instanceUIDs.split()}
+
+    def isDicomNode(self, node) -> bool:
+        return bool(node.GetAttribute('DICOM.instanceUIDs'))
+    
+    def getHashIndex(self) -> HashIndex:
+        
+        # one index shared by all runs directories, kept in the slicer cache
+        if not hasattr(self, "_hash_index"):
+            self._hash_index = HashIndex(os.path.join(slicer.app.cachePath, "MHubRunner"))
+        return self._hash_index
+    
+    def getNodeHash(self, node) -> str:
+        """
+        Identify the input of a run: the content fingerprint of the files of dicom nodes (see HashIndex), node id and 
+        voxel data modification time otherwise.
+        """
+        instanceUIDs = node.GetAttribute('DICOM.instanceUIDs')
+        files = self._getHashableFiles(node)
+        if files:
+            return self.getHashIndex().fingerprint(files)
+        elif not instanceUIDs:
+            imageData = node.GetImageData()
+            instanceUIDs = f"{node.GetID()}:{imageData.GetMTime() if imageData else 0}"
+            
+        # create hash from instanceUIDs (dicom files missing from the database)
+        hash = hashlib.sha256()
+        hash.update(instanceUIDs.encode('utf-8'))
+        return hash.hexdigest()
+    
+    def getNodeKey(self, node) -> str:
+        """
+        Identify the input of a node without reading it: path, modification time and size of the files of dicom 
+        nodes (see HashIndex.statKey), the node hash otherwise.
+        """
+        files = self._getHashableFiles(node)
+        if files:
+            return HashIndex.statKey(files)
+        return self.getNodeHash(node)
+    
+    def _getHashableFiles(self, node) -> List[str]:
+        
+        # files of dicom nodes, unless some are missing from the database
+        files = self.get_node_paths(node) if self.isDicomNode(node) else []
+        return files if files and all(f and os.path.isfile(f) for f in files) else []
+    
+    def getInputWorkflow(self, model: 'Model', backend: str) -> Optional[tuple[str, OutputFormat]]:
+        """
+        Find a workflow of the model that reads NRRD or NIfTI input (preferring NRRD, which is written without any conversion).
+        """
+        for image_format in [OutputFormat.NRRD, OutputFormat.NIFTI]:
+            workflow = self.getOutputWorkflow(model, backend, image_format)
+            if workflow not in [None, "default"]:
+                return workflow, image_format
+        return None
+    
+    def exportVolumeNode(self, node, export_dir: str, image_format: OutputFormat) -> str:
+        """
+        Write the voxel array of a volume node to an uncompressed NRRD or NIfTI file.
+        The array is written straight from the node's VTK buffer, no copy of the voxel data is made.
+        """
+        import numpy as np
+        assert image_format in [OutputFormat.NRRD, OutputFormat.NIFTI], f"Unsupported export format: {image_format.label}"
+        
+        # voxel array (a view on the vtkImageData buffer, k-j-i order = i fastest on disk as NRRD / NIfTI expect)
+        voxels = slicer.util.arrayFromVolume(node)
+        assert voxels.flags['C_CONTIGUOUS'], "Volume buffer is not contiguous"
+        
+        # the headers describe 3-D scalar volumes, vector volumes (e.g. RGB) have a component axis
+        assert voxels.ndim == 3, f"{node.GetName()} has {voxels.shape[-1]} components per voxel, only scalar volumes can be exported"
+        
+        # geometry
+        ijkToRas = vtk.vtkMatrix4x4()
+        node.GetIJKToRASMatrix(ijkToRas)
+        affine = np.array([[ijkToRas.GetElement(r, c) for c in range(4)] for r in range(4)])
+        
+        # write file
+        os.makedirs(export_dir, exist_ok=True)
+        file = os.path.join(export_dir, re.sub(r'[^\w.-]', '_', node.GetName() or 'volume') + image_format.extensions[-1])
+        with open(file, 'wb') as f:
+            if image_format == OutputFormat.NRRD:
+                f.write(self._nrrdHeader(voxels, affine))
+            else:
+                
+                # nifti is written little endian (a copy is only made on big endian machines)
+                f.write(self._niftiHeader(voxels, affine))
+                voxels = voxels.astype(voxels.dtype.newbyteorder('<'), copy=False)
+            f.write(memoryview(voxels).cast('B'))
+            
+        # debug
+        print(f"Exported {node.GetName()} ({'x'.join(str(s) for s in voxels.shape[::-1])}, {voxels.dtype}) to {file}")
+        
+        return file
+    
+    def _nrrdHeader(self, voxels, affine) -> bytes:
+        import sys
+        
+        # nrrd types by numpy dtype
+        types = {"int8": "int8", "uint8": "uint8", "int16": "short", "uint16": "ushort", "int32": "int", "uint32": "uint", "int64": "longlong", "uint64": "ulonglong", "float32": "float", "float64": "double"}
+        
+        # space directions in LPS (slicer uses RAS internally)
+        lps = affine.copy()
+        lps[0:2, :] *= -1
+        directions = " ".join("(" + ",".join(repr(float(v)) for v in lps[0:3, i]) + ")" for i in range(3))
+        origin = "(" + ",".join(repr(float(v)) for v in lps[0:3, 3]) + ")"
+        
+        header = [
+            "NRRD0004",
+            f"type: {types[voxels.dtype.name]}",
+            "dimension: 3",
+            "space: left-posterior-superior",
+            f"sizes: {' '.join(str(s) for s in voxels.shape[::-1])}",
+            f"space directions: {directions}",
+            "kinds: domain domain domain",
+            f"endian: {sys.byteorder}",
+            "encoding: raw",
+            f"space origin: {origin}",
+        ]
+        return ("\n".join(header) + "\n\n").encode('ascii')
+    
+    def _niftiHeader(self, voxels, affine) -> bytes:
+        import struct
+        import numpy as np
+        
+        # nifti datatype codes and bits per voxel by numpy dtype
+        datatypes = {"uint8": 2, "int16": 4, "int32": 8, "float32": 16, "float64": 64, "int8": 256, "uint16": 512, "uint32": 768, "int64": 1024, "uint64": 1280}
+        
+        # voxel spacing is the column norm of the direction matrix
+        spacing = np.linalg.norm(affine[0:3, 0:3], axis=0)
+        dim = [3] + list(voxels.shape[::-1]) + [1, 1, 1, 1]
+        pixdim = [1.0] + [float(s) for s in spacing] + [1.0, 1.0, 1.0, 1.0]
+        
+        # nifti-1 header (348 bytes) with sform in RAS, followed by an empty extension block (voxel data at offset 352)
+        header = struct.pack(
+            '<i10s18sihbb8h3fhhhh8ffffhbbffffii80s24shh6f4f4f4f16s4s',
+            348, b'', b'', 0, 0, b'r'[0], 0,
+            *dim,
+            0.0, 0.0, 0.0, 0,
+            datatypes[voxels.dtype.name], voxels.dtype.itemsize * 8, 0,
+            *pixdim,
+            352.0, 1.0, 0.0, 0, 0, 2, 0.0, 0.0, 0.0, 0.0, 0, 0,
+            b'MHubRunner export', b'',
+            0, 1,
+            0.0, 0.0, 0.0, 0.0, 0.0, 0.0,
+            *[float(v) for v in affine[0]], *[float(v) for v in affine[1]], *[float(v) for v in affine[2]],
+            b'', b'n+1\x00'
+        )
+        return header + b'\x00\x00\x00\x00'
+
+    def renderTableData(self, tableNode, header: list[str], data: list[list[Any]]) -> None:
+        import itertools
+
+        # transpose rows into columns (rows of malformed csv files can have different lengths)
+        columns = list(itertools.zip_longest(*data, fillvalue="")) if data else []
+        names = list(header) + [f"Column {i + 1}" for i in range(len(header), len(columns))]
+        columns += [("",) * len(data)] * (len(names) - len(columns))
 
         # initialize table
         tableWasModified = tableNode.StartModify()
         tableNode.RemoveAllColumns()
         
-        # Define table columns
-        for column in header:
-            col = tableNode.AddColumn()
-            col.SetName(column)
+        # build typed columns and attach them to the table all at once
+        table = tableNode.GetTable()
+        for name, values in zip(names, columns):
+            array = self._tableColumn(values)
+            array.SetName(name)
+            table.AddColumn(array)
             
-        # Add data to table
-        for row in data:
-            rowIndex = tableNode.AddEmptyRow()
-            for columnIndex, column in enumerate(row):
-                tableNode.SetCellText(rowIndex, columnIndex, str(column))
-                
+        table.Modified()
         tableNode.Modified()
         tableNode.EndModify(tableWasModified)
 
         # open csv in yellow table view node
         self.showTable(tableNode)
         
+    def _tableColumn(self, values: tuple):
+        """
+        Create a vtkDoubleArray for numeric columns and a vtkStringArray for everything else.
+        """
+        import numpy as np
+        from vtk.util import numpy_support
+        
+        # numeric (numbers or numeric strings, empty cells become NaN, booleans are kept as text)
+        if any(v != "" for v in values) and not any(isinstance(v, bool) for v in values):
+            try:
+                numeric = np.asarray([v if v != "" else np.nan for v in values], dtype=np.float64)
+                return numpy_support.numpy_to_vtk(numeric, deep=True, array_type=vtk.VTK_DOUBLE)
+            except (ValueError, TypeError):
+                pass
+        
+        # text
+        array = vtk.vtkStringArray()
+        array.SetNumberOfValues(len(values))
+        for i, value in enumerate(values):
+            array.SetValue(i, str(value))
+        return array
+        
     def openFile(self, file_path: str) -> None:
         import subprocess
         import sys
@@ -2119,57 +5752,12 @@ class MHubRunnerLogic(ScriptedLoadableModuleLogic):
         slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID(table.GetID())
         slicer.app.applicationLogic().PropagateTableSelection()
 
-    # def upload_file(self, hostid: str, local_file: str, remote_file: str):
-        
-    #     # make sure host_input_dir exists / create dir under tmp
-    #     cmd = ["ssh", hostid, "mkdir", "-p", os.path.dirname(remote_file)]
-    #     proc = slicer.util.launchConsoleProcess(cmd)
-    #     slicer.util.logProcessOutput(proc)
-        
-    #     # upload the files to host
-    #     cmd = ["scp", local_file, f"{hostid}:{remote_file}"]
-    #     p = ProgressObserver(cmd, timeout=0)
-    #     p.onStop(lambda t, rc: print(f"File upload done: {t}, {rc}"))
-
-    # def zip_node(self, node, zip_file: str, verbose: bool = True):
-    #     """
-    #     Create a zip file from a dicom image node at the specified location.
-    #     """
-    #     import zipfile
-        
-    #     # get list of all dicom files
-    #     files = self.get_node_paths(node)
-     
-    #     # print number of files
-    #     if verbose: print(f"number of files: {len(files)}")
-        
-    #     # check if the zip file exists
-    #     if os.path.exists(zip_file):
-    #         raise Exception(f"Zip file already exists: {zip_file}")
-        
-    #     # check if the path exists 
-    #     if not os.path.exists(os.path.dirname(zip_file)):
-    #         os.makedirs(os.path.dirname(zip_file))
-
-    #     # make zip file under local input dir and add all files to it
-    #     if verbose: print(f"creating zip file {zip_file}")
-    #     with zipfile.ZipFile(zip_file, 'w') as zipMe:        
-    #         for file in files:
-                
-    #             # print
-    #             if verbose: print(f"adding file {file} to zip file")
-                
-    #             # compress the file
-    #             zipMe.write(file, os.path.basename(file), compress_type=zipfile.ZIP_DEFLATED, compresslevel=9)
-                
-    #             # let slicer breathe :D
-    #             slicer.app.processEvents()
-
     def copy_node(self, node, copy_dir: str, verbose: bool = True):
         """
-        Copy all dicom files from a dicom image node to the specified location.
+        Copy all dicom files from a dicom image node to the specified location (blocking, runs use a staging
+        worker in the background instead, see startRun).
         """
-        import shutil
+        import sys
         
         # get list of all dicom files
         files = self.get_node_paths(node)
@@ -2178,39 +5766,106 @@ class MHubRunnerLogic(ScriptedLoadableModuleLogic):
         if verbose: 
             print(f"number of files: {len(files)}")
         
-        # check if the path exists 
-        if not os.path.exists(copy_dir):
-            os.makedirs(copy_dir)
-        
-        # copy all files to the specified location
-        for file in files:
-            shutil.copy(file, copy_dir)
-            
-            # let slicer breathe :D
-            slicer.app.processEvents()
+        # copy all files to the specified location (in parallel)
+        returncode = StagingWorker(files, copy_dir).run(sys.stdout, threading.Event())
+        assert returncode == 0, f"Failed to copy {node.GetName()} to {copy_dir}"
        
-    def _run_mhub_docker(self, model: 'Model', gpus: Optional[List[int]], input_dir: str, output_dir: str, onProgress: Callable[[float, str], None], onStop: Callable[[int, str, bool, bool], None], timeout: int = 600):
+    def getContainerName(self, output_dir: str) -> str:
+        """
+        Container name of a run (runs are stored under <runs_dir>/<run_id>).
+        """
+        return f"mhub_slicer_{os.path.basename(os.path.normpath(output_dir))}"
+    
+    def _docker_gpu_args(self, gpus: Optional[List[int]]) -> List[str]:
         
         # gpus command
         if gpus is None:
-            mhub_run_gpus = []
+            return []
         elif len(gpus) == 0:
-            mhub_run_gpus = ["--gpus", "all"]
+            return ["--gpus", "all"]
         else:
-            mhub_run_gpus = ["--gpus", f"'\"device={','.join(str(i) for i in gpus)}\"'"]
+            return ["--gpus", f"'\"device={','.join(str(i) for i in gpus)}\"'"]
+       
+    def getModelWorkflows(self, model: 'Model', backend: str, probe: bool = True) -> Optional[List[str]]:
+        """
+        List the workflows (config files) shipped with a model image, None if they are not known. Listing starts a 
+        container of the image, so it is done once the image is available (see _prepareGraph) and never on the ui thread,
+        probe=False only returns listed workflows. Listings are cached per backend and model, failed listings are not.
+        """
+        import subprocess
+        
+        # cache lookup
+        if not hasattr(self, "_workflows_cache"):
+            self._workflows_cache: Dict[tuple[str, str], List[str]] = {}
+        if (backend, model.name) in self._workflows_cache:
+            return self._workflows_cache[(backend, model.name)]
+        if not probe:
+            return None
+        
+        # list the config directory of the model inside the image (remote hosts pull the image if needed)
+        ls_cmd = ["run", "--rm", "--network=none", "--entrypoint", "ls", f"mhubai/{model.name}:latest", f"/app/models/{model.name}/config"]
+        try:
+            if backend == "docker":
+                docker_exec = self.getDockerExecutable()
+                assert docker_exec is not None, "Docker executable not found"
+                result = subprocess.run([docker_exec, ls_cmd[0], "--pull=never"] + ls_cmd[1:], timeout=30, check=True, capture_output=True)
+                stdout = result.stdout.decode('utf-8')
+            elif backend == "ssh":
+                assert self._sshHost is not None, "No ssh host selected"
+                returncode, stdout = SSHHost(self._sshHost).exec(["docker"] + ls_cmd, timeout=600)
+                assert returncode == 0, stdout
+            else:
+                stdout = ""
+        except Exception as e:
+            print(f"Failed to list workflows of {model.name}: {e}")
+            return None
+            
+        # cache
+        workflows = [f[:-4] for f in stdout.split() if f.endswith(".yml")] or ["default"]
+        self._workflows_cache[(backend, model.name)] = workflows
+        
+        return workflows
+    
+    def getOutputWorkflow(self, model: 'Model', backend: str, output_format: OutputFormat, probe: bool = True) -> Optional[str]:
+        """
+        Select the workflow that produces the requested segmentation format, falls back to the default workflow (DICOM SEG).
+        None if the workflows of the model are not known (see getModelWorkflows).
+        """
+        if output_format == OutputFormat.DICOMSEG:
+            return "default"
+        
+        # workflows are matched by name, e.g. `nifti` or `default_nrrd`
+        keywords = {OutputFormat.NIFTI: ["nifti", "nii"], OutputFormat.NRRD: ["nrrd"]}[output_format]
+        workflows = self.getModelWorkflows(model, backend, probe)
+        if workflows is None:
+            return None if not probe else "default"
+        for workflow in workflows:
+            if any(k in workflow.lower() for k in keywords):
+                return workflow
+            
+        return "default"
+    
+    def _run_mhub_docker(self, model: 'Model', gpus: Optional[List[int]], input_dir: str, output_dir: str, onProgress: Callable[[float, str], None], onStop: Callable[[int, str, bool, bool], None], timeout: int = 600, workflow: str = "default", limits: Optional[List[str]] = None):
+        
+        # gpus command
+        mhub_run_gpus = self._docker_gpu_args(gpus)
         
         # get executable
         docker_exec = self.getDockerExecutable()
+        assert docker_exec is not None, "Docker executable not found"
+        
+        # named container, so it can be stopped when the run is cancelled or times out and found again after a restart
+        container_name = self.getContainerName(output_dir)
         
-        # run mhub
+        # run mhub (the observer removes the container, --rm would discard the exit code if slicer is gone by then)
         run_cmd = [
-            docker_exec, "run", "--rm", "-t", "--network=none"
-        ] + mhub_run_gpus + [
+            docker_exec, "run", "-t", "--network=none", "--name", container_name
+        ] + (limits or []) + mhub_run_gpus + [
             "-v", f"{input_dir}:/app/data/input_data:ro",
             "-v", f"{output_dir}:/app/data/output_data:rw",
             f"mhubai/{model.name}:latest",
             "--workflow",
-            "default",
+            workflow,
             "--print"
         ]
         
@@ -2220,60 +5875,62 @@ class MHubRunnerLogic(ScriptedLoadableModuleLogic):
             onStop(returncode, stdout, timedout, killed)
         
         # run async
-        po = ProgressObserver(run_cmd, frequency=2, timeout=timeout, data={"image_name": f"mhubai/{model.name}:latest", "operation": "run"})
+        po = ContainerProgressObserver(run_cmd, container_name, docker_exec, frequency=2, timeout=timeout, data={"image_name": f"mhubai/{model.name}:latest", "operation": "run", "run_id": os.path.basename(os.path.normpath(output_dir)), "container": container_name})
         po.onStop(_on_stop)
         po.onProgress(onProgress)
 
-    def _run_mhub_udocker(self, model: 'Model', gpu: bool, input_dir: str, output_dir: str, onProgress: Callable[[float, str], None], onStop: Callable[[int, str, bool, bool], None], timeout: int = 600):
+    def _run_mhub_udocker(self, model: 'Model', gpu: bool, input_dir: str, output_dir: str, onProgress: Callable[[float, str], None], onStop: Callable[[int, str, bool, bool], None], timeout: int = 600, workflow: str = "default"):
         
         # get executable
         udocker_exec = self.getUDockerExecutable()
+        image_name = f"mhubai/{model.name}:latest"
         
-        # callback wrapper
-        def _on_progress(cmd: ProcessChain.CMD, time: float):
-            #print(f"Command {cmd.name} running {time} seconds")
-            onProgress(float(time), "")
+        # callback wrapper (only the container output is forwarded, the other steps just keep the progress alive)
+        def _on_progress(node: ProcessGraph.Node, time: float, stdout: str):
+            onProgress(float(time), stdout if node.name == "run" else "")
             
-        def _on_stop(success: bool):
-            print(f"Command chain stopped with success: {success}")
-            onStop(int(success), "", False, False)
+        def _on_stop(returncode: int, stdout: str, timedout: bool, killed: bool):
+            print(f"Process graph stopped with return code {returncode}. Timedout [{timedout}] Killed [{killed}]")
+            for node in pg.nodes.values():
+                print(f"  {node.name}: {node.state} after {node.attempts} attempt(s), {node.duration or 0:.1f}s")
+            onStop(returncode, stdout, timedout, killed)
         
-        # initialize async processing chain
-        pc = ProcessChain()
-        pc.onStop(_on_stop)
-        pc.onProgress(_on_progress)
+        # only pass a workflow to the container if it differs from the image's default
+        workflow_args = ["--workflow", workflow] if workflow != "default" else []
+        
+        # initialize async process graph
+        pg = ProcessGraph(trace=RunTrace.get(output_dir))
+        pg.onStop(_on_stop)
+        pg.onProgress(_on_progress)
 
         # setup gpu if required        
         if gpu:
             print("udocker with gpu")
             
-            # check if image is already available or optionally pull image
+            # check if image is already available or optionally pull image (registry hiccups are retried)
             images = self.getLocalImages("udocker", cached=True)
             print(images)
-            if f"mhubai/{model.name}:latest" not in images:
-                pull_cmd = [udocker_exec, "pull", f"mhubai/{model.name}:latest"]
-                pc.add(pull_cmd, name="Pull image")
+            pulled = []
+            if image_name not in images:
+                pg.add("pull", [udocker_exec, "pull", image_name], retries=2, retry_delay=10, data={"image_name": image_name, "operation": "update"})
+                pulled = ["pull"]
             
             # create container
-            create_cmd = [udocker_exec, "create", f"--name={model.name}", f"mhubai/{model.name}:latest"]
+            pg.add("create", [udocker_exec, "create", f"--name={model.name}", image_name], after=pulled)
         
             # setup container
-            setup_cmd = [udocker_exec, "setup", "--nvidia", "--force", model.name]
+            pg.add("setup", [udocker_exec, "setup", "--nvidia", "--force", model.name], after=["create"])
             
             # run container
             run_cmd = [udocker_exec, "run", "--rm", "-t", 
                        "-v", f"{input_dir}:/app/data/input_data:ro", 
                        "-v", f"{output_dir}:/app/data/output_data:rw", 
-                       model.name]
-        
-            # processing chain
-            pc.add(create_cmd, name="Create container")
-            pc.add(setup_cmd, name="Setup container")
-            pc.add(run_cmd, name="Run container")
+                       model.name] + workflow_args
+            pg.add("run", run_cmd, after=["setup"], timeout=timeout, data={"image_name": image_name, "operation": "run", "run_id": os.path.basename(os.path.normpath(output_dir))})
             
             # print execution plan
-            for cmd in pc.cmds:
-                print(cmd.name, cmd.cmd)
+            for node in pg.nodes.values():
+                print(node.name, node.after, node.cmd)
         
         else:
             
@@ -2281,43 +5938,309 @@ class MHubRunnerLogic(ScriptedLoadableModuleLogic):
             run_cmd = [udocker_exec, "run", "--rm", "-t", 
                        "-v", f"{input_dir}:/app/data/input_data:ro", 
                        "-v", f"{output_dir}:/app/data/output_data:rw", 
-                       f"mhubai/{model.name}:latest"]
+                       image_name] + workflow_args
+            pg.add("run", run_cmd, timeout=timeout, data={"image_name": image_name, "operation": "run", "run_id": os.path.basename(os.path.normpath(output_dir))})
+            
+        # run async
+        pg.start()
+                
+    def _run_mhub_ssh(self, model: 'Model', gpus: Optional[List[int]], input_dir: str, output_dir: str, onProgress: Callable[[float, str], None], onStop: Callable[[int, str, bool, bool], None], timeout: int = 600, input_files: Optional[Dict[str, str]] = None, workflow: str = "default", hostid: Optional[str] = None):
+        import posixpath
+        hostid = hostid or self._sshHost
+        assert hostid is not None, "No ssh host selected"
         
-            # processing chain
-            pc.add(run_cmd, name="Run container")
-
+        # remote host
+        host = SSHHost(hostid)
+        
+        # remote run directory mirrors the local run directory name
+        runid = os.path.basename(os.path.normpath(output_dir))
+        remote_run_dir = posixpath.join(host.base_dir, "runs", runid)
+        remote_input_dir = posixpath.join(remote_run_dir, "input")
+        remote_output_dir = posixpath.join(remote_run_dir, "output")
+        
+        # named container, so it can be stopped when the run is cancelled and found again after a restart
+        container_name = self.getContainerName(output_dir)
+        
+        # run mhub on the host (the container keeps running if the connection drops, it is removed once its results are downloaded)
+        run_cmd = [
+            "docker", "run", "-t", "--sig-proxy=false", "--network=none", "--name", container_name
+        ] + self._docker_gpu_args(gpus) + [
+            "-v", f"{remote_input_dir}:/app/data/input_data:ro",
+            "-v", f"{remote_output_dir}:/app/data/output_data:rw",
+            f"mhubai/{model.name}:latest",
+            "--workflow",
+            workflow,
+            "--print"
+        ]
+        
+        # files of the staged input directory (no instance UIDs) are identified by content, so an edited 
+        # volume that keeps its name is transferred again (hashed in the worker thread)
+        hash_index = self.getHashIndex() if input_files is None else None
+        
+        # stage timings
+        trace = RunTrace.get(output_dir)
+        
+        # remote workflow (runs in a background thread)
+        def work(stdout, cancel: threading.Event) -> int:
+            try:
+                
+                # delta transfer into the host-side series cache
+                files = input_files
+                if hash_index is not None:
+                    paths = [entry.path for entry in os.scandir(input_dir) if entry.is_file()]
+                    files = {content_hash: path for path, content_hash in hash_index.hashFiles(paths).items()}
+                transfer = SeriesTransfer(host, files or {})
+                
+                # upload missing files and link the cached series into the run's input directory
+                with trace.span("transfer", "stage", host=host.hostid, files=len(transfer.files)):
+                    host.exec(["mkdir", "-p", remote_output_dir])
+                    transfer.transfer(stdout, cancel)
+                    if cancel.is_set():
+                        return -1
+                    transfer.linkInto(remote_input_dir)
+                
+                # run
+                with trace.span("container", "process", host=host.hostid):
+                    returncode = host.stream(run_cmd, stdout, cancel)
+                if cancel.is_set():
+                    removed = host.stopContainer(container_name, ProgressObserver.grace_period)
+                    stdout.write(f"\nContainer {container_name} on {host.hostid} " + ("stopped and removed." if removed else "could not be confirmed removed.") + "\n")
+                    return returncode
+                
+                # download
+                stdout.write(f"\nDownloading results from {host.hostid}:{remote_output_dir}\n")
+                with trace.span("download", "stage", host=host.hostid):
+                    host.download(remote_output_dir, output_dir)
+                
+                return returncode
             
+            finally:
+                self._cleanupRemoteRun(host, container_name, remote_run_dir, stdout)
+        
+        # callback wrapper
+        def _on_stop(returncode: int, stdout: str, timedout: bool, killed: bool):
+            print(f"Remote run on {host.hostid} stopped with return code {returncode}. Timedout [{timedout}] Killed [{killed}]")
+            onStop(returncode, stdout, timedout, killed)
+        
+        # run async
+        po = ThreadProgressObserver(work, ["ssh", host.hostid] + run_cmd, frequency=2, timeout=timeout, data={"image_name": f"mhubai/{model.name}:latest", "operation": "run", "run_id": runid, "host": host.hostid, "container": container_name})
+        po.onStop(_on_stop)
+        po.onProgress(onProgress)
+                
+    def _attach_mhub_docker(self, container_name: str, image_name: str, output_dir: str, onProgress: Optional[Callable[[float, str], None]], onStop: Callable[[int, str, bool, bool], None], timeout: int = 0):
+        
+        # get executable
+        docker_exec = self.getDockerExecutable()
+        assert docker_exec is not None, "Docker executable not found"
+        
+        # containers that are gone cannot be recovered (e.g. removed outside of slicer)
+        assert ContainerProgressObserver.inspect(docker_exec, container_name) is not None, f"Container {container_name} no longer exists"
+        
+        # follow the container output (from the start), the observer collects the exit code and removes the container
+        logs_cmd = [docker_exec, "logs", "-f", container_name]
+        
+        # callback wrapper
+        def _on_stop(returncode: int, stdout: str, timedout: bool, killed: bool):
+            print(f"Reattached container {container_name} stopped with return code {returncode}. Timedout [{timedout}] Killed [{killed}]")
+            onStop(returncode, stdout, timedout, killed)
+        
         # run async
-        pc.start()
+        po = ContainerProgressObserver(logs_cmd, container_name, docker_exec, frequency=2, timeout=timeout, data={"image_name": image_name, "operation": "run", "run_id": os.path.basename(os.path.normpath(output_dir)), "container": container_name})
+        po.onStop(_on_stop)
+        if onProgress is not None:
+            po.onProgress(onProgress)
+            
+    def _cleanupRemoteRun(self, host: 'SSHHost', container_name: str, remote_run_dir: str, stdout) -> None:
+        
+        # a failing cleanup (e.g. the connection dropped) must not replace the result of the run
+        try:
+            host.exec(["docker", "rm", "-f", container_name])
+            host.exec(["rm", "-rf", remote_run_dir])
+        except Exception as e:
+            print(f"Failed to clean up run {container_name} on {host.hostid}: {e}")
+            stdout.write(f"\nFailed to clean up {container_name} and {remote_run_dir} on {host.hostid}: {e}\n")
+    
+    def _attach_mhub_ssh(self, hostid: str, container_name: str, image_name: str, output_dir: str, onProgress: Optional[Callable[[float, str], None]], onStop: Callable[[int, str, bool, bool], None], timeout: int = 0):
+        import posixpath
+        
+        # remote host and run directory (see _run_mhub_ssh)
+        host = SSHHost(hostid)
+        runid = os.path.basename(os.path.normpath(output_dir))
+        remote_run_dir = posixpath.join(host.base_dir, "runs", runid)
+        remote_output_dir = posixpath.join(remote_run_dir, "output")
+        
+        # stage timings
+        trace = RunTrace.get(output_dir)
+        
+        # remote workflow (runs in a background thread)
+        def work(stdout, cancel: threading.Event) -> int:
+            try:
+                
+                # containers that are gone cannot be recovered
+                if host.inspectContainer(container_name) is None:
+                    stdout.write(f"Container {container_name} no longer exists on {host.hostid}.\n")
+                    return -1
                 
+                # follow the container until it exits
+                with trace.span("container", "process", host=host.hostid, reattached=True):
+                    host.stream(["docker", "logs", "-f", container_name], stdout, cancel)
+                if cancel.is_set():
+                    removed = host.stopContainer(container_name, ProgressObserver.grace_period)
+                    stdout.write(f"\nContainer {container_name} on {host.hostid} " + ("stopped and removed." if removed else "could not be confirmed removed.") + "\n")
+                    return -1
+                state = host.inspectContainer(container_name)
+                returncode = state[1] if state is not None else -1
+                
+                # download
+                stdout.write(f"\nDownloading results from {host.hostid}:{remote_output_dir}\n")
+                with trace.span("download", "stage", host=host.hostid):
+                    host.download(remote_output_dir, output_dir)
+                
+                return returncode
+            
+            finally:
+                self._cleanupRemoteRun(host, container_name, remote_run_dir, stdout)
+        
+        # callback wrapper
+        def _on_stop(returncode: int, stdout: str, timedout: bool, killed: bool):
+            print(f"Reattached remote run on {host.hostid} stopped with return code {returncode}. Timedout [{timedout}] Killed [{killed}]")
+            onStop(returncode, stdout, timedout, killed)
+        
+        # run async
+        po = ThreadProgressObserver(work, ["ssh", host.hostid, "docker", "logs", "-f", container_name], frequency=2, timeout=timeout, data={"image_name": image_name, "operation": "run", "run_id": runid, "host": host.hostid, "container": container_name})
+        po.onStop(_on_stop)
+        if onProgress is not None:
+            po.onProgress(onProgress)
+    
     def run_mhub(self, 
                  model: 'Model', 
-                 backend: Literal["docker", "udocker"],
+                 backend: Literal["docker", "udocker", "ssh"],
                  gpus: Optional[List[int]], 
                  input_dir: str, 
                  output_dir: str, 
                  onProgress: Optional[Callable[[float, str], None]] = None,
                  onStop: Optional[Callable[[int, str, bool, bool], None]] = None, 
-                 timeout: int = 1200):
+                 timeout: Optional[int] = None,
+                 input_files: Optional[Dict[str, str]] = None,
+                 workflow: str = "default",
+                 input_hash: Optional[str] = None,
+                 onStatus: Optional[Callable[[MHubProgress], None]] = None,
+                 onTelemetry: Optional[Callable[[TelemetrySample], None]] = None,
+                 hostid: Optional[str] = None) -> bool:
+        """
+        Run a model asynchronously. Local runs wait until the resource budget admits them, 
+        returns False if the run was queued. Remote runs use the given or the selected ssh host.
+        """
+        
+        # run index of the runs directory (runs are stored under <runs_dir>/<run_id>)
+        history = self.getRunHistory(os.path.dirname(os.path.normpath(output_dir)))
+        run_id = os.path.basename(os.path.normpath(output_dir))
+        input_size = self.getInputSize(input_dir, input_files)
+        hostid = (hostid or self._sshHost) if backend == "ssh" else None
+        
+        # learn the timeout from previous runs unless it is given
+        if timeout is None:
+            timeout = self.estimateRunTimeout(model, backend, gpus, input_size, history=history).timeout
+        
+        # journal the run with everything needed to resubmit it if slicer is closed before it starts
+        history.queue(run_id, model.name, input_hash or "", backend, gpus, workflow, input_size, input_dir, input_files, timeout, hostid)
+        
+        # the whole backend run is one span, the first output marks the end of the container startup
+        trace = RunTrace.get(output_dir)
+        span = [0]
+        first_output = [False]
+        
+        # resource usage of the container (sampled once the container is up)
+        telemetry: List[ContainerTelemetry] = []
+        
+        def _on_sample(sample: TelemetrySample):
+            trace.counter("cpu", "telemetry", percent=sample.cpu_percent)
+            trace.counter("memory", "telemetry", mb=sample.memory_mb, gpu_mb=sample.gpu_memory_mb or 0)
+            if onTelemetry is not None and callable(onTelemetry):
+                onTelemetry(sample)
+        
+        # structured progress from the mhub output, module timings of previous runs for the eta
+        parser = MHubProgressParser(history.getExpectedModuleTimings(model.name, workflow, backend) or history.getExpectedModuleTimings(model.name, workflow))
                 
         # define callbacks
         def _on_progress(time: float, stdout: str):
             
+            # container started
+            if stdout and not first_output[0]:
+                first_output[0] = True
+                trace.instant("first output", "backend", seconds=time)
+                
+                # docker stats are only available for local docker containers
+                if backend == "docker":
+                    docker_exec = self.getDockerExecutable()
+                    assert docker_exec is not None
+                    telemetry.append(ContainerTelemetry(docker_exec, self.getContainerName(output_dir), gpus))
+                    telemetry[0].onSample(_on_sample)
+                
+            # module progress
+            for module, started, seconds in parser.feed(stdout or ""):
+                trace.add(module, "module", started, seconds)
+            if onStatus is not None and callable(onStatus):
+                onStatus(parser.progress)
+            
             # invoke onProgress callback
             if onProgress is not None and callable(onProgress): 
                 onProgress(time, stdout)
                 
         def _on_stop(returncode: int, stdout: str, timedout: bool, killed: bool):
             
+            # record result
+            for module, started, seconds in parser.finish():
+                trace.add(module, "module", started, seconds)
+            trace.end(span[0], returncode=returncode, timedout=timedout, killed=killed)
+            trace.save()
+            history.finish(run_id, returncode)
+            history.setModuleTimings(run_id, parser.timings)
+            
+            # resource usage
+            for t in telemetry:
+                t.stop()
+                history.setTelemetry(run_id, t.summary())
+            
+            # hand the resources to the next queued run
+            ResourceManager.release(run_id)
+            
             # invoke onStop callback
             if onStop is not None and callable(onStop): 
                 onStop(returncode, stdout, timedout, killed)
         
-        # run backend
-        if backend == "docker":
-            self._run_mhub_docker(model, gpus, input_dir, output_dir, _on_progress, _on_stop, timeout)
-        elif backend == "udocker":
-            self._run_mhub_udocker(model, gpus is not None, input_dir, output_dir, _on_progress, _on_stop, timeout)
+        # resource limits of the container (remote hosts manage their own resources)
+        profile = ResourceManager.getProfile(model.name, gpus is not None)
+        limits = ResourceManager.getDockerArgs(profile) if backend == "docker" else []
+        
+        # run backend once admitted
+        queued = trace.begin("queued", "backend", cpus=profile.cpus, memory_mb=profile.memory_mb)
+        
+        def _start():
+            trace.end(queued)
+            history.start(run_id, self.getContainerName(output_dir) if backend in ["docker", "ssh"] else None)
+            span[0] = trace.begin("run", "backend", model=model.name, backend=backend, workflow=workflow, gpus=RunHistory._gpus(gpus))
+            
+            if backend == "docker":
+                self._run_mhub_docker(model, gpus, input_dir, output_dir, _on_progress, _on_stop, timeout, workflow, limits)
+            elif backend == "udocker":
+                self._run_mhub_udocker(model, gpus is not None, input_dir, output_dir, _on_progress, _on_stop, timeout, workflow)
+            elif backend == "ssh":
+                self._run_mhub_ssh(model, gpus, input_dir, output_dir, _on_progress, _on_stop, timeout, input_files, workflow, hostid)
+                
+        def _cancel():
+            trace.end(queued, cancelled=True)
+            trace.save()
+            history.finish(run_id, -1, "cancelled")
+            if onStop is not None and callable(onStop):
+                onStop(-1, "Cancelled while waiting for resources.", False, True)
+        
+        # remote runs are not limited by the local budget
+        if backend == "ssh":
+            _start()
+            return True
+        
+        return ResourceManager.submit(run_id, profile, _start, _cancel)
 
 
     def remove_image(self, image_name, on_stop: Optional[Callable[[int, str, bool, bool], None]] = None, timeout: int = 0):
@@ -2332,26 +6255,43 @@ class MHubRunnerLogic(ScriptedLoadableModuleLogic):
         po = ProgressObserver(cmd, frequency=2, timeout=timeout, data={"image_name": image_name, "operation": "remove"})
         if on_stop: po.onStop(on_stop)
 
-    def update_image(self, image_name, on_stop: Optional[Callable[[int, str, bool, bool], None]] = None, timeout: int = 0):
-        
-        # get docker executable
-        docker_exec = self.getDockerExecutable()
-        
-        # remove image cli command
-        cmd = [docker_exec, "pull", image_name]
+    def update_image(self, image_name, on_stop: Optional[Callable[[int, str, bool, bool], None]] = None, timeout: int = 0, backend: str = "docker", speculative: bool = False) -> bool:
+        """
+        Pull an image. A pull of the same image that is in flight already is not repeated, all callers are notified 
+        when it completes. Speculative pulls (see prefetchRun) can be cancelled until a caller that is not speculative 
+        attaches to them. Returns False if the call attached to a pull in flight.
+        """
         
-        # run command in bg
-        po = ProgressObserver(cmd, frequency=2, timeout=timeout, data={"image_name": image_name, "operation": "update"})
-        if on_stop: po.onStop(on_stop)
+        # a run or the user waits for the pull now
+        if not speculative:
+            for task in ProgressObserver.getTasksWhere(operation="update", image_name=image_name, backend=backend, speculative=True):
+                assert task.data is not None
+                task.data["speculative"] = False
         
-        # log output (DEBUG ONLY)
-        def onProgress(t: float, stdout: str):
-            print(f">> __pull image ({t})__")
-            for line in stdout.split("\n"):
-                print(f">> {line}")
-                        
-        po.onProgress(onProgress)
+        def start(done: Callable[[int, str, bool, bool], None]):
+            
+            # pull image cli command
+            cmd = self._pull_cmd(backend, image_name)
+            
+            # local images changed
+            def on_pulled(returncode: int, stdout: str, timedout: bool, killed: bool):
+                if hasattr(self, "_images_cache"):
+                    self._images_cache.pop(backend, None)
+                done(returncode, stdout, timedout, killed)
+            
+            # run command in bg
+            po = ProgressObserver(cmd, frequency=2, timeout=timeout, data={"image_name": image_name, "operation": "update", "backend": backend, "speculative": speculative})
+            po.onStop(on_pulled)
+            
+            # log output (DEBUG ONLY)
+            def onProgress(t: float, stdout: str):
+                print(f">> __pull image ({t})__")
+                for line in stdout.split("\n"):
+                    print(f">> {line}")
+                            
+            po.onProgress(onProgress)
         
+        return SingleFlight.run(f"pull:{backend}:{image_name}", start, on_stop)
 
     def scanDirectoryForFilesWithExtension(self, local_dir: str, extension: Union[str, list[str]] = ".seg.dcm") -> List[str]:
         """
@@ -2376,10 +6316,8 @@ class MHubRunnerLogic(ScriptedLoadableModuleLogic):
         # add files to database if operation is not 'reference'
         copyFile = operation in ["copy", "move"]
        
-        # import files
-        for file in files:
-            indexer.addFile(slicer.dicomDatabase, os.path.abspath(file), copyFile)
-            slicer.app.processEvents()
+        # import all files in a single call
+        indexer.addListOfFiles(slicer.dicomDatabase, [os.path.abspath(file) for file in files], copyFile)
         
         # wait for the indexing to finish
         indexer.waitForImportFinished()
@@ -2401,6 +6339,352 @@ class MHubRunnerLogic(ScriptedLoadableModuleLogic):
         # import files
         for loadable in loadables:
             importer.load(loadable)
+            
+    def importSegmentationsAsync(self, files: List[str], onProgress: Optional[Callable[[str, int, int], None]] = None, onStop: Optional[Callable[[Dict[str, float]], None]] = None, load: bool = True) -> 'SegmentationImportPipeline':
+        """
+        Add DICOM SEG files to the database and load them into the scene without blocking the UI.
+        """
+        pipeline = SegmentationImportPipeline(files, operation="copy", load=load)
+        if onProgress: pipeline.onProgress(onProgress)
+        if onStop: pipeline.onStop(onStop)
+        pipeline.start()
+        return pipeline
+    
+    def importLabelmaps(self, files: List[str]) -> list:
+        """
+        Load NIfTI / NRRD label maps directly into segmentation nodes.
+        """
+        nodes = []
+        for file in files:
+            
+            # the segmentation reader loads the label map straight into the segmentation node
+            node = slicer.util.loadSegmentation(file)
+            if node is None:
+                print(f"Failed to load label map {file}")
+                continue
+            
+            # name the node after the file instead of the reader's default
+            node.SetName(os.path.basename(file).split(".")[0])
+            nodes.append(node)
+            
+        return nodes
+
+#
+# Headless batch runs
+#
+
+@dataclass
+class BatchJob:
+    series: str                                     # series id of the manifest
+    model: str
+    status: Literal["pending", "running", "importing", "done", "failed"] = "pending"
+    run_id: Optional[str] = None
+    output_dir: Optional[str] = None
+    returncode: Optional[int] = None
+    timedout: bool = False
+    killed: bool = False
+    started: Optional[float] = None
+    duration: Optional[float] = None
+    output_files: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+class BatchRunner:
+    """
+    Runs every series of a manifest through every model (or an explicit job list) with the same logic as the
+    module widget. Up to `parallel` jobs are staged and started at a time, the resource budget still decides
+    when they actually run. Progress is driven by the Qt event loop, headless Slicer has to keep processing 
+    events until done is set (see Resources/Scripts/MHubBatch.py).
+    
+    Manifest (json):
+    {
+        "runs_dir": "/data/mhub_runs",
+        "backend": "docker",                        # docker, udocker or ssh
+        "ssh_host": null,                           # host (ssh config name or user@host:port) for the ssh backend
+        "gpus": null,                               # null (cpu), "all" or a list of gpu indices
+        "output_format": "DICOMSEG",                # DICOMSEG, NIFTI or NRRD
+        "parallel": 2,
+        "import": false,                            # add DICOM SEG results to the dicom database
+        "series": [
+            {"id": "case1", "path": "/data/case1/ct"},      # dicom directory or volume file
+            {"id": "case2", "series_uid": "1.2.3.4"}        # series of the dicom database
+        ],
+        "models": ["lungmask"],
+        "jobs": [{"series": "case1", "model": "lungmask"}]  # optional, default: every series with every model
+    }
+    """
+    
+    def __init__(self, logic: 'MHubRunnerLogic', manifest: Dict[str, Any]):
+        self.logic = logic
+        self.manifest = manifest
+        self.runs_dir = os.path.abspath(manifest["runs_dir"])
+        self.backend = manifest.get("backend", "docker")
+        self.parallel = max(int(manifest.get("parallel", 1)), 1)
+        self.output_format = OutputFormat[manifest.get("output_format", "DICOMSEG").upper()]
+        self.import_results = bool(manifest.get("import", False))
+        self.series = {s["id"]: s for s in manifest["series"]}
+        
+        # gpus
+        gpus = manifest.get("gpus")
+        self.gpus = logic.selectGpus(gpus is not None, None if gpus == "all" else gpus, self.backend)
+        
+        # jobs
+        jobs = manifest.get("jobs") or [{"series": s, "model": m} for s in self.series for m in manifest["models"]]
+        self.jobs = [BatchJob(j["series"], j["model"]) for j in jobs]
+        
+        # state
+        self.done = False
+        self.started = 0.0
+        self._nodes: Dict[str, Any] = {}
+        self._active = 0
+        self._scheduling = False
+        
+        # runs of an interrupted batch (see resume), by run id
+        self._recovering: Dict[str, 'BatchJob'] = {}
+        self._recovered: List[tuple['BatchJob', RunRecord]] = []
+        
+        # callbacks
+        self._onProgress: Optional[Callable[['BatchJob'], None]] = None
+        self._onStop: Optional[Callable[[Dict[str, Any]], None]] = None
+        
+    @staticmethod
+    def load(file: str) -> Dict[str, Any]:
+        import json
+        with open(file, 'r') as f:
+            return json.load(f)
+    
+    def resume(self, report: Dict[str, Any]) -> None:
+        """
+        Continue the batch of an earlier report (e.g. Slicer was closed or crashed during the batch). Finished jobs
+        are kept, jobs whose run is journaled as queued or running wait for it (see MHubRunnerLogic.recoverRuns), 
+        runs that finished meanwhile are collected and all other jobs (including lost runs) run again.
+        Call before start().
+        """
+        history = self.logic.getRunHistory(self.runs_dir)
+        previous = {(j["series"], j["model"]): j for j in report.get("jobs", [])}
+        self.started = report.get("started", 0.0)
+        
+        for index, job in enumerate(self.jobs):
+            state = previous.get((job.series, job.model))
+            if state is None:
+                continue
+            
+            # finished jobs
+            if state["status"] in ["done", "failed"]:
+                self.jobs[index] = BatchJob(**state)
+                continue
+            
+            # jobs without a recorded run start over
+            record = history.get(state["run_id"]) if state.get("run_id") else None
+            if record is None or record.status in ["lost", "cancelled"]:
+                continue
+            
+            job.status, job.run_id, job.output_dir, job.started = "running", record.run_id, os.path.join(self.runs_dir, record.run_id), state.get("started")
+            self._active += 1
+            if record.status in ["queued", "running"]:
+                self._recovering[record.run_id] = job
+            else:
+                self._recovered.append((job, record))
+    
+    def start(self) -> None:
+        import time
+        self.started = self.started or time.time()
+        
+        if self.backend == "ssh":
+            self.logic.setSshHost(self.manifest.get("ssh_host"))
+        
+        # runs of the interrupted batch
+        if self._recovering:
+            self.logic.recoverRuns(self.runs_dir, onStop=self._onRecovered)
+        for job, record in self._recovered:
+            self._onRecovered(record, job)
+        self._recovered = []
+        
+        self._next()
+        
+    @property
+    def success(self) -> bool:
+        return self.done and all(j.status == "done" and j.returncode == 0 for j in self.jobs)
+    
+    def report(self) -> Dict[str, Any]:
+        import time
+        from dataclasses import asdict
+        return {
+            "manifest": self.manifest,
+            "started": self.started,
+            "duration": time.time() - self.started,
+            "done": self.done,
+            "succeeded": len([j for j in self.jobs if j.status == "done" and j.returncode == 0]),
+            "failed": len([j for j in self.jobs if j.status == "failed" or (j.status == "done" and j.returncode != 0)]),
+            "jobs": [asdict(j) for j in self.jobs],
+        }
+    
+    def writeReport(self, file: str) -> None:
+        import json
+        with open(file + ".tmp", 'w') as f:
+            json.dump(self.report(), f, indent=2)
+        os.replace(file + ".tmp", file)
+        
+    def onProgress(self, callback: Callable[['BatchJob'], None]):
+        self._onProgress = callback
+        
+    def onStop(self, callback: Callable[[Dict[str, Any]], None]):
+        self._onStop = callback
+    
+    def _next(self) -> None:
+        
+        # a job that fails to start finishes (and schedules) synchronously, the outer call continues
+        if self._scheduling:
+            return
+        
+        # start the next jobs (the pending jobs change with every start)
+        self._scheduling = True
+        try:
+            while self._active < self.parallel and (job := next((j for j in self.jobs if j.status == "pending"), None)):
+                self._startJob(job)
+        finally:
+            self._scheduling = False
+            
+        # all jobs finished
+        if not any(j.status == "pending" for j in self.jobs) and self._active == 0 and not self.done:
+            self.done = True
+            print(f"Batch finished: {self.report()['succeeded']} of {len(self.jobs)} jobs succeeded")
+            if self._onStop:
+                self._onStop(self.report())
+    
+    def _startJob(self, job: 'BatchJob') -> None:
+        import time
+        
+        try:
+            model = self.logic.getModel(job.model)
+            node = self._loadSeries(job.series)
+            ctx = self.logic.prepareRun(node, model, self.backend, self.gpus, self.runs_dir, self.output_format)
+        except Exception as e:
+            print(f"Failed to prepare {job.model} on {job.series}: {e}")
+            job.status, job.error = "failed", str(e)
+            self._releaseSeries(job.series)
+            self._update(job)
+            return
+            
+        job.status, job.run_id, job.output_dir, job.started = "running", ctx.run_id, ctx.output_dir, time.time()
+        self._active += 1
+        self._update(job)
+        
+        def on_stop(returncode: int, stdout: str, timedout: bool, killed: bool):
+            self._collectJob(job, ctx, returncode, timedout, killed)
+            
+        try:
+            self.logic.startRun(ctx, onStop=on_stop)
+        except Exception as e:
+            print(f"Failed to start {job.model} on {job.series}: {e}")
+            job.error = str(e)
+            self._finishJob(job, failed=True)
+    
+    def _collectJob(self, job: 'BatchJob', ctx: RunContext, returncode: int, timedout: bool = False, killed: bool = False) -> None:
+        import time
+        
+        # duplicate jobs share the run of the first one (see MHubRunnerLogic.startRun)
+        job.run_id, job.output_dir = ctx.run_id, ctx.output_dir
+        job.returncode, job.timedout, job.killed = returncode, timedout, killed
+        job.duration = time.time() - (job.started or time.time())
+        job.output_files = [os.path.relpath(f, ctx.output_dir) for f in self.logic.scanDirectoryForFilesWithExtension(ctx.output_dir, extension=[])]
+        
+        # import results in the background (the next job can start already)
+        if self.import_results and returncode == 0 and not ctx.attached and self.logic.importRunResults(ctx, onStop=lambda timings: self._finishJob(job), load=False):
+            job.status = "importing"
+            self._update(job)
+        else:
+            self._finishJob(job)
+    
+    def _onRecovered(self, record: RunRecord, job: Optional['BatchJob'] = None) -> None:
+        job = job or self._recovering.pop(record.run_id, None)
+        if job is None:
+            return
+        
+        # lost runs start over
+        if record.status == "lost":
+            job.status, job.run_id, job.output_dir, job.started = "pending", None, None, None
+            self._active -= 1
+            self._update(job)
+            self._next()
+            return
+        
+        try:
+            ctx = RunContext(
+                run_id=record.run_id,
+                model=self.logic.getModel(record.model),
+                backend=record.backend or self.backend,
+                gpus=RunHistory._parseGpus(record.gpus),
+                runs_dir=self.runs_dir,
+                input_dir=record.input_dir or "",
+                output_dir=os.path.join(self.runs_dir, record.run_id),
+                workflow=record.workflow or "default",
+                output_format=self.output_format,
+                input_hash=record.input_hash or ""
+            )
+        except Exception as e:
+            print(f"Failed to collect {job.model} on {job.series}: {e}")
+            job.error = str(e)
+            self._finishJob(job, failed=True)
+            return
+        
+        self._collectJob(job, ctx, record.returncode if record.returncode is not None else -1)
+        
+    def _finishJob(self, job: 'BatchJob', failed: bool = False) -> None:
+        job.status = "failed" if failed else "done"
+        self._active -= 1
+        self._releaseSeries(job.series)
+        self._update(job)
+        self._next()
+        
+    def _update(self, job: 'BatchJob') -> None:
+        print(f"[{job.status}] {job.model} on {job.series}" + (f" ({job.run_id})" if job.run_id else "") + (f": {job.error}" if job.error else ""))
+        if self._onProgress:
+            self._onProgress(job)
+    
+    def _loadSeries(self, series_id: str):
+        """
+        Load a series of the manifest (once, shared by all its jobs).
+        """
+        if series_id in self._nodes:
+            return self._nodes[series_id]
+        
+        from DICOMLib import DICOMUtils
+        series = self.series[series_id]
+        
+        if "series_uid" in series:
+            
+            # series of the dicom database
+            node_ids = DICOMUtils.loadSeriesByUID([series["series_uid"]])
+        
+        elif os.path.isdir(series["path"]):
+            
+            # dicom directory: index into the dicom database, then load the (first) series found
+            indexer = ctk.ctkDICOMIndexer()
+            indexer.addDirectory(slicer.dicomDatabase, os.path.abspath(series["path"]))
+            indexer.waitForImportFinished()
+            files = self.logic.scanDirectoryForFilesWithExtension(series["path"], extension=[])
+            series_uids = [uid for uid in dict.fromkeys(slicer.dicomDatabase.fileValue(os.path.abspath(f), "0020,000E") for f in files) if uid]
+            assert series_uids, f"No dicom series found in {series['path']}"
+            node_ids = DICOMUtils.loadSeriesByUID(series_uids[:1])
+            
+        else:
+            
+            # volume file (nrrd, nifti, ...)
+            node_ids = [slicer.util.loadVolume(series["path"]).GetID()]
+        
+        # the scalar volume of the series
+        nodes = [slicer.mrmlScene.GetNodeByID(i) for i in node_ids]
+        node = next((n for n in nodes if n is not None and n.IsA("vtkMRMLScalarVolumeNode")), None)
+        assert node is not None, f"Series {series_id} could not be loaded as a volume"
+        
+        self._nodes[series_id] = node
+        return node
+        
+    def _releaseSeries(self, series_id: str) -> None:
+        
+        # remove the volume from the scene once no job needs it anymore
+        if series_id in self._nodes and not any(j.series == series_id and j.status in ["pending", "running", "importing"] for j in self.jobs):
+            slicer.mrmlScene.RemoveNode(self._nodes.pop(series_id))
 
 #
 # MHubRunnerTest
@@ -2423,6 +6707,14 @@ class MHubRunnerTest(ScriptedLoadableModuleTest):
         """
         self.setUp()
         self.test_MHubRunner1()
+        self.setUp()
+        self.test_RunRetention()
+        self.setUp()
+        self.test_MHubProgressParser()
+        self.setUp()
+        self.test_RunHistoryOrphans()
+        self.setUp()
+        self.test_BatchRunnerFailingStart()
 
     def test_MHubRunner1(self):
         """ Ideally you should have several levels of tests.  At the lowest level
@@ -2449,24 +6741,167 @@ class MHubRunnerTest(ScriptedLoadableModuleTest):
         self.assertEqual(inputScalarRange[0], 0)
         self.assertEqual(inputScalarRange[1], 695)
 
-        outputVolume = slicer.mrmlScene.AddNewNodeByClass("vtkMRMLScalarVolumeNode")
-        threshold = 100
-
         # Test the module logic
 
         logic = MHubRunnerLogic()
+        export_dir = tempfile.mkdtemp()
+
+        # Test export of a node without dicom source (input of nrrd / nifti workflows): voxels and spacing are kept
+        for image_format in [OutputFormat.NRRD, OutputFormat.NIFTI]:
+            exportedVolume = slicer.util.loadVolume(logic.exportVolumeNode(inputVolume, export_dir, image_format))
+            self.assertTrue((slicer.util.arrayFromVolume(exportedVolume) == slicer.util.arrayFromVolume(inputVolume)).all())
+            for exported, expected in zip(exportedVolume.GetSpacing(), inputVolume.GetSpacing()):
+                self.assertAlmostEqual(exported, expected, places=4)
+            slicer.mrmlScene.RemoveNode(exportedVolume)
+
+        # Test input hash: stable until the voxels are modified
+        inputHash = logic.getNodeHash(inputVolume)
+        self.assertEqual(logic.getNodeHash(inputVolume), inputHash)
+        slicer.util.arrayFromVolume(inputVolume)[0, 0, 0] += 1
+        slicer.util.arrayFromVolumeModified(inputVolume)
+        self.assertNotEqual(logic.getNodeHash(inputVolume), inputHash)
+
+        # Runs on a stub container runtime are measured by Testing/Python/MHubRunnerBenchmark.py
+
+        self.delayDisplay('Test passed')
+
+    def test_RunRetention(self):
+        """ Expired runs are compacted (imported) or purged, archives are kept until they expire themselves,
+        queued, running and external runs are neither touched nor counted.
+        """
+        import io, time
+
+        self.delayDisplay("Starting the retention test")
+
+        # runs directory with three old imported runs, one old run that was not imported and a queued run
+        runs_dir = tempfile.mkdtemp()
+        history = RunHistory(runs_dir)
+        for i, run_id in enumerate(["imported1", "imported2", "imported3", "other", "queued"]):
+            os.makedirs(os.path.join(runs_dir, run_id))
+            with open(os.path.join(runs_dir, run_id, "output.json"), "w") as f:
+                f.write("{}")
+            history.queue(run_id, "model", "hash", "docker", None)
+            if run_id != "queued":
+                history.finish(run_id, 0)
+                history._execute("UPDATE runs SET started = ? WHERE run_id = ?", (time.time() - (60 + i) * 86400, run_id))
+            if run_id.startswith("imported"):
+                history.setImported(run_id)
+
+        # an old directory that was not created by a run (only indexed)
+        os.makedirs(os.path.join(runs_dir, "external", "data"))
+        history.reconcile()
+        history._execute("UPDATE runs SET started = ? WHERE run_id = 'external'", (time.time() - 90 * 86400,))
+        self.assertEqual(history.get("external").status, "external")
+        retention = RunRetention(history, RetentionPolicy())
+
+        # first pass: imported runs are compacted, the other run is purged, the external directory is kept
+        plan = {record.run_id: action for record, action in retention.plan()}
+        self.assertEqual(plan, {"imported1": "compact", "imported2": "compact", "imported3": "compact", "other": "purge"})
+        self.assertEqual(retention.apply(io.StringIO(), threading.Event()), 0)
+        self.assertEqual(sorted(r.run_id for r in history.list()), ["external", "imported1", "imported2", "imported3", "queued"])
+        self.assertTrue(os.path.isdir(os.path.join(runs_dir, "external", "data")))
+        self.assertTrue(all(os.path.isfile(os.path.join(retention.archive_dir, f"imported{i}.tar.gz")) for i in [1, 2, 3]))
+
+        # second pass: the archives are kept
+        self.assertEqual(retention.plan(), [])
+
+        # archives expire on their own
+        history._execute("UPDATE runs SET archived = ? WHERE run_id = 'imported1'", (int(time.time()) - 400 * 86400,))
+        self.assertEqual([(r.run_id, action) for r, action in retention.plan()], [("imported1", "purge")])
+
+        # only finished runs count towards the limit, the queued run is kept and does not push out the latest run
+        history.queue("latest", "model", "hash", "docker", None)
+        history.finish("latest", 0)
+        plan = RunRetention(history, RetentionPolicy(max_age_days=0, max_count=1, max_total_mb=0, archive_max_age_days=0)).plan()
+        self.assertEqual(plan, [])
+
+        self.delayDisplay('Test passed')
+
+    def test_MHubProgressParser(self):
+        """ Modules are only detected from the mhubio banner, other log lines naming a module are ignored.
+        """
+
+        self.delayDisplay("Starting the progress parser test")
+
+        parser = MHubProgressParser([("DicomImporter", 2.0), ("NNUnetRunner", 10.0), ("DataOrganizer", 1.0)])
+
+        # log lines that look like module headers
+        self.assertEqual(parser.feed("Running DicomImporter on 3 files\nStart NNUnetRunner\n"), [])
+        self.assertIsNone(parser.progress.module)
+
+        # banner of the first module (ansi colors and a progress bar redrawn with \r)
+        finished = parser.feed("\n--------------------------\nStart DicomImporter\nStart of series 1.2.3\n\x1b[32m 40%|####      | 4/10 [00:04<00:06]\r")
+        self.assertEqual(finished, [])
+        self.assertEqual((parser.progress.module, parser.progress.index, parser.progress.total), ("DicomImporter", 1, 3))
+        self.assertEqual((parser.progress.step, parser.progress.steps), (4, 10))
+
+        # module durations are taken from the done line
+        finished = parser.feed("Done in 1.5 seconds.\n\n--------------------------\nStart NNUnetRunner\nDone in 2e-05 seconds.\n")
+        self.assertEqual([(module, seconds) for module, _, seconds in finished], [("DicomImporter", 1.5), ("NNUnetRunner", 2e-05)])
+        self.assertEqual(parser.progress.index, 2)
+        self.assertEqual(parser.finish(), [])
+
+        self.delayDisplay('Test passed')
 
-        # Test algorithm with non-inverted threshold
-        logic.process(inputVolume, outputVolume, threshold, True)
-        outputScalarRange = outputVolume.GetImageData().GetScalarRange()
-        self.assertEqual(outputScalarRange[0], inputScalarRange[0])
-        self.assertEqual(outputScalarRange[1], threshold)
-
-        # Test algorithm with inverted threshold
-        logic.process(inputVolume, outputVolume, threshold, False)
-        outputScalarRange = outputVolume.GetImageData().GetScalarRange()
-        self.assertEqual(outputScalarRange[0], inputScalarRange[0])
-        self.assertEqual(outputScalarRange[1], inputScalarRange[1])
+    def test_RunHistoryOrphans(self):
+        """ Only runs of sessions that ended are orphans, runs of a live session sharing the runs directory are not.
+        """
+        import subprocess, sys
+
+        self.delayDisplay("Starting the orphaned runs test")
+
+        # a session that ended (its process is gone) and one that is alive (this process, another session)
+        ended = subprocess.Popen([sys.executable, "-c", "pass"])
+        ended.wait()
+        runs_dir = tempfile.mkdtemp()
+        for session, run_id in [(f"{ended.pid}-000000000000", "ended"), (f"{os.getpid()}-000000000000", "alive")]:
+            history = RunHistory(runs_dir)
+            history.session = session
+            history.queue(run_id, "model", "hash", "docker", None)
+            history.start(run_id, f"mhub_slicer_{run_id}")
+
+        # the current session only takes over the run of the session that ended
+        history = RunHistory(runs_dir)
+        self.assertEqual([r.run_id for r in history.getOrphans()], ["ended"])
+        self.assertTrue(RunHistory.isSessionAlive(f"{os.getpid()}-000000000000"))
+        self.assertFalse(RunHistory.isSessionAlive(None))
+
+        self.delayDisplay('Test passed')
+
+    def test_BatchRunnerFailingStart(self):
+        """ Jobs whose start fails synchronously finish right away, every job is still started exactly once.
+        """
+        from types import SimpleNamespace
+
+        self.delayDisplay("Starting the failing batch start test")
+
+        # a logic whose runs fail to start
+        starts = []
+        def start_run(ctx, onStop=None):
+            starts.append(ctx.run_id)
+            raise RuntimeError("start failed")
+        logic = MHubRunnerLogic()
+        logic.getModel = lambda name: name
+        logic.prepareRun = lambda node, model, *args: SimpleNamespace(run_id=f"run{len(starts)}", output_dir="")
+        logic.startRun = start_run
+
+        # 4 jobs, 2 in parallel
+        runs_dir = tempfile.mkdtemp()
+        manifest = {"runs_dir": runs_dir, "parallel": 2, "series": [{"id": f"case{i}", "path": ""} for i in range(4)], "models": ["model"]}
+        runner = BatchRunner(logic, manifest)
+        for series_id in runner.series:
+            runner._nodes[series_id] = slicer.mrmlScene.AddNewNodeByClass("vtkMRMLScalarVolumeNode")
+        updates, reports = [], []
+        runner.onProgress(lambda job: updates.append((job.series, job.status)))
+        runner.onStop(reports.append)
+        runner.start()
+
+        self.assertEqual(len(starts), 4)
+        self.assertEqual(sorted(updates), sorted([(f"case{i}", status) for i in range(4) for status in ["running", "failed"]]))
+        self.assertEqual([j.status for j in runner.jobs], ["failed"] * 4)
+        self.assertTrue(runner.done)
+        self.assertEqual(len(reports), 1)
+        self.assertEqual(runner._active, 0)
 
         self.delayDisplay('Test passed')
 
@@ -0,0 +1,55 @@
+"""
+Run MHub.ai models on a cohort without the Slicer user interface.
+
+    Slicer --no-main-window --python-script MHubBatch.py manifest.json [--report report.json] [--runs-dir DIR] [--parallel N] [--resume]
+
+The manifest format is documented in MHubRunner.BatchRunner. The report (json) is updated after
+every job, so partial results are available while the batch is running. The exit code is 0 if all
+jobs succeeded. With --resume, a batch that was interrupted (Slicer closed or crashed) continues from 
+its report: finished jobs are kept and containers that are still running are reattached.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import slicer
+from MHubRunner import MHubRunnerLogic, BatchRunner
+
+# arguments
+parser = argparse.ArgumentParser(description="Run MHub.ai models on a cohort (headless).")
+parser.add_argument("manifest", help="manifest file (json)")
+parser.add_argument("--report", help="report file (json), defaults to <runs_dir>/batch_<timestamp>.json")
+parser.add_argument("--runs-dir", help="overrides runs_dir of the manifest")
+parser.add_argument("--parallel", type=int, help="overrides parallel of the manifest")
+parser.add_argument("--resume", action="store_true", help="continue the batch of the report (requires --report)")
+args = parser.parse_args(sys.argv[1:])
+if args.resume and not args.report:
+    parser.error("--resume requires --report")
+
+# manifest
+manifest = BatchRunner.load(args.manifest)
+if args.runs_dir:
+    manifest["runs_dir"] = args.runs_dir
+if args.parallel:
+    manifest["parallel"] = args.parallel
+report_file = args.report or os.path.join(manifest["runs_dir"], f"batch_{time.strftime('%y.%m.%d-%H.%M.%S')}.json")
+
+# run
+logic = MHubRunnerLogic()
+runner = BatchRunner(logic, manifest)
+runner.onProgress(lambda job: runner.writeReport(report_file))
+if args.resume and os.path.exists(report_file):
+    runner.resume(BatchRunner.load(report_file))
+runner.start()
+
+# the observers are driven by qt timers, keep processing events until all jobs are done
+while not runner.done:
+    slicer.app.processEvents()
+    time.sleep(0.05)
+
+runner.writeReport(report_file)
+print(f"Report written to {report_file}")
+
+slicer.util.exit(0 if runner.success else 1)
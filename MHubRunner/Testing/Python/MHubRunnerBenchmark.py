@@ -0,0 +1,625 @@
+"""
+Benchmarks of the MHubRunner run pipeline. Containers are emulated by a stub docker / udocker runtime
+(mhub_stub_runtime.py) that replays the --print output of an MHub run, the input is a synthetic CT series,
+so no images or network are needed. Measured are staging, the monitoring overhead of runs, filtering and
+rendering of the model table, DICOM SEG import and rendering of output tables.
+
+    Slicer --no-main-window --python-script MHubRunnerBenchmark.py [--output results.json] [--slices N] [--size N] ...
+
+Results are written as json. Two result files (e.g. of two commits) are compared without Slicer:
+
+    python MHubRunnerBenchmark.py --compare baseline.json results.json [--threshold 0.1]
+"""
+
+import json
+import os
+import sys
+import time
+import unittest
+from typing import Any, Callable, Dict, List, Optional
+
+
+class BenchmarkResults:
+    """
+    Timings of all benchmarks of a session, written as json that can be compared between commits.
+    Every metric ending in `_s` is a duration (lower is better), all others are informational.
+    """
+
+    version: int = 1
+
+    def __init__(self, parameters: Dict[str, Any]):
+        self.parameters = parameters
+        self.results: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, name: str, **metrics) -> None:
+        self.results.setdefault(name, {}).update({k: round(v, 6) if isinstance(v, float) else v for k, v in metrics.items()})
+
+    def write(self, file: str) -> None:
+        import platform, subprocess
+
+        # commit of the module source (if it is a git checkout)
+        try:
+            commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, timeout=5).stdout.strip() or None
+        except (OSError, subprocess.SubprocessError):
+            commit = None
+
+        # slicer version (results of different versions are not comparable)
+        try:
+            import slicer
+            slicer_version = slicer.app.applicationVersion
+        except ImportError:
+            slicer_version = None
+
+        os.makedirs(os.path.dirname(os.path.abspath(file)), exist_ok=True)
+        with open(file, "w") as f:
+            json.dump({
+                "version": self.version,
+                "commit": commit,
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "platform": platform.platform(),
+                "python": platform.python_version(),
+                "slicer": slicer_version,
+                "cpus": os.cpu_count(),
+                "parameters": self.parameters,
+                "results": self.results,
+            }, f, indent=2)
+        print(f"Benchmark results written to {file}")
+
+    @staticmethod
+    def compare(baseline_file: str, current_file: str, threshold: float = 0.1) -> int:
+        """
+        Print the change of every duration, returns the number of durations that got slower by more than threshold.
+        """
+        with open(baseline_file) as f:
+            baseline = json.load(f)
+        with open(current_file) as f:
+            current = json.load(f)
+
+        # different parameters measure different work
+        if baseline.get("parameters") != current.get("parameters"):
+            print(f"Warning: parameters differ\n  {baseline.get('parameters')}\n  {current.get('parameters')}")
+
+        print(f"{'metric':<48} {'baseline':>10} {'current':>10} {'change':>8}")
+        regressions = 0
+        for name, metrics in current["results"].items():
+            for metric, value in metrics.items():
+                before = baseline["results"].get(name, {}).get(metric)
+                if not metric.endswith("_s") or not isinstance(value, (int, float)) or not isinstance(before, (int, float)):
+                    continue
+                change = (value - before) / before if before else 0.0
+                regression = change > threshold
+                regressions += regression
+                print(f"{name + '.' + metric:<48} {before:>10.4f} {value:>10.4f} {change:>+7.1%}" + (" slower" if regression else ""))
+
+        return regressions
+
+
+class BenchmarkData:
+    """
+    Synthetic input and outputs: a CT series (sphere phantom with noise), DICOM SEGs derived from it (written
+    with dcmqi, like MHub does) and the csv / json reports a model writes. The stub runtime copies the outputs
+    into the output directory of every run.
+    """
+
+    def __init__(self, directory: str, slices: int, size: int, segments: int, rows: int):
+        self.directory = directory
+        self.slices = slices
+        self.size = size
+        self.segments = segments
+        self.rows = rows
+        self.spacing = (0.8, 0.8, 1.5)
+        self.series_dir = os.path.join(directory, "series")
+        self.output_dir = os.path.join(directory, "outputs")
+
+    def createSeries(self) -> List[str]:
+        import numpy as np
+        import pydicom
+        from pydicom.dataset import Dataset, FileMetaDataset
+        from pydicom.uid import generate_uid, ExplicitVRLittleEndian, CTImageStorage
+
+        os.makedirs(self.series_dir, exist_ok=True)
+        study_uid, series_uid, frame_uid = generate_uid(), generate_uid(), generate_uid()
+        phantom = self.phantom()
+        rng = np.random.default_rng(0)
+
+        files = []
+        for k in range(self.slices):
+            instance_uid = generate_uid()
+
+            # file meta
+            meta = FileMetaDataset()
+            meta.MediaStorageSOPClassUID = CTImageStorage
+            meta.MediaStorageSOPInstanceUID = instance_uid
+            meta.TransferSyntaxUID = ExplicitVRLittleEndian
+
+            # patient, study, series
+            ds = Dataset()
+            ds.file_meta = meta
+            ds.SOPClassUID = CTImageStorage
+            ds.SOPInstanceUID = instance_uid
+            ds.PatientName = "Benchmark^Phantom"
+            ds.PatientID = "MHUB-BENCHMARK"
+            ds.StudyInstanceUID = study_uid
+            ds.StudyDate = "20240101"
+            ds.StudyID = "1"
+            ds.SeriesInstanceUID = series_uid
+            ds.SeriesNumber = 1
+            ds.SeriesDescription = "Synthetic CT"
+            ds.Modality = "CT"
+            ds.FrameOfReferenceUID = frame_uid
+            ds.InstanceNumber = k + 1
+
+            # geometry (axial slices, identity orientation)
+            ds.ImagePositionPatient = [0.0, 0.0, k * self.spacing[2]]
+            ds.ImageOrientationPatient = [1, 0, 0, 0, 1, 0]
+            ds.PixelSpacing = [self.spacing[1], self.spacing[0]]
+            ds.SliceThickness = self.spacing[2]
+
+            # pixels (HU + 1024)
+            voxels = np.where(phantom[k] > 0, 1084, 1004 if k % 2 else 1000) + rng.integers(-20, 20, (self.size, self.size))
+            ds.Rows = ds.Columns = self.size
+            ds.SamplesPerPixel = 1
+            ds.PhotometricInterpretation = "MONOCHROME2"
+            ds.BitsAllocated = ds.BitsStored = 16
+            ds.HighBit = 15
+            ds.PixelRepresentation = 0
+            ds.RescaleIntercept = -1024
+            ds.RescaleSlope = 1
+            ds.PixelData = voxels.astype(np.uint16).tobytes()
+
+            # pydicom < 3 needs the encoding on the dataset
+            file = os.path.join(self.series_dir, f"{k:05d}.dcm")
+            if int(pydicom.__version__.split(".")[0]) < 3:
+                ds.is_little_endian = True
+                ds.is_implicit_VR = False
+                pydicom.dcmwrite(file, ds, write_like_original=False)
+            else:
+                pydicom.dcmwrite(file, ds, enforce_file_format=True)
+            files.append(file)
+
+        return files
+
+    def phantom(self):
+        """
+        Label map of nested spheres (label 1 is the outermost), k-j-i order.
+        """
+        import numpy as np
+        k, j, i = np.ogrid[:self.slices, :self.size, :self.size]
+        distance = np.sqrt(((i - self.size / 2) * self.spacing[0]) ** 2 + ((j - self.size / 2) * self.spacing[1]) ** 2 + ((k - self.slices / 2) * self.spacing[2]) ** 2)
+        radius = 0.4 * min(self.size * self.spacing[0], self.slices * self.spacing[2])
+        labels = np.zeros((self.slices, self.size, self.size), dtype=np.uint8)
+        for label in range(1, self.segments + 1):
+            labels[distance < radius * (1 - (label - 1) / self.segments)] = label
+        return labels
+
+    def createSegmentation(self, files: List[str]) -> str:
+        """
+        DICOM SEG of the phantom, written by the dcmqi itkimage2segimage cli module.
+        """
+        import slicer
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        # label map with the geometry of the series (lps, as dcmqi reads it)
+        labels_file = os.path.join(self.directory, "labels.nrrd")
+        header = "\n".join([
+            "NRRD0004",
+            "type: uint8",
+            "dimension: 3",
+            "space: left-posterior-superior",
+            f"sizes: {self.size} {self.size} {self.slices}",
+            f"space directions: ({self.spacing[0]},0,0) (0,{self.spacing[1]},0) (0,0,{self.spacing[2]})",
+            "kinds: domain domain domain",
+            "endian: little",
+            "encoding: raw",
+            "space origin: (0,0,0)",
+        ]) + "\n\n"
+        with open(labels_file, "wb") as f:
+            f.write(header.encode("ascii"))
+            f.write(self.phantom().tobytes())
+
+        # segment metadata
+        metadata_file = os.path.join(self.directory, "seg.json")
+        with open(metadata_file, "w") as f:
+            json.dump({
+                "ContentCreatorName": "MHubRunnerBenchmark",
+                "ClinicalTrialSeriesID": "1",
+                "ClinicalTrialTimePointID": "1",
+                "SeriesDescription": "Segmentation",
+                "SeriesNumber": "42",
+                "InstanceNumber": "1",
+                "segmentAttributes": [[{
+                    "labelID": label,
+                    "SegmentDescription": f"Sphere {label}",
+                    "SegmentAlgorithmType": "AUTOMATIC",
+                    "SegmentAlgorithmName": "MHubRunnerBenchmark",
+                    "SegmentedPropertyCategoryCodeSequence": {"CodeValue": "123037004", "CodingSchemeDesignator": "SCT", "CodeMeaning": "Anatomical Structure"},
+                    "SegmentedPropertyTypeCodeSequence": {"CodeValue": "10200004", "CodingSchemeDesignator": "SCT", "CodeMeaning": "Liver"},
+                    "recommendedDisplayRGBValue": [50 * label % 256, 120, 200],
+                } for label in range(1, self.segments + 1)]],
+            }, f)
+
+        # write seg
+        seg_file = os.path.join(self.output_dir, "phantom.seg.dcm")
+        cli = slicer.cli.runSync(slicer.modules.itkimage2segimage, None, {
+            "inputImageList": labels_file,
+            "inputDICOMList": ",".join(files),
+            "inputMetadata": metadata_file,
+            "outputDICOM": seg_file,
+        })
+        assert cli.GetStatus() & cli.ErrorsMask == 0, f"itkimage2segimage failed: {cli.GetErrorText()}"
+        slicer.mrmlScene.RemoveNode(cli)
+
+        return seg_file
+
+    def createReports(self) -> tuple[str, str]:
+        """
+        Csv and json reports of a model (one row / record per finding).
+        """
+        import random
+        os.makedirs(self.output_dir, exist_ok=True)
+        rng = random.Random(0)
+        header = ["id", "series", "slice", "x", "y", "z", "volume_ml", "mean_hu", "std_hu", "label", "confidence", "note"]
+        labels = ["nodule", "lesion", "cyst", "calcification", "vessel"]
+        rows = [[i, "1", rng.randint(0, self.slices - 1), rng.uniform(0, 400), rng.uniform(0, 400), rng.uniform(0, 300),
+                 rng.uniform(0.01, 50), rng.uniform(-900, 300), rng.uniform(5, 80), rng.choice(labels), rng.random(),
+                 "" if rng.random() < 0.8 else "review"] for i in range(self.rows)]
+
+        csv_file = os.path.join(self.output_dir, "findings.csv")
+        with open(csv_file, "w") as f:
+            f.write(",".join(header) + "\n")
+            for row in rows:
+                f.write(",".join(f"{v:.4f}" if isinstance(v, float) else str(v) for v in row) + "\n")
+
+        # nested json: metadata and record arrays
+        json_file = os.path.join(self.output_dir, "report.json")
+        with open(json_file, "w") as f:
+            json.dump({
+                "model": {"name": "stubmodel", "version": "1.0.0", "workflow": "default"},
+                "findings": [dict(zip(header, row)) for row in rows[:max(self.rows // 10, 1)]],
+                "organs": [{"name": f"organ_{i}", "volume_ml": rng.uniform(10, 2000), "stats": {"mean_hu": rng.uniform(-100, 100)}} for i in range(100)],
+            }, f)
+
+        return csv_file, json_file
+
+
+class StubRuntime:
+    """
+    Puts `docker` and `udocker` executables that call mhub_stub_runtime.py on the PATH.
+    """
+
+    script: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mhub_stub_runtime.py")
+
+    def __init__(self, directory: str, seconds: float, output_dir: Optional[str] = None):
+        self.bin_dir = os.path.join(directory, "bin")
+        self.state_dir = os.path.join(directory, "state")
+        self.executables: Dict[str, str] = {}
+        os.makedirs(self.bin_dir, exist_ok=True)
+
+        # wrappers with the python of the running interpreter
+        for runtime in ["docker", "udocker"]:
+            if sys.platform == "win32":
+                file = os.path.join(self.bin_dir, f"{runtime}.bat")
+                content = f'@"{sys.executable}" "{self.script}" {runtime} %*\r\n'
+            else:
+                file = os.path.join(self.bin_dir, runtime)
+                content = f'#!/bin/sh\nexec "{sys.executable}" "{self.script}" {runtime} "$@"\n'
+            with open(file, "w") as f:
+                f.write(content)
+            os.chmod(file, 0o755)
+            self.executables[runtime] = file
+
+        # configuration
+        self.environ = {"MHUB_STUB_STATE": self.state_dir, "MHUB_STUB_SECONDS": str(seconds)}
+        if output_dir:
+            self.environ["MHUB_STUB_OUTPUT"] = output_dir
+
+    def __enter__(self) -> "StubRuntime":
+        self._environ = {k: os.environ.get(k) for k in list(self.environ) + ["PATH"]}
+        os.environ.update(self.environ)
+        os.environ["PATH"] = self.bin_dir + os.pathsep + os.environ.get("PATH", "")
+        return self
+
+    def __exit__(self, *args) -> None:
+        for k, v in self._environ.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+
+    def addImage(self, image: str) -> None:
+        os.makedirs(self.state_dir, exist_ok=True)
+        with open(os.path.join(self.state_dir, "images"), "a") as f:
+            f.write(image + "\n")
+
+
+def measure(fn: Callable[[], Any], repeat: int, setup: Optional[Callable[[], None]] = None) -> Dict[str, float]:
+    """
+    Best and median wall time of fn.
+    """
+    seconds = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        fn()
+        seconds.append(time.perf_counter() - started)
+    seconds.sort()
+    return {"best_s": seconds[0], "median_s": seconds[len(seconds) // 2]}
+
+
+def wait(done: Callable[[], bool], timeout: float) -> None:
+    """
+    Process qt events (the observers are polled by qt timers) until done.
+    """
+    import slicer
+    deadline = time.monotonic() + timeout
+    while not done():
+        assert time.monotonic() < deadline, "Benchmark timed out"
+        slicer.app.processEvents()
+        time.sleep(0.005)
+
+
+class MHubRunnerBenchmark(unittest.TestCase):
+    """
+    Every benchmark adds its metrics to the results, which are written once all benchmarks ran.
+    """
+
+    # workload (overridden by the command line)
+    parameters: Dict[str, Any] = {
+        "slices": 120,              # slices of the synthetic series
+        "size": 512,                # rows and columns of a slice
+        "segments": 5,              # segments of the dicom seg
+        "rows": 100000,             # rows of the csv report
+        "models": 400,              # models in the model table
+        "seconds": 5.0,             # run time of a stub container
+        "repeat": 3,                # repetitions of the fast benchmarks
+    }
+
+    # results file (defaults to the temp directory)
+    output: str = os.environ.get("MHUB_BENCHMARK_OUTPUT", "")
+
+    results: BenchmarkResults
+    data: BenchmarkData
+    runtime: StubRuntime
+
+    @classmethod
+    def setUpClass(cls):
+        import tempfile
+        from MHubRunner import MHubRunnerLogic
+
+        cls.directory = tempfile.mkdtemp(prefix="mhub_benchmark_")
+        cls.results = BenchmarkResults(dict(cls.parameters))
+
+        # synthetic data
+        p = cls.parameters
+        cls.data = BenchmarkData(cls.directory, p["slices"], p["size"], p["segments"], p["rows"])
+        started = time.perf_counter()
+        cls.files = cls.data.createSeries()
+        cls.seg_file = cls.data.createSegmentation(cls.files)
+        cls.csv_file, cls.json_file = cls.data.createReports()
+        print(f"Created benchmark data in {time.perf_counter() - started:.1f}s: {len(cls.files)} slices, {cls.seg_file}, {cls.csv_file}, {cls.json_file}")
+
+        # container runtime
+        cls.runtime = StubRuntime(cls.directory, p["seconds"], cls.data.output_dir)
+        cls.runtime.__enter__()
+        cls.runtime.addImage("mhubai/stubmodel:latest")
+
+        # logic on the stub runtime
+        cls.logic = MHubRunnerLogic()
+        cls.logic._executables.update(cls.runtime.executables)
+        cls.logic.staging_dir = os.path.join(cls.directory, "staging")
+
+    @classmethod
+    def tearDownClass(cls):
+        import shutil
+        cls.runtime.__exit__()
+        cls.results.write(cls.output or os.path.join(os.path.dirname(cls.directory), "MHubRunnerBenchmark.json"))
+        shutil.rmtree(cls.directory, ignore_errors=True)
+
+    def setUp(self):
+        import slicer
+        slicer.mrmlScene.Clear()
+
+    def createModel(self, index: int = 0, name: str = "stubmodel"):
+        from MHubRunner import Model
+        organs = ["liver", "spleen", "kidney", "lung", "heart", "aorta", "pancreas", "prostate", "brain", "colon"]
+        return Model(
+            id=str(index),
+            name=name,
+            label=f"{name.title()} {index}",
+            description=f"Segmentation of the {organs[index % len(organs)]} in {['CT', 'MR', 'PET'][index % 3]} images (benchmark model {index}).",
+            modalities=[["CT", "MR", "PET"][index % 3]],
+            categories=["Segmentation"] if index % 4 else ["Prediction"],
+            roi=[organs[(index + i) % len(organs)].upper() for i in range(1 + index % 5)],
+            cite="",
+            inputs=["DICOM"],
+            inputs_compatibility=index % 7 != 0
+        )
+
+    def test_staging(self):
+        """
+        Copy the series into a staging directory and fingerprint it (cold and memoized).
+        """
+        import io, shutil, threading
+        from MHubRunner import StagingWorker, HashIndex
+
+        total_bytes = sum(os.path.getsize(f) for f in self.files)
+        target_dir = os.path.join(self.directory, "staged")
+
+        # copy
+        timings = measure(
+            lambda: self.assertEqual(StagingWorker(self.files, target_dir).run(io.StringIO(), threading.Event()), 0),
+            self.parameters["repeat"],
+            setup=lambda: shutil.rmtree(target_dir, ignore_errors=True)
+        )
+        self.results.add("staging.copy", files=len(self.files), mb=total_bytes / 1e6, mb_per_s=total_bytes / 1e6 / timings["median_s"], **timings)
+
+        # content fingerprint, the first run hashes every file, later runs only stat them
+        index_dir = os.path.join(self.directory, "index")
+        self.results.add("staging.hash_cold", **measure(lambda: HashIndex(index_dir).fingerprint(self.files), self.parameters["repeat"], setup=lambda: shutil.rmtree(index_dir, ignore_errors=True)))
+        self.results.add("staging.hash_memoized", **measure(lambda: HashIndex(index_dir).fingerprint(self.files), self.parameters["repeat"]))
+        shutil.rmtree(target_dir, ignore_errors=True)
+
+    def test_monitoring(self):
+        """
+        Full runs (staging, container, output) on both local backends. The overhead is the wall time of a run
+        beyond the run time of the container, the cpu time is what slicer spends monitoring it.
+        """
+        from MHubRunner import RunContext, OutputFormat
+        runs_dir = os.path.join(self.directory, "runs")
+
+        for backend in ["docker", "udocker"]:
+            model = self.createModel()
+            run_id = self.logic.createRunId(model, runs_dir)
+            ctx = RunContext(
+                run_id=run_id,
+                model=model,
+                backend=backend,
+                gpus=None,
+                runs_dir=runs_dir,
+                input_dir=os.path.join(self.logic.staging_dir, run_id, "input"),
+                output_dir=os.path.join(runs_dir, run_id),
+                workflow="default",
+                output_format=OutputFormat.DICOMSEG,
+                input_hash=f"benchmark-{backend}",
+                staging=list(self.files)
+            )
+            os.makedirs(ctx.output_dir, exist_ok=True)
+
+            # callbacks
+            result: List[int] = []
+            updates = {"progress": 0, "status": 0, "telemetry": 0}
+            def onProgress(*args):
+                updates["progress"] += 1
+            def onStatus(*args):
+                updates["status"] += 1
+            def onTelemetry(*args):
+                updates["telemetry"] += 1
+            def onStop(returncode: int, *args):
+                result.append(returncode)
+
+            # run
+            cpu = time.process_time()
+            started = time.perf_counter()
+            self.logic.startRun(ctx, onProgress=onProgress, onStop=onStop, onStatus=onStatus, onTelemetry=onTelemetry)
+            wait(lambda: bool(result), 60 + 10 * self.parameters["seconds"])
+            wall = time.perf_counter() - started
+            cpu = time.process_time() - cpu
+
+            self.assertEqual(result, [0])
+            self.assertTrue(os.path.isfile(os.path.join(ctx.output_dir, os.path.basename(self.seg_file))))
+            self.results.add(f"monitoring.{backend}",
+                container_s=self.parameters["seconds"],
+                wall_s=wall,
+                overhead_s=wall - self.parameters["seconds"],
+                cpu_s=cpu,
+                cpu_percent=100 * cpu / wall,
+                **updates
+            )
+
+    def test_model_table(self):
+        """
+        Filter the model list by search text and render it into the model table.
+        """
+        import slicer
+        widget = slicer.util.getModuleWidget("MHubRunner")
+
+        # models and local images without network access
+        models = [self.createModel(i, f"model{i}") for i in range(self.parameters["models"])]
+        widget.logic._model_cache = models
+        widget.logic._images_cache = {"docker": [f"mhubai/model{i}:latest (4.2GB)" for i in range(0, len(models), 3)]}
+        queries = ["", "liver", "CT", "segmentation", "model1", "no match"]
+
+        self.results.add("model_table.filter", models=len(models), **measure(lambda: [[m for m in models if m.str_match(q)] for q in queries], self.parameters["repeat"]))
+        self.results.add("model_table.render", models=len(models), **measure(lambda: widget.renderModelTable(models), self.parameters["repeat"]))
+        self.results.add("model_table.search", queries=len(queries), **measure(lambda: [widget.onSearchModel(q) for q in queries], self.parameters["repeat"]))
+        self.assertEqual(widget.ui.tblModelList.rowCount, 0)
+
+    def test_seg_import(self):
+        """
+        Import the DICOM SEG into a dicom database and load it (see SegmentationImportPipeline).
+        """
+        import slicer
+        from DICOMLib import DICOMUtils
+        from MHubRunner import SegmentationImportPipeline
+
+        with DICOMUtils.TemporaryDICOMDatabase(os.path.join(self.directory, "dicom")):
+            DICOMUtils.importDicom(self.data.series_dir)
+
+            timings: List[Dict[str, float]] = []
+            pipeline = SegmentationImportPipeline([self.seg_file], "copy", load=True)
+            pipeline.onStop(lambda t: timings.append(t))
+            pipeline.start()
+            wait(lambda: bool(timings), 300)
+
+            self.assertEqual(pipeline.loaded, [os.path.abspath(self.seg_file)])
+            self.assertEqual(pipeline.segments[os.path.abspath(self.seg_file)], self.parameters["segments"])
+            self.assertEqual(slicer.mrmlScene.GetNumberOfNodesByClass("vtkMRMLSegmentationNode"), 1)
+            self.results.add("seg_import", segments=self.parameters["segments"], **{f"{stage}_s": seconds for stage, seconds in timings[0].items()})
+
+    def test_output_table(self):
+        """
+        Index, filter and page the csv report, flatten the json report and render pages into a table node.
+        """
+        import slicer
+        from MHubRunner import CsvPageSource, JsonFlattener, RowsPageSource
+        widget = slicer.util.getModuleWidget("MHubRunner")
+        page_size = widget._outputPageSize
+        tableNode = slicer.mrmlScene.AddNewNodeByClass("vtkMRMLTableNode")
+
+        # csv
+        sources: List[CsvPageSource] = []
+        self.results.add("output_table.csv_index", rows=self.parameters["rows"], **measure(lambda: sources.append(CsvPageSource(self.csv_file)), self.parameters["repeat"]))
+        source = sources[-1]
+        self.assertEqual(len(source), self.parameters["rows"])
+        self.results.add("output_table.csv_filter", **measure(lambda: source.setFilter("review"), self.parameters["repeat"]))
+        source.setFilter("")
+        self.results.add("output_table.csv_page", page_size=page_size, **measure(lambda: source.page(source.pages(page_size) // 2, page_size), self.parameters["repeat"]))
+        header, rows = source.page(0, page_size)
+        self.results.add("output_table.render", page_size=page_size, **measure(lambda: self.logic.renderTableData(tableNode, header, rows), self.parameters["repeat"]))
+        self.assertEqual(tableNode.GetNumberOfRows(), min(page_size, self.parameters["rows"]))
+        for s in sources:
+            s.close()
+
+        # json
+        tables: List[Any] = []
+        self.results.add("output_table.json_flatten", **measure(lambda: tables.append(JsonFlattener().tables(JsonFlattener.eventsFromFile(self.json_file))), self.parameters["repeat"]))
+        name, header, rows = max(tables[-1], key=lambda t: len(t[2]))
+        page = RowsPageSource(header, rows).page(0, page_size)
+        self.results.add("output_table.json_render", tables=len(tables[-1]), rows=len(rows), **measure(lambda: self.logic.renderTableData(tableNode, *page), self.parameters["repeat"]))
+
+
+def main(argv: List[str]) -> int:
+    import argparse
+    parser = argparse.ArgumentParser(description="MHubRunner benchmarks")
+    parser.add_argument("--output", help="results file (json)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"), help="compare two results files (no Slicer needed)")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative slowdown reported as regression (default 0.1)")
+    parser.add_argument("--only", help="run only the benchmarks whose name contains this text, e.g. staging")
+    for name, value in MHubRunnerBenchmark.parameters.items():
+        parser.add_argument(f"--{name}", type=type(value), default=value)
+    args = parser.parse_args(argv)
+
+    # compare
+    if args.compare:
+        return 1 if BenchmarkResults.compare(*args.compare, threshold=args.threshold) else 0
+
+    # run
+    MHubRunnerBenchmark.parameters = {name: getattr(args, name) for name in MHubRunnerBenchmark.parameters}
+    MHubRunnerBenchmark.output = args.output or ""
+    suite = unittest.TestLoader().loadTestsFromTestCase(MHubRunnerBenchmark)
+    if args.only:
+        suite = unittest.TestSuite([t for t in suite if args.only in t.id()])
+    result = unittest.TextTestRunner(verbosity=2).run(suite)
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == "__main__":
+    returncode = main(sys.argv[1:])
+
+    # inside slicer (--python-script) the application has to be closed explicitly
+    try:
+        import slicer
+        slicer.util.exit(returncode)
+    except ImportError:
+        sys.exit(returncode)
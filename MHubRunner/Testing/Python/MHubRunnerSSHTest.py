@@ -0,0 +1,111 @@
+"""
+Integration test of the ssh backend against a real host: the input is uploaded, a container is run on the host
+with its output streamed back, and the results are downloaded, all through the pooled ssh connection. The host
+needs docker and the test image (pulled if missing). Skipped unless a host is configured:
+
+    MHUB_TEST_SSH_HOST=user@host[:port] Slicer --no-main-window --python-script MHubRunnerSSHTest.py
+
+MHUB_TEST_SSH_HOST can also be an alias of ~/.ssh/config, MHUB_TEST_SSH_IMAGE selects the image (default busybox).
+"""
+
+import io
+import os
+import sys
+import threading
+import unittest
+
+
+@unittest.skipUnless(os.environ.get("MHUB_TEST_SSH_HOST"), "MHUB_TEST_SSH_HOST is not set")
+class MHubRunnerSSHTest(unittest.TestCase):
+
+    hostid: str = os.environ.get("MHUB_TEST_SSH_HOST", "")
+    image: str = os.environ.get("MHUB_TEST_SSH_IMAGE", "busybox")
+
+    def setUp(self):
+        import posixpath, tempfile, uuid
+        from MHubRunner import SSHHost
+
+        self.host = SSHHost(self.hostid)
+        self.remote_dir = posixpath.join(SSHHost.base_dir, f"test_{uuid.uuid4().hex[:12]}")
+        self.local_dir = tempfile.mkdtemp(prefix="mhub_ssh_test_")
+
+    def tearDown(self):
+        import shutil
+        from MHubRunner import SSHConnectionPool
+
+        self.host.exec(["rm", "-rf", self.remote_dir])
+        SSHConnectionPool.close(self.hostid)
+        shutil.rmtree(self.local_dir, ignore_errors=True)
+
+    def test_information(self):
+        info = self.host.getInformation()
+        self.assertTrue(info.canConnect)
+        self.assertTrue(info.dockerAvailable, info.dockerVersion)
+
+    def test_connection_pool(self):
+        from MHubRunner import SSHConnectionPool
+
+        # commands share one connection, a closed connection is reopened
+        client = SSHConnectionPool.get(self.hostid)
+        self.assertEqual(self.host.exec(["true"])[0], 0)
+        self.assertIs(SSHConnectionPool.get(self.hostid), client)
+        SSHConnectionPool.close(self.hostid)
+        self.assertEqual(self.host.exec(["echo", "reconnected"]), (0, "reconnected\n"))
+
+    def test_upload_run_download(self):
+        import posixpath
+
+        # input files
+        files = []
+        for i in range(3):
+            file = os.path.join(self.local_dir, f"{i}.dcm")
+            with open(file, "wb") as f:
+                f.write(os.urandom(100000 * (i + 1)))
+            files.append(file)
+
+        # upload
+        input_dir, output_dir = posixpath.join(self.remote_dir, "input"), posixpath.join(self.remote_dir, "output", "run")
+        self.host.upload(files, input_dir)
+        self.assertEqual(self.host.exec(["mkdir", "-p", output_dir])[0], 0)
+
+        # run a container on the host, its output is streamed back
+        stdout = io.StringIO()
+        returncode = self.host.stream([
+            "docker", "run", "--rm", "--network=none",
+            "-v", f"{input_dir}:/app/data/input_data:ro",
+            "-v", f"{output_dir}:/app/data/output_data:rw",
+            "--entrypoint", "sh", self.image, "-c", "cp /app/data/input_data/* /app/data/output_data/ && echo copied"
+        ], stdout, threading.Event())
+        self.assertEqual(returncode, 0, stdout.getvalue())
+        self.assertIn("copied", stdout.getvalue())
+
+        # download
+        download_dir = os.path.join(self.local_dir, "output")
+        downloaded = self.host.download(posixpath.join(self.remote_dir, "output"), download_dir)
+        self.assertEqual(sorted(os.path.relpath(f, download_dir) for f in downloaded), sorted(os.path.join("run", os.path.basename(f)) for f in files))
+        for file in files:
+            with open(file, "rb") as expected, open(os.path.join(download_dir, "run", os.path.basename(file)), "rb") as actual:
+                self.assertEqual(actual.read(), expected.read())
+
+    def test_stream_cancel(self):
+
+        # a cancelled stream closes the channel (and the remote process with its pty)
+        cancel = threading.Event()
+        timer = threading.Timer(1, cancel.set)
+        timer.start()
+        try:
+            self.assertEqual(self.host.stream(["sleep", "30"], io.StringIO(), cancel), -1)
+        finally:
+            timer.cancel()
+
+
+if __name__ == "__main__":
+    result = unittest.main(argv=sys.argv[:1], exit=False).result
+    returncode = 0 if result.wasSuccessful() else 1
+
+    # inside slicer (--python-script) the application has to be closed explicitly
+    try:
+        import slicer
+        slicer.util.exit(returncode)
+    except ImportError:
+        sys.exit(returncode)
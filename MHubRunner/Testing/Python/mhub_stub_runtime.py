@@ -0,0 +1,338 @@
+"""
+Stand-in for the docker and udocker executables, used by the MHubRunner benchmarks.
+
+    python mhub_stub_runtime.py docker|udocker <command> [args]
+
+The benchmark puts `docker` and `udocker` wrappers that call this script on the PATH. Containers replay
+the --print output of an MHub run and copy prepared output files into the mounted output directory when
+they finish. Containers are kept as state files, so runs can be inspected, followed, stopped and removed
+from other processes like real containers.
+
+The replayed log (mhub_print.log) is the output of an nnU-Net lung segmentation workflow as mhubio
+prints it with --print: the module banners of Module.execute ("Start <Module>" after a separator line,
+"Done in <seconds> seconds."), the verbose lines of the modules and the output of the tools they run.
+Any log captured with `docker run ... mhubai/<model> --print > run.log` can be replayed instead. The
+modules keep their share of the captured run time, scaled to the configured run time.
+
+Configuration (environment):
+    MHUB_STUB_STATE     directory of the container and image state (required)
+    MHUB_STUB_SECONDS   run time of a container in seconds (default 5)
+    MHUB_STUB_LOG       log replayed by a run (default mhub_print.log next to this script)
+    MHUB_STUB_OUTPUT    directory copied into the output directory of every run (optional)
+    MHUB_STUB_RC        exit code of a run (default 0)
+"""
+
+import json
+import os
+import re
+import shutil
+import signal
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+# mhub --print output replayed by the containers
+LOG_FILE = os.environ.get("MHUB_STUB_LOG", os.path.join(os.path.dirname(os.path.abspath(__file__)), "mhub_print.log"))
+
+# end of a module (see mhubio Module.execute)
+DONE_PATTERN = re.compile(r"^Done in (?P<seconds>\d+(?:\.\d*)?(?:e[+-]?\d+)?) seconds\.$")
+
+# docker options that take a value (the image is the first argument that is not an option)
+VALUE_OPTIONS = ["--name", "-v", "--volume", "--entrypoint", "--gpus", "-e", "--env", "-w", "--workdir", "--network", "--cpus", "--memory", "--memory-swap", "--shm-size"]
+
+STATE_DIR = os.environ.get("MHUB_STUB_STATE", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".stub_state"))
+
+
+def write(text: str) -> None:
+    sys.stdout.write(text)
+    sys.stdout.flush()
+
+
+def container_file(name: str) -> str:
+    return os.path.join(STATE_DIR, "containers", name)
+
+
+def read_container(name: str) -> Optional[Dict]:
+    try:
+        with open(container_file(name)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_container(name: str, state: Dict) -> None:
+    os.makedirs(os.path.dirname(container_file(name)), exist_ok=True)
+    with open(container_file(name) + ".tmp", "w") as f:
+        json.dump(state, f)
+    os.replace(container_file(name) + ".tmp", container_file(name))
+
+
+def images_file() -> str:
+    return os.path.join(STATE_DIR, "images")
+
+
+def read_images() -> List[str]:
+    if not os.path.isfile(images_file()):
+        return []
+    with open(images_file()) as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def write_images(images: List[str]) -> None:
+    os.makedirs(STATE_DIR, exist_ok=True)
+    with open(images_file(), "w") as f:
+        f.write("\n".join(sorted(set(images))) + "\n")
+
+
+def read_log(file: str) -> List[Tuple[List[str], float]]:
+    """
+    Split a captured log into the lines of each module (up to its done line) and the seconds it took.
+    """
+    with open(file, encoding="utf-8", errors="replace") as f:
+        lines = f.read().splitlines()
+    segments: List[Tuple[List[str], float]] = []
+    current: List[str] = []
+    for line in lines:
+        current.append(line)
+        match = DONE_PATTERN.match(line.strip())
+        if match:
+            segments.append((current, float(match.group("seconds"))))
+            current = []
+    if current:
+        segments.append((current, 0.0))
+    return segments
+
+
+def parse_run(args: List[str]) -> Tuple[Dict[str, List[str]], Optional[str], List[str]]:
+    """
+    Split run arguments into options, image and container arguments.
+    """
+    options: Dict[str, List[str]] = {}
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg in VALUE_OPTIONS and i + 1 < len(args):
+            options.setdefault(arg, []).append(args[i + 1])
+            i += 2
+        elif arg.startswith("-"):
+            key, _, value = arg.partition("=")
+            options.setdefault(key, []).append(value)
+            i += 1
+        else:
+            return options, arg, args[i + 1:]
+    return options, None, []
+
+
+def mounts(options: Dict[str, List[str]]) -> Dict[str, str]:
+    """
+    Container path to host path of all volumes.
+    """
+    volumes = options.get("-v", []) + options.get("--volume", [])
+    return {v.split(":")[1]: v.split(":")[0] for v in volumes if v.count(":") >= 1}
+
+
+def emulate(name: Optional[str], options: Dict[str, List[str]], image: str) -> int:
+    """
+    Replay the MHub log over the configured run time and write the outputs.
+    """
+    seconds = float(os.environ.get("MHUB_STUB_SECONDS", "5"))
+    returncode = int(os.environ.get("MHUB_STUB_RC", "0"))
+    volumes = mounts(options)
+
+    # state of a named container (docker stop signals the process)
+    if name:
+        write_container(name, {"status": "running", "exitcode": 0, "pid": os.getpid(), "image": image, "started": time.time()})
+        def on_term(signum, frame):
+            write_container(name, {"status": "exited", "exitcode": 143, "pid": 0, "image": image})
+            sys.exit(143)
+        signal.signal(signal.SIGTERM, on_term)
+
+    # modules keep their share of the captured run time, the lines of a module are spread over its time
+    segments = read_log(LOG_FILE)
+    captured = sum(module_seconds for _, module_seconds in segments) or 1.0
+    for lines, module_seconds in segments:
+        delay = seconds * module_seconds / captured / len(lines)
+        started = time.time()
+        for line in lines:
+            time.sleep(delay)
+
+            # the done line reports the replayed duration (mhubio formats it with %g)
+            if DONE_PATTERN.match(line.strip()):
+                line = "Done in %g seconds." % (time.time() - started)
+            write(line + "\n")
+
+    # outputs
+    output_dir = volumes.get("/app/data/output_data")
+    prepared = os.environ.get("MHUB_STUB_OUTPUT")
+    if output_dir and prepared and os.path.isdir(prepared):
+        shutil.copytree(prepared, output_dir, dirs_exist_ok=True)
+
+    # done
+    if name:
+        write_container(name, {"status": "exited", "exitcode": returncode, "pid": 0, "image": image})
+    return returncode
+
+
+def docker(args: List[str]) -> int:
+    command, args = (args[0], args[1:]) if args else ("", [])
+
+    if command == "--version":
+        write("Docker version 24.0.7, build stub\n")
+        return 0
+
+    elif command == "run":
+        options, image, container_args = parse_run(args)
+        if image is None:
+            write("docker: run requires an image\n")
+            return 125
+
+        # workflow listing (see MHubRunnerLogic.getModelWorkflows)
+        if options.get("--entrypoint") == ["ls"]:
+            write("default.yml\nnifti.yml\nnrrd.yml\n")
+            return 0
+
+        return emulate((options.get("--name") or [None])[0], options, image)
+
+    elif command == "logs":
+        name = args[-1]
+        state = read_container(name)
+        if state is None:
+            write(f"Error: No such container: {name}\n")
+            return 1
+
+        # follow until the container exits
+        write(f"(attached to {name})\n")
+        while "-f" in args and state is not None and state["status"] == "running":
+            time.sleep(0.2)
+            state = read_container(name)
+        return 0
+
+    elif command in ["container", "inspect"]:
+        name = args[-1]
+        state = read_container(name)
+        if state is None:
+            write(f"Error: No such container: {name}\n")
+            return 1
+        write(f"{state['status']} {state['exitcode']}\n")
+        return 0
+
+    elif command == "stats":
+        name = args[-1]
+        state = read_container(name)
+        read_mb = 0.0
+
+        # one sample per second while the container runs
+        while state is not None and state["status"] == "running":
+            read_mb += 12.5
+            elapsed = time.time() - state.get("started", time.time())
+            write(json.dumps({
+                "Name": name,
+                "CPUPerc": f"{180 + 40 * (int(elapsed) % 3):.2f}%",
+                "MemUsage": f"{1.2 + 0.1 * (int(elapsed) % 5):.2f}GiB / 7.6GiB",
+                "BlockIO": f"{read_mb:.1f}MB / 4.1MB",
+                "NetIO": "0B / 0B",
+                "PIDs": "23",
+            }) + "\n")
+            time.sleep(1)
+            state = read_container(name)
+        return 0
+
+    elif command == "stop":
+        name = args[-1]
+        state = read_container(name)
+        if state is None:
+            write(f"Error: No such container: {name}\n")
+            return 1
+        if state["status"] == "running" and state.get("pid"):
+            try:
+                os.kill(state["pid"], signal.SIGTERM)
+            except OSError:
+                pass
+            write_container(name, dict(state, status="exited", exitcode=143, pid=0))
+        write(f"{name}\n")
+        return 0
+
+    elif command == "rm":
+        name = args[-1]
+        if os.path.exists(container_file(name)):
+            os.remove(container_file(name))
+        write(f"{name}\n")
+        return 0
+
+    elif command == "images":
+        for image in read_images():
+            repository, _, tag = image.partition(":")
+            write(f"{repository}|{tag or 'latest'}|4.2GB\n")
+        return 0
+
+    elif command == "pull":
+        image = args[-1] if ":" in args[-1] else f"{args[-1]}:latest"
+        write(f"latest: Pulling from {image.split(':')[0]}\n")
+        for layer in ["a1b2c3", "d4e5f6", "0a1b2c"]:
+            time.sleep(0.1)
+            write(f"{layer}: Pull complete\n")
+        write(f"Status: Downloaded newer image for {image}\n")
+        write_images(read_images() + [image])
+        return 0
+
+    elif command == "rmi":
+        write_images([i for i in read_images() if i != args[-1]])
+        write(f"Untagged: {args[-1]}\n")
+        return 0
+
+    write(f"docker: '{command}' is not supported by the stub runtime\n")
+    return 1
+
+
+def udocker(args: List[str]) -> int:
+    command, args = (args[0], args[1:]) if args else ("", [])
+
+    if command == "--version":
+        write("version: 1.3.17\n")
+        return 0
+
+    elif command == "install":
+        return 0
+
+    elif command == "images":
+        write("REPOSITORIES\n")
+        for image in read_images():
+            write(f"{image}    .\n")
+        return 0
+
+    elif command == "pull":
+        write(f"Downloading layers of {args[-1]}\n")
+        time.sleep(0.2)
+        write_images(read_images() + [args[-1]])
+        return 0
+
+    elif command == "create":
+        write("7c2b6f4e-3c0d-3a4e-8d2b-5e9a1f0c2b7d\n")
+        return 0
+
+    elif command == "setup":
+        return 0
+
+    elif command == "run":
+        options, image, _ = parse_run(args)
+        if image is None:
+            write("Error: run requires a container or image\n")
+            return 1
+        return emulate(None, options, image)
+
+    elif command == "rmi":
+        write_images([i for i in read_images() if i != args[-1]])
+        return 0
+
+    write(f"udocker: '{command}' is not supported by the stub runtime\n")
+    return 1
+
+
+if __name__ == "__main__":
+    runtime, arguments = sys.argv[1], sys.argv[2:]
+    try:
+        sys.exit(docker(arguments) if runtime == "docker" else udocker(arguments))
+    except BrokenPipeError:
+
+        # the reader went away (e.g. a stats stream that was stopped)
+        sys.exit(0)